@@ -1,6 +1,8 @@
-import requests
 import os
 
+from scryfall.cache import ScryfallCache
+from scryfall.client import ScryfallClient
+
 
 def criar_pasta(nome_carta):
     pasta_principal = nome_carta.replace(" ", "_")
@@ -11,40 +13,35 @@ def criar_pasta(nome_carta):
     return pasta_png, pasta_art_crop
 
 
-def baixar_imagem(url, caminho):
-    resposta = requests.get(url)
-    if resposta.status_code == 200:
-        with open(caminho, 'wb') as arquivo:
-            arquivo.write(resposta.content)
-        print(f"Imagem salva: {caminho}")
-    else:
-        print(f"Erro ao baixar imagem: {url}")
-
-
-def baixar_todas_artes(nome_carta):
-    url = f"https://api.scryfall.com/cards/search?q=%21%22{nome_carta.replace(' ', '%20')}%22+new%3Aart+is%3Abooster&unique=prints"
-    resposta = requests.get(url)
+def baixar_todas_artes(nome_carta, cliente=None):
+    cliente = cliente or ScryfallClient(cache=ScryfallCache())
+    busca = {'q': f'!"{nome_carta}" new:art is:booster', 'unique': 'prints'}
 
-    if resposta.status_code != 200:
-        print(f"Erro ao buscar a carta {nome_carta}.")
-        return
-
-    dados = resposta.json()
-    if "data" not in dados:
+    # Percorre todas as páginas da busca antes de baixar
+    cartas = list(cliente.paginate('/cards/search', params=busca))
+    if not cartas:
         print(f"Nenhuma arte encontrada para {nome_carta}.")
         return
 
     pasta_png, pasta_art_crop = criar_pasta(nome_carta)
 
-    for carta in dados["data"]:
+    downloads = []
+    for carta in cartas:
         if "image_uris" in carta:
             if "png" in carta["image_uris"]:
-                caminho_png = os.path.join(pasta_png, f"{carta['id']}.png")
-                baixar_imagem(carta["image_uris"]["png"], caminho_png)
+                downloads.append((carta["image_uris"]["png"], os.path.join(pasta_png, f"{carta['id']}.png")))
             if "art_crop" in carta["image_uris"]:
-                caminho_art_crop = os.path.join(pasta_art_crop, f"{carta['id']}.jpg")
-                baixar_imagem(carta["image_uris"]["art_crop"], caminho_art_crop)
+                downloads.append((carta["image_uris"]["art_crop"],
+                                  os.path.join(pasta_art_crop, f"{carta['id']}.jpg")))
+
+    # Imagens baixadas em paralelo pela mesma sessão
+    for (url, caminho), sucesso in zip(downloads, cliente.download_many(downloads)):
+        if sucesso:
+            print(f"Imagem salva: {caminho}")
+        else:
+            print(f"Erro ao baixar imagem: {url}")
 
 
-# Exemplo de uso
-baixar_todas_artes("Angelic Page")
+if __name__ == '__main__':
+    # Exemplo de uso
+    baixar_todas_artes("Angelic Page")
@@ -1,87 +1,70 @@
-import requests
 import os
-import datetime
 
+from scryfall.cache import ScryfallCache
+from scryfall.client import ScryfallClient
+from scryfall.pipeline import run_pipeline
+from scryfall.prints import image_uris, select_prints
 
-def criar_pasta():
-    horario = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    pasta = f"Imagens_cartas_{horario}"
-    os.makedirs(pasta, exist_ok=True)
-    return pasta
 
+def baixar_imagem_carta(nome_carta, pasta, cliente=None):
+    cliente = cliente or ScryfallClient(cache=ScryfallCache())
+    dados_carta = cliente.get_json('/cards/named', params={'exact': nome_carta})
 
-def baixar_imagem_carta(nome_carta, pasta):
-    url = f"https://api.scryfall.com/cards/named?exact={nome_carta.replace(' ', '+')}"
-    resposta = requests.get(url)
-
-    if resposta.status_code != 200:
+    if dados_carta is None:
         print(f"Erro ao buscar a carta {nome_carta}. Verifique o nome e tente novamente.")
         return
 
-    dados_carta = resposta.json()
-
     if "prints_search_uri" not in dados_carta:
         print(f"Não foi possível encontrar reimpressões para a carta {nome_carta}.")
         return
 
-    prints_url = dados_carta["prints_search_uri"]
-    prints_resposta = requests.get(prints_url)
-
-    if prints_resposta.status_code != 200:
-        print(f"Erro ao buscar reimpressões da carta {nome_carta}.")
-        return
-
-    prints_dados = prints_resposta.json()
-    cartas = prints_dados.get("data", [])
+    # Percorre todas as páginas de reimpressões
+    cartas = list(cliente.paginate(dados_carta["prints_search_uri"]))
 
     if not cartas:
         print(f"Nenhuma reimpressão encontrada para a carta {nome_carta}.")
         return
 
-    # Filtrar cartas que não são digitais, variações ou promos
-    cartas_filtradas = [carta for carta in cartas if
-                        not carta.get("digital", True) and not carta.get("variation", True) and not carta.get("promo",
-                                                                                                              True)]
-
-    if not cartas_filtradas:
+    impressoes = select_prints(cartas)
+    if impressoes is None:
         print(f"Nenhuma versão válida encontrada para {nome_carta}.")
         return
 
-    # Ordenar as cartas pelas datas de lançamento
-    cartas_filtradas.sort(key=lambda c: c.get("released_at", ""))
+    salvar_impressoes(nome_carta, impressoes, pasta, cliente)
+
+
+def salvar_imagem(cliente, carta, nome_carta, descricao, pasta):
+    imagem_url = image_uris(carta).get('png')
+    if not imagem_url:
+        print(f"Imagem não encontrada para {descricao} da carta {nome_carta}.")
+        return
 
-    mais_antiga = cartas_filtradas[0]
-    mais_recente = cartas_filtradas[-1]
+    nome_arquivo = os.path.join(pasta, f"{nome_carta.replace(' ', '_')}_{descricao}.png")
+    if cliente.download(imagem_url, nome_arquivo):
+        print(f"Imagem salva como {nome_arquivo}")
+    else:
+        print(f"Erro ao baixar a imagem para {descricao} da carta {nome_carta}.")
 
-    def salvar_imagem(carta, descricao):
-        try:
-            imagem_url = carta['image_uris']['png']
-        except KeyError:
-            print(f"Imagem não encontrada para {descricao} da carta {nome_carta}.")
-            return
 
-        imagem_resposta = requests.get(imagem_url)
-        if imagem_resposta.status_code == 200:
-            nome_arquivo = os.path.join(pasta, f"{nome_carta.replace(' ', '_')}_{descricao}.png")
-            with open(nome_arquivo, 'wb') as arquivo:
-                arquivo.write(imagem_resposta.content)
-            print(f"Imagem salva como {nome_arquivo}")
-        else:
-            print(f"Erro ao baixar a imagem para {descricao} da carta {nome_carta}.")
+def salvar_impressoes(nome_carta, impressoes, pasta, cliente):
+    mais_antiga, mais_recente = impressoes
+    salvar_imagem(cliente, mais_antiga, nome_carta, "mais_antiga", pasta)
+    salvar_imagem(cliente, mais_recente, nome_carta, "mais_recente", pasta)
 
-    salvar_imagem(mais_antiga, "mais_antiga")
-    salvar_imagem(mais_recente, "mais_recente")
 
+def processar_lista_cartas(arquivo_txt, cliente=None, workers=8, indice=None):
+    """
+    Baixa as imagens (mais antiga e mais recente) de todas as cartas de uma decklist.
 
-def processar_lista_cartas(arquivo_txt):
-    pasta = criar_pasta()
-    with open(arquivo_txt, "r", encoding="utf-8") as file:
-        for linha in file:
-            partes = linha.strip().split(" ", 1)
-            if len(partes) == 2:
-                _, nome_carta = partes
-                baixar_imagem_carta(nome_carta, pasta)
+    Usa o pipeline em estágios de scryfall.pipeline; com `indice`
+    (scryfall.bulk.BulkIndex), as impressões são escolhidas localmente e só as
+    imagens vão à rede. Para várias listas de uma vez, use
+    `python -m scryfall.pipeline lista1.txt lista2.txt ...`.
+    """
+    return run_pipeline([arquivo_txt], cliente=cliente, indice=indice, workers_baixar=workers,
+                        intervalo_progresso=0)
 
 
-# Exemplo de uso
-processar_lista_cartas("marwyn-20250329-160458.txt")
+if __name__ == '__main__':
+    # Exemplo de uso
+    processar_lista_cartas("marwyn-20250329-160458.txt")
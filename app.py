@@ -1,83 +1,672 @@
-from flask import Flask, render_template
+from flask import Flask, Response, render_template, request, abort, jsonify, url_for, g
 from flask_caching import Cache
-import pandas as pd
-from data_processing.data_loader import load_and_preprocess_data
-from data_processing.data_analyzer import analyze_data
-from visualization.plot_creator import create_plots, create_empty_plot
-from visualization.dashboard import create_dash_app
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from data_processing.config import TIPOS_PADRAO
+from data_processing.registry import CollectionRegistry, discover_collections
+from data_processing.snapshot import load_persisted, save_persisted, snapshot_version, source_signature
+from data_processing.metrics import REGISTRY, rss_bytes, stage
+from visualization.prerender import build_blob, blob_response, build_chart, chart_name, chart_names, render_chart
+import hashlib
+import hmac
+import plotly.offline
 import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+from functools import partial
 from logging.handlers import RotatingFileHandler
 
+# pandas, plotly.express e dash só são importados no primeiro uso (construção
+# do snapshot, primeiro gráfico, primeira requisição ao dashboard)
+
 # Configuração inicial
 app = Flask(__name__)
-app.config['CACHE_TYPE'] = 'simple'
+# Cache compartilhado entre os workers (SQLite local ou Redis), com chaves
+# versionadas pelo snapshot; KINDRED_CACHE_TYPE=simple volta ao cache por processo
+app.config['CACHE_TYPE'] = os.environ.get('KINDRED_CACHE_TYPE', 'data_processing.shared_cache.shared_cache')
+app.config['CACHE_REDIS_URL'] = os.environ.get('KINDRED_REDIS_URL')
+app.config['CACHE_SHARED_PATH'] = os.environ.get('KINDRED_SHARED_CACHE')
 cache = Cache(app)
 
-# Configuração de logging
-handler = RotatingFileHandler('app.log', maxBytes=10000, backupCount=1)
+# Configuração de logging (o app e os módulos de dados escrevem no mesmo arquivo)
+handler = RotatingFileHandler(os.environ.get('KINDRED_LOG_FILE', 'app.log'), maxBytes=10 * 1024 * 1024,
+                              backupCount=5)
 handler.setLevel(logging.INFO)
+handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'))
 app.logger.addHandler(handler)
 app.logger.setLevel(logging.INFO)
+logging.getLogger('data_processing').addHandler(handler)
+logging.getLogger('data_processing').setLevel(logging.INFO)
+
+tipos = list(TIPOS_PADRAO)
+# Orçamento de itens por gráfico: os demais vão para 'Outros' e para as
+# páginas seguintes (/api/charts/<nome>?pagina=N)
+top_x = int(os.environ.get('KINDRED_CHART_ITEMS', '50'))
+
+DATASET = os.environ.get('KINDRED_DATASET', 'todos_os_decks.csv')
+# Coleção do dataset principal, servida também na raiz (/, /dashboard/)
+COLECAO_PADRAO = os.environ.get('KINDRED_DEFAULT_COLLECTION') or os.path.splitext(os.path.basename(DATASET))[0]
+# Coleções adicionais, servidas em /c/<nome>/: diretório com um CSV por coleção
+# ou lista nome=arquivo.csv separada por vírgulas
+COLECOES = discover_collections(os.environ.get('KINDRED_COLLECTIONS', ''))
+# Memória estimada máxima (MB) dos snapshots em memória; as coleções menos
+# usadas são descarregadas (a padrão nunca); 0 desativa o limite
+LIMITE_COLECOES_MB = float(os.environ.get('KINDRED_COLLECTIONS_MAX_MB', '1024'))
+# Intervalo (s) de verificação do CSV para recarga automática; 0 desativa
+RELOAD_INTERVAL = float(os.environ.get('KINDRED_RELOAD_INTERVAL', '30'))
+# Token exigido pelo endpoint de recarga; sem token o endpoint fica desativado
+ADMIN_TOKEN = os.environ.get('KINDRED_ADMIN_TOKEN')
+# 'background' responde /healthz e /readyz logo após o import e constrói o
+# snapshot em segundo plano; 'eager' constrói tudo antes de terminar o import
+STARTUP = os.environ.get('KINDRED_STARTUP', 'background')
+# Grava/lê a análise pré-calculada ao lado do CSV (<base>.snapshot.pkl)
+PERSIST_SNAPSHOT = os.environ.get('KINDRED_PERSIST_SNAPSHOT', '1') != '0'
+
+# Métricas das requisições e do snapshot servido (expostas em /metrics)
+DURACAO_REQUISICAO = REGISTRY.histogram(
+    'kindred_request_duration_seconds', "Latência das requisições por rota", ('rota', 'metodo', 'status'))
+GERACAO_SNAPSHOT = REGISTRY.gauge('kindred_snapshot_generation', "Geração do snapshot servido")
+LINHAS_SNAPSHOT = REGISTRY.gauge('kindred_snapshot_rows', "Linhas do dataset no snapshot servido")
+RSS_PROCESSO = REGISTRY.gauge('kindred_process_rss_bytes', "Memória residente do processo")
+# Gráficos gerados sob demanda (falta nos caches): por requisição, sem log nem leitura de /proc
+DURACAO_GRAFICO = REGISTRY.histogram(
+    'kindred_chart_render_duration_seconds', "Duração da geração de um gráfico sob demanda", ('grafico',))
+
+# plotly.js na mesma versão usada pelo plotly.py para serializar as figuras
+PLOTLY_JS_URL = f"https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+
+def _versao_codigo(arquivos, *extra):
+    """Hash dos arquivos de código e parâmetros que geram um resultado (caches persistentes sobrevivem a deploys)."""
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    resumo = hashlib.sha1(repr(extra).encode())
+    for arquivo in arquivos:
+        with open(os.path.join(raiz, arquivo), 'rb') as f:
+            resumo.update(f.read())
+    return resumo.hexdigest()[:12]
+
+
+# Versão da análise + cubo gravados em disco e dos gráficos/página renderizados
+VERSAO_ANALISE = _versao_codigo(
+    ['data_processing/data_store.py', 'data_processing/data_analyzer.py', 'data_processing/filter_cube.py',
+     'data_processing/color_identity.py', 'data_processing/cooccurrence.py', 'data_processing/type_line.py',
+     'data_processing/ingestion.py'],
+    tipos, top_x)
+VERSAO_RENDER = _versao_codigo(
+    ['templates/index.html', 'visualization/plot_creator.py', 'visualization/prerender.py'],
+    tipos, top_x, PLOTLY_JS_URL)
+
+
+def rota_colecao(nome):
+    """Parâmetro `colecao` das rotas: a coleção padrão usa as rotas na raiz."""
+    return None if nome == COLECAO_PADRAO else nome
+
+
+def construir_snapshot(colecao, filepath):
+    """Carrega e analisa o dataset de uma coleção e renderiza sua página inicial (fora das requisições)."""
+    from data_processing.data_loader import load_and_preprocess_data, load_type_indexes
+
+    assinatura = source_signature(filepath)
+
+    # Carrega e processa dados (store colunar mapeado em memória)
+    with stage('carregar', app.logger):
+        df, is_land = load_and_preprocess_data(filepath)
+        indices_tipo = load_type_indexes(filepath)
+
+    # Análise e cubo do dashboard: lidos do disco se já calculados para este CSV e este código
+    analise = load_persisted(filepath, assinatura, VERSAO_ANALISE) if PERSIST_SNAPSHOT else None
+    if analise is None:
+        analise = analisar(df, is_land, indices_tipo, filepath)
+        if PERSIST_SNAPSHOT:
+            save_persisted(filepath, analise, assinatura, VERSAO_ANALISE)
+    else:
+        app.logger.info("Análise de %s carregada do disco", filepath)
+
+    # Os gráficos são gerados sob demanda; a página só precisa das URLs, que
+    # levam a versão do dataset e do código de renderização
+    chave_render = f"{snapshot_version(assinatura, colecao)}-{VERSAO_RENDER}"
+    with stage('pagina', app.logger):
+        pagina = renderizar_pagina(analise['analysis_results'], chave_render, colecao)
+
+    return {'df': df, 'is_land': is_land, 'indices_tipo': indices_tipo, **analise, 'chave_render': chave_render,
+            'paginas': {'index': pagina}, 'charts': {}}
+
+
+def analisar(df, is_land, indices_tipo=None, filepath=None):
+    """
+    Análise dos dados, rankings tipo × cores do dashboard e matriz de coocorrência.
+
+    Se a ingestão incremental gravou agregados para a versão atual do CSV
+    (`filepath`), os rankings por deck vêm deles em vez de serem recalculados.
+    """
+    from data_processing.cooccurrence import build_cooccurrence
+    from data_processing.data_analyzer import analyze_data
+    from data_processing.filter_cube import build_filter_cube
+    from data_processing.ingestion import aggregates_to_results, current_aggregates
+
+    agregados = current_aggregates(filepath, tipos) if filepath else None
+    if agregados is not None:
+        app.logger.info("Rankings de %s lidos dos agregados da ingestão", filepath)
+
+    with stage('analisar', app.logger):
+        analysis_results = analyze_data(df, is_land, tipos, indices_tipo,
+                                        aggregates_to_results(agregados) if agregados is not None else None)
+
+    # Rankings tipo × cores do dashboard, consultados pelo callback
+    with stage('cubo', app.logger):
+        cubo = build_filter_cube(analysis_results['incidencia'], tipos, top_n=top_x)
+
+    # Matriz deck×carta das consultas de coocorrência e similaridade
+    with stage('coocorrencia', app.logger):
+        coocorrencia = build_cooccurrence(analysis_results['incidencia'])
+
+    return {'analysis_results': analysis_results, 'cubo': cubo, 'coocorrencia': coocorrencia}
+
+
+def renderizar_pagina(analysis_results, chave_render, colecao):
+    """Renderiza e pré-comprime a página inicial de uma coleção."""
+    with app.test_request_context():
+        pagina = render_template('index.html',
+                                 num_decks_distintos=analysis_results['num_decks_distintos'],
+                                 chart_urls={nome: url_for('chart', colecao=rota_colecao(colecao), nome=nome,
+                                                           v=chave_render)
+                                             for nome in chart_names(tipos)},
+                                 tipo_charts={tipo: chart_name(tipo) for tipo in tipos},
+                                 plotly_js_url=PLOTLY_JS_URL,
+                                 paginacao=True,
+                                 top_x=top_x)
+    return build_blob(pagina)
+
+
+def liberar_cache(chave):
+    """Libera a trava de cálculo de uma chave cujo valor não será gravado (caches sem trava ignoram)."""
+    liberar = getattr(cache.cache, 'release', None)
+    if liberar is not None:
+        liberar(chave)
+
+
+def chart_blob(snapshot, nome, pagina=0):
+    """
+    JSON pré-comprimido de uma página de um gráfico, gerado no primeiro pedido.
 
-tipos = ['Land', 'Creature', 'Artifact', 'Enchantment', 'Planeswalker', 'Battle', 'Instant', 'Sorcery']
-top_x = 50
-
-try:
-    # Carrega e processa dados
-    df, df_sem_land = load_and_preprocess_data('todos_os_decks.csv')
-    
-    # Análise dos dados
-    analysis_results = analyze_data(df, df_sem_land, tipos)
-    
-    # Cria gráficos
-    plots = create_plots(analysis_results, tipos, top_x)
-    
-    # Configura o Dash
-    dash_app = create_dash_app(app, df, tipos)
-except Exception as e:
-    app.logger.error(f"Erro na inicialização: {str(e)}")
-    df = pd.DataFrame()
-    df_sem_land = pd.DataFrame()
-    analysis_results = {'num_decks_distintos': 0}
-    plots = {}
-
-@cache.cached(timeout=300)  # Cache por 5 minutos
-@app.route('/')
-def index():
+    O resultado fica no snapshot (este worker) e no cache compartilhado (os
+    demais workers); pedidos simultâneos do mesmo gráfico geram-no uma vez.
+    Levanta IndexError (sem guardar nada) se a página não existe.
+    """
+    item = f"{nome}:{pagina}" if pagina else nome
+    blob = snapshot['charts'].get(item)
+    if blob is None:
+        chave = f"snapshot:{snapshot['chave_render']}:chart:{item}"
+        blob = cache.get(chave)
+        if blob is None:
+            inicio = time.perf_counter()
+            try:
+                blob = render_chart(build_chart(nome, snapshot['analysis_results'], tipos, top_x, pagina))
+            except Exception:
+                # Página inexistente (IndexError) ou falha: nada a gravar, a trava do get é liberada
+                liberar_cache(chave)
+                raise
+            DURACAO_GRAFICO.observe(time.perf_counter() - inicio, nome)
+            cache.set(chave, blob, timeout=0)
+        snapshot['charts'][item] = blob
+    return blob
+
+
+colecoes = CollectionRegistry(
+    {**COLECOES, COLECAO_PADRAO: DATASET},
+    construir_snapshot,
+    vazio={'df': None, 'is_land': None, 'indices_tipo': {}, 'analysis_results': {'num_decks_distintos': 0},
+           'chave_render': None, 'paginas': {}, 'charts': {}},
+    limite_bytes=int(LIMITE_COLECOES_MB * (1 << 20)) or None,
+    fixas=[COLECAO_PADRAO],
+    intervalo_recarga=RELOAD_INTERVAL,
+    log=app.logger
+)
+# Snapshot da coleção padrão (construído em inicializar)
+snapshots = colecoes.get(COLECAO_PADRAO, carregar=False).snapshots
+
+
+def obter_colecao(colecao):
+    """Coleção de uma rota (None: a padrão), carregada sob demanda; 404 se não configurada."""
+    try:
+        return colecoes.get(colecao or COLECAO_PADRAO)
+    except KeyError:
+        abort(404)
+
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio_requisicao = time.perf_counter()
+
+
+@app.after_request
+def registrar_latencia(response):
+    inicio = g.pop('inicio_requisicao', None)
+    if inicio is not None:
+        # Rótulo pela regra da rota (não pela URL) para manter poucas séries; o
+        # prefixo cobre as rotas do Dash, montado em /dashboard
+        rota = request.script_root + request.url_rule.rule if request.url_rule is not None else 'nao_encontrada'
+        DURACAO_REQUISICAO.observe(time.perf_counter() - inicio, rota, request.method, response.status_code)
+    return response
+
+
+@app.route('/', defaults={'colecao': None})
+@app.route('/c/<colecao>/')
+def index(colecao):
+    snapshots = obter_colecao(colecao).snapshots
     try:
-        if df.empty:
-            return render_template('error.html', 
+        # Fixa o snapshot no início: uma recarga concorrente não afeta esta requisição
+        snapshot = snapshots.current()
+        if not snapshots.ready() and snapshots.ultimo_erro is None:
+            # Inicialização em segundo plano ainda em andamento
+            return render_template('error.html',
+                                 error_message="Carregando os dados. Tente novamente em alguns segundos."), \
+                503, {'Retry-After': '5'}
+        if snapshot['df'] is None or snapshot['df'].empty or 'index' not in snapshot['paginas']:
+            return render_template('error.html',
                                  error_message="Erro ao carregar dados. Por favor, tente novamente mais tarde.")
-        
-        # Converte os gráficos para HTML
-        graph_html = {
-            'graph_preco_decks': plots['preco_decks'].to_html(full_html=False, include_plotlyjs='cdn'),
-            'graph_cores_comandantes': plots['cores_comandantes'].to_html(full_html=False, include_plotlyjs='cdn'),
-            'graph_edhrec_rank_decks': plots['edhrec_rank_decks'].to_html(full_html=False, include_plotlyjs='cdn'),
-            'graph_cartas_comuns': plots['cartas_comuns'].to_html(full_html=False, include_plotlyjs='cdn'),
-        }
-
-        # Adiciona gráficos por tipo se existirem
-        if 'tipos' in plots:
-            graph_html['tipo_graphs'] = {
-                tipo: plots['tipos'][tipo].to_html(full_html=False, include_plotlyjs='cdn')
-                for tipo in tipos if tipo in plots['tipos']
-            }
-        else:
-            graph_html['tipo_graphs'] = {
-                tipo: create_empty_plot(f"Dados não disponíveis para {tipo}").to_html(full_html=False,
-                                                                                      include_plotlyjs='cdn')
-                for tipo in tipos
-            }
 
-        return render_template('index.html',
-                               num_decks_distintos=analysis_results['num_decks_distintos'],
-                               **graph_html,
-                               top_x=top_x)
+        # Página pré-renderizada e pré-comprimida; revisitas recebem 304 pelo ETag
+        return blob_response(snapshot['paginas']['index'])
     except Exception as e:
         app.logger.error(f"Erro na rota index: {str(e)}")
-        return render_template('error.html', 
+        return render_template('error.html',
                              error_message="Ocorreu um erro ao processar sua solicitação.")
 
+
+@app.route('/api/charts', defaults={'colecao': None})
+@app.route('/c/<colecao>/api/charts')
+def chart_list(colecao):
+    """Lista os gráficos disponíveis no snapshot atual."""
+    snapshots = obter_colecao(colecao).snapshots
+    snapshot = snapshots.current()
+    if not snapshots.ready():
+        return jsonify({'erro': "Dados ainda não carregados"}), 503
+    return jsonify({
+        'versao': snapshot['versao'],
+        'charts': {nome: url_for('chart', colecao=colecao, nome=nome, v=snapshot['chave_render'])
+                   for nome in chart_names(tipos)}
+    })
+
+
+@app.route('/api/charts/<nome>', defaults={'colecao': None})
+@app.route('/c/<colecao>/api/charts/<nome>')
+def chart(colecao, nome):
+    """
+    Figura de um único gráfico em JSON pré-comprimido.
+
+    Cada figura traz no máximo top_x itens (mais o item 'Outros'); ?pagina=N
+    devolve a fatia seguinte do ranking, com a posição em layout.meta.pagina.
+    """
+    snapshots = obter_colecao(colecao).snapshots
+    snapshot = snapshots.current()
+    if nome not in chart_names(tipos):
+        return jsonify({'erro': f"Gráfico '{nome}' não encontrado"}), 404
+    if not snapshots.ready():
+        return jsonify({'erro': "Dados ainda não carregados"}), 503
+
+    try:
+        blob = chart_blob(snapshot, nome, request.args.get('pagina', 0, type=int))
+    except IndexError as e:
+        return jsonify({'erro': str(e)}), 404
+
+    # URLs com a versão atual do dataset e do código são imutáveis; as demais revalidam pelo ETag
+    if request.args.get('v') == snapshot['chave_render']:
+        return blob_response(blob, cache_control='public, max-age=31536000, immutable')
+    return blob_response(blob)
+
+
+@app.route('/api/collections')
+def collection_list():
+    """Coleções configuradas e o estado de cada uma neste worker."""
+    carregadas = {colecao.nome: colecao for colecao in colecoes.loaded()}
+    resultado = {}
+    for nome in colecoes.names():
+        estado = {'url': url_for('index', colecao=nome), 'dashboard': url_for('index', colecao=nome) + 'dashboard/',
+                  'carregada': nome in carregadas, 'bytes_estimados': colecoes.estimated_bytes(nome)}
+        if nome in carregadas:
+            estado['pronta'] = carregadas[nome].snapshots.ready()
+            estado['versao'] = carregadas[nome].snapshots.current()['versao']
+        resultado[nome] = estado
+    return jsonify({'padrao': COLECAO_PADRAO, 'colecoes': resultado})
+
+
+def versao_colecao(nome):
+    """
+    Versão dos resultados que analise_colecao entregaria agora para uma coleção.
+
+    É a do snapshot em memória, se pronto (pode ainda ser a do CSV anterior,
+    até o watcher recarregar); senão a do CSV atual, a única aceita para a
+    análise gravada em disco. Levanta OSError se o CSV não existe.
+    """
+    colecao = colecoes.find(nome)
+    if colecao is not None and colecao.snapshots.ready():
+        return colecao.snapshots.current()['versao']
+    return snapshot_version(source_signature(colecoes.colecoes[nome]), nome)
+
+
+def analise_colecao(nome):
+    """
+    Resultados agregados (analysis_results) de uma coleção, sem carregar suas linhas.
+
+    Vêm do snapshot, se a coleção está em memória, ou da análise gravada em
+    disco. Se nenhum dos dois existe, dispara a carga da coleção e retorna None.
+
+    Retorna:
+        tuple: (versão que produziu os resultados, analysis_results), ou None
+    """
+    colecao = colecoes.find(nome)
+    if colecao is not None and colecao.snapshots.ready():
+        snapshot = colecao.snapshots.current()
+        return snapshot['versao'], snapshot['analysis_results']
+    if PERSIST_SNAPSHOT:
+        filepath = colecoes.colecoes[nome]
+        assinatura = source_signature(filepath)
+        analise = load_persisted(filepath, assinatura, VERSAO_ANALISE)
+        if analise is not None:
+            return snapshot_version(assinatura, nome), analise['analysis_results']
+    colecoes.get(nome)
+    return None
+
+
+@app.route('/api/compare')
+def compare():
+    """
+    Variação de popularidade entre duas coleções, calculada a partir dos agregados.
+
+    Parâmetros (query string):
+        a, b: Coleções comparadas (delta = fração dos decks em b - fração em a)
+        grafico: 'cartas_comuns' (padrão), 'cores_comandantes' ou um tipo
+        top: Número de itens, pelas maiores variações absolutas
+    """
+    nomes = [request.args.get('a', ''), request.args.get('b', '')]
+    grafico = request.args.get('grafico', 'cartas_comuns')
+    top = max(1, min(request.args.get('top', top_x, type=int), 1000))
+    for nome in nomes:
+        if nome not in colecoes:
+            return jsonify({'erro': f"Coleção '{nome}' não encontrada"}), 404
+    if grafico not in ('cartas_comuns', 'cores_comandantes') and grafico not in tipos:
+        return jsonify({'erro': f"Gráfico '{grafico}' não encontrado"}), 404
+
+    try:
+        versoes = [versao_colecao(nome) for nome in nomes]
+    except OSError:
+        return jsonify({'erro': "CSV de uma das coleções não encontrado"}), 404
+
+    # As versões dos snapshots que produzem o resultado e a do código da análise
+    # o identificam (não a do CSV atual: o snapshot em memória pode ser anterior)
+    chave = f"compare:{VERSAO_ANALISE}:{versoes[0]}:{versoes[1]}:{grafico}:{top}"
+    resultado = cache.get(chave)
+    if resultado is None:
+        from data_processing.data_analyzer import compare_popularity
+
+        try:
+            analises = [analise_colecao(nome) for nome in nomes]
+            if any(analise is None for analise in analises):
+                # A trava do get é liberada: quem tentar de novo não espera por este worker
+                liberar_cache(chave)
+                return jsonify({'erro': "Coleção ainda não carregada"}), 503, {'Retry-After': '5'}
+
+            def contagens(analise):
+                if grafico in tipos:
+                    return analise['cartas_por_tipo'][grafico]
+                return analise[grafico]
+
+            (versao_a, a), (versao_b, b) = analises
+            tabela = compare_popularity(contagens(a), a['num_decks_distintos'],
+                                        contagens(b), b['num_decks_distintos'], top_n=top)
+            resultado = {
+                'a': nomes[0], 'b': nomes[1], 'grafico': grafico,
+                'decks_a': a['num_decks_distintos'], 'decks_b': b['num_decks_distintos'],
+                'itens': [{'item': str(item), 'decks_a': int(linha.decks_a), 'decks_b': int(linha.decks_b),
+                           'fracao_a': float(linha.fracao_a), 'fracao_b': float(linha.fracao_b),
+                           'delta': float(linha.delta)}
+                          for item, linha in zip(tabela.index, tabela.itertuples(index=False))]
+            }
+        except Exception:
+            liberar_cache(chave)
+            raise
+        if [versao_a, versao_b] == versoes:
+            cache.set(chave, resultado, timeout=0)
+        else:
+            # Uma coleção recarregou entre a chave e o cálculo: o resultado não é dessa chave
+            liberar_cache(chave)
+    return jsonify(resultado)
+
+
+def consulta_coocorrencia(colecao, consulta, parametros, calcular):
+    """
+    Executa uma consulta ao modelo de coocorrência do snapshot de uma coleção.
+
+    O resultado fica no cache compartilhado, com a versão do snapshot e do
+    código da análise na chave.
+
+    Parâmetros:
+        consulta (str): Nome da consulta (parte da chave de cache)
+        parametros (dict): Parâmetros da consulta, repetidos na resposta
+        calcular (callable): Recebe o modelo e retorna o DataFrame do resultado
+    """
+    snapshots = obter_colecao(colecao).snapshots
+    snapshot = snapshots.current()
+    if not snapshots.ready():
+        return jsonify({'erro': "Dados ainda não carregados"}), 503, {'Retry-After': '5'}
+
+    resumo = hashlib.sha1(repr(sorted(parametros.items())).encode()).hexdigest()[:16]
+    chave = f"snapshot:{snapshot['versao']}:{VERSAO_ANALISE}:{consulta}:{resumo}"
+    resultado = cache.get(chave)
+    if resultado is None:
+        try:
+            tabela = calcular(snapshot['coocorrencia'])
+            resultado = {**parametros, 'itens': tabela.reset_index().to_dict('records')}
+        except KeyError as e:
+            # Nada é gravado: a trava do get é liberada para não segurar as próximas consultas
+            liberar_cache(chave)
+            return jsonify({'erro': f"'{e.args[0]}' não encontrado"}), 404
+        except Exception:
+            liberar_cache(chave)
+            raise
+        cache.set(chave, resultado, timeout=0)
+    return jsonify(resultado)
+
+
+@app.route('/api/cooccurrence', defaults={'colecao': None})
+@app.route('/c/<colecao>/api/cooccurrence')
+def card_cooccurrence(colecao):
+    """
+    Cartas mais associadas a uma carta nos decks.
+
+    Parâmetros (query string):
+        carta: Nome da carta
+        metrica: 'lift' (padrão), 'jaccard' ou 'decks'
+        k: Número de cartas (até 200)
+        suporte: Mínimo de decks em comum
+    """
+    from data_processing.cooccurrence import METRICAS, SUPORTE_MINIMO, cooccurring_cards
+
+    parametros = {
+        'carta': request.args.get('carta', ''),
+        'metrica': request.args.get('metrica', 'lift'),
+        'k': max(1, min(request.args.get('k', 20, type=int), 200)),
+        'suporte': request.args.get('suporte', SUPORTE_MINIMO, type=int),
+    }
+    if parametros['metrica'] not in METRICAS:
+        return jsonify({'erro': f"Métrica inválida (use {', '.join(METRICAS)})"}), 400
+    return consulta_coocorrencia(colecao, 'coocorrencia', parametros, lambda modelo: cooccurring_cards(
+        modelo, parametros['carta'], parametros['k'], parametros['metrica'], parametros['suporte']))
+
+
+@app.route('/api/similar-decks', defaults={'colecao': None})
+@app.route('/c/<colecao>/api/similar-decks')
+def deck_neighbors(colecao):
+    """
+    Decks mais parecidos com um deck (Jaccard das listas de cartas).
+
+    Parâmetros (query string):
+        deck: Nome do deck
+        k: Número de decks (até 200)
+    """
+    from data_processing.cooccurrence import similar_decks
+
+    parametros = {'deck': request.args.get('deck', ''), 'k': max(1, min(request.args.get('k', 10, type=int), 200))}
+    return consulta_coocorrencia(colecao, 'decks_similares', parametros, lambda modelo: similar_decks(
+        modelo, parametros['deck'], parametros['k']))
+
+
+@app.route('/api/recommendations', defaults={'colecao': None})
+@app.route('/c/<colecao>/api/recommendations')
+def card_recommendations(colecao):
+    """
+    Cartas comumente jogadas com um conjunto de cartas.
+
+    Parâmetros (query string):
+        carta: Nome de uma carta (repetido para várias)
+        k: Número de cartas (até 200)
+        suporte: Mínimo de decks com a carta recomendada
+    """
+    from data_processing.cooccurrence import SUPORTE_MINIMO, recommend_cards
+
+    parametros = {
+        'cartas': sorted(set(request.args.getlist('carta'))),
+        'k': max(1, min(request.args.get('k', 20, type=int), 200)),
+        'suporte': request.args.get('suporte', SUPORTE_MINIMO, type=int),
+    }
+    if not parametros['cartas']:
+        return jsonify({'erro': "Informe ao menos uma carta"}), 400
+    return consulta_coocorrencia(colecao, 'recomendacoes', parametros, lambda modelo: recommend_cards(
+        modelo, parametros['cartas'], parametros['k'], parametros['suporte']))
+
+
+@app.route('/metrics')
+def metrics():
+    """Métricas do processo no formato texto do Prometheus."""
+    snapshot = snapshots.current()
+    GERACAO_SNAPSHOT.set(snapshot['geracao'])
+    LINHAS_SNAPSHOT.set(len(snapshot['df']) if snapshot['df'] is not None else 0)
+    rss = rss_bytes()
+    if rss is not None:
+        RSS_PROCESSO.set(rss)
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: o processo responde (não depende dos dados)."""
+    return jsonify({'status': 'ok'})
+
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 só depois que o primeiro snapshot foi publicado."""
+    snapshot = snapshots.current()
+    estado = {'pronto': snapshots.ready(), 'geracao': snapshot['geracao'], 'versao': snapshot['versao']}
+    if snapshots.ultimo_erro:
+        estado['erro'] = snapshots.ultimo_erro
+    return jsonify(estado), 200 if estado['pronto'] else 503
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Dispara a reconstrução do snapshot em segundo plano."""
+    token = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        abort(403)
+
+    try:
+        snapshots = colecoes.get(request.args.get('colecao') or COLECAO_PADRAO, carregar=False).snapshots
+    except KeyError:
+        abort(404)
+    snapshots.reload_async(force=request.args.get('force') == '1')
+    snapshot = snapshots.current()
+    return jsonify({'geracao': snapshot['geracao'], 'versao': snapshot['versao']}), 202
+
+
+class LazyWSGIApp:
+    """Aplicação WSGI criada pela `fabrica` na primeira requisição (ou em `load`)."""
+
+    def __init__(self, fabrica):
+        self._fabrica = fabrica
+        self._app = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._fabrica()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        return self.load()(environ, start_response)
+
+
+def criar_dashboard(colecao, prefixo):
+    """Cria o Dash de uma coleção (e importa dash/plotly) em um Flask próprio, montado em `prefixo`."""
+    from visualization.dashboard import create_dash_app
+
+    servidor = Flask(__name__)
+    cache.init_app(servidor, config=app.config)
+    servidor.before_request(iniciar_cronometro)
+    servidor.after_request(registrar_latencia)
+
+    # Configura o Dash (lê sempre o snapshot atual da coleção)
+    create_dash_app(servidor, colecao.snapshots.current, tipos, cache, prefixo=f'{prefixo}/',
+                    top_x=top_x, versao_analise=VERSAO_ANALISE)
+    return servidor
+
+
+def dashboard(nome, prefixo):
+    """Dash da coleção montado em `prefixo`, criado no primeiro acesso e descartado com a coleção."""
+    colecao = colecoes.get(nome)
+    app_dash = colecao.anexos.get(prefixo)
+    if app_dash is None:
+        app_dash = colecao.anexos.setdefault(prefixo, LazyWSGIApp(partial(criar_dashboard, colecao, prefixo)))
+    return app_dash
+
+
+class DashboardMounts(Mapping):
+    """Montagens do DispatcherMiddleware: /dashboard (coleção padrão) e /c/<nome>/dashboard."""
+
+    def _colecao(self, prefixo):
+        if prefixo == '/dashboard':
+            return COLECAO_PADRAO
+        partes = prefixo.split('/')
+        if len(partes) == 4 and partes[1] == 'c' and partes[3] == 'dashboard' and partes[2] in colecoes:
+            return partes[2]
+        return None
+
+    def __getitem__(self, prefixo):
+        nome = self._colecao(prefixo)
+        if nome is None:
+            raise KeyError(prefixo)
+        return dashboard(nome, prefixo)
+
+    def __iter__(self):
+        return iter(['/dashboard'] + [f'/c/{nome}/dashboard' for nome in colecoes.names()])
+
+    def __len__(self):
+        return len(colecoes.names()) + 1
+
+
+app.wsgi_app = DispatcherMiddleware(app.wsgi_app, DashboardMounts())
+
+
+def inicializar():
+    """Constrói o primeiro snapshot e pré-carrega o dashboard da coleção padrão."""
+    try:
+        if not snapshots.reload(force=True):
+            raise RuntimeError(f"não foi possível construir o snapshot de {DATASET}")
+        dashboard(COLECAO_PADRAO, '/dashboard').load()
+    except Exception:
+        app.logger.exception("Erro na inicialização")
+
+
+# Constrói o primeiro snapshot depois de registrar as rotas (usadas por url_for)
+if STARTUP == 'eager':
+    inicializar()
+else:
+    threading.Thread(target=inicializar, name='inicializacao', daemon=True).start()
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,400 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import DECKS_REFERENCIA, write_decks
+from data_processing.color_identity import MODOS
+from data_processing.cooccurrence import build_cooccurrence, cooccurring_cards, recommend_cards, similar_decks
+from data_processing.data_analyzer import analyze_data, subtype_cards
+from data_processing.data_store import compile_store, load_indexes, load_or_compile, read_csv_data, store_path
+from data_processing.filter_cube import build_filter_cube
+from visualization.plot_creator import create_plots
+from visualization.prerender import chart_names, render_charts
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Escalas padrão: o dataset atual e 10× / 100× maior (em decks)
+ESCALAS_PADRAO = [1, 10, 100]
+
+# Percentis de latência reportados nos benchmarks HTTP
+PERCENTIS = (50, 90, 99)
+
+
+def _rss_max_mb():
+    """Pico de memória residente do processo até agora (MB), se disponível."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return round(pico / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def measure(funcao, repeticoes=3, memoria=True):
+    """
+    Mede o tempo de `funcao` em `repeticoes` execuções e o pico de memória alocada.
+
+    O pico vem de uma execução extra sob tracemalloc (que deixa o código mais
+    lento), para não distorcer os tempos.
+
+    Retorna:
+        tuple: (resultado da última execução, dict com as medidas)
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    medidas = {
+        'segundos': [round(t, 6) for t in tempos],
+        'mediana_s': round(float(np.median(tempos)), 6),
+        'min_s': round(min(tempos), 6),
+    }
+    if memoria:
+        # Libera o resultado anterior para medir só o que a execução aloca
+        resultado = None
+        tracemalloc.start()
+        try:
+            resultado = funcao()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        medidas['pico_memoria_mb'] = round(pico / (1 << 20), 2)
+    return resultado, medidas
+
+
+def measure_requests(cliente_factory, requisicao, total, concorrencia=1):
+    """
+    Dispara `total` requisições pelo test client do Flask e mede latência e vazão.
+
+    Parâmetros:
+        cliente_factory (callable): Cria um test client (um por thread)
+        requisicao (callable): Recebe (cliente, i) e retorna a resposta
+        total (int): Número de requisições
+        concorrencia (int): Threads disparando requisições em paralelo
+
+    Retorna:
+        dict: Vazão, percentis de latência (ms), status e bytes por resposta
+    """
+    latencias = np.zeros(total)
+    status = {}
+    tamanhos = []
+    lock = threading.Lock()
+
+    def executar(indices):
+        cliente = cliente_factory()
+        for i in indices:
+            inicio = time.perf_counter()
+            resposta = requisicao(cliente, i)
+            latencias[i] = time.perf_counter() - inicio
+            with lock:
+                status[resposta.status_code] = status.get(resposta.status_code, 0) + 1
+                tamanhos.append(len(resposta.get_data()))
+
+    grupos = [range(i, total, concorrencia) for i in range(concorrencia)]
+    threads = [threading.Thread(target=executar, args=(grupo,)) for grupo in grupos]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    medidas = {
+        'requisicoes': total,
+        'concorrencia': concorrencia,
+        'por_segundo': round(total / duracao, 1) if duracao else None,
+        'status': {str(k): v for k, v in sorted(status.items())},
+        'bytes_medio': int(np.mean(tamanhos)) if tamanhos else 0,
+        'max_ms': round(float(latencias.max()) * 1000, 3) if total else None,
+    }
+    for p in PERCENTIS:
+        medidas[f'p{p}_ms'] = round(float(np.percentile(latencias, p)) * 1000, 3) if total else None
+    return medidas
+
+
+def _importar_app(dataset):
+    """
+    Importa o app apontando para `dataset`, sem watcher de recarga.
+
+    O cache compartilhado (que o benchmark limpa) e o log ficam ao lado do
+    dataset sintético, nunca no arquivo de cache ou no app.log de produção.
+    """
+    if 'app' not in sys.modules:
+        diretorio = os.path.dirname(os.path.abspath(dataset))
+        os.environ['KINDRED_DATASET'] = dataset
+        os.environ['KINDRED_RELOAD_INTERVAL'] = '0'
+        os.environ['KINDRED_STARTUP'] = 'eager'
+        os.environ['KINDRED_SHARED_CACHE'] = os.path.join(diretorio, 'cache.sqlite')
+        os.environ['KINDRED_REDIS_URL'] = ''
+        os.environ['KINDRED_LOG_FILE'] = os.path.join(diretorio, 'app.log')
+    import app as modulo_app
+    return modulo_app
+
+
+def _payload_dash(tipo, cores, modo):
+    """Corpo da requisição que o navegador envia ao callback update_graph."""
+    return {
+        'output': 'graph.figure',
+        'outputs': {'id': 'graph', 'property': 'figure'},
+        'inputs': [
+            {'id': 'tipo-dropdown', 'property': 'value', 'value': tipo},
+            {'id': 'cor-dropdown', 'property': 'value', 'value': cores},
+            {'id': 'modo-cor', 'property': 'value', 'value': modo},
+        ],
+        'changedPropIds': ['tipo-dropdown.value'],
+    }
+
+
+def _combinacoes(tipos):
+    """Todas as combinações tipo × modo × cores do dashboard (cada uma é uma figura distinta)."""
+    cores = 'WUBRG'
+    for mascara in range(1, 1 << len(cores)):
+        selecao = [c for bit, c in enumerate(cores) if mascara & (1 << bit)]
+        for modo in MODOS:
+            for tipo in tipos:
+                yield tipo, selecao, modo
+
+
+def bench_stages(csv, tipos, top_x, repeticoes, memoria):
+    """Mede cada estágio do pipeline de dados sobre um CSV."""
+    etapas = {}
+
+    def etapa(nome, funcao):
+        try:
+            resultado, etapas[nome] = measure(funcao, repeticoes, memoria)
+            print(f"  {nome:<16} {etapas[nome]['mediana_s']:>9.3f}s"
+                  + (f"  {etapas[nome]['pico_memoria_mb']:>9.1f} MB" if memoria else ''))
+            return resultado
+        except Exception as e:  # inclui MemoryError: registra onde o sistema quebrou
+            etapas[nome] = {'erro': f"{type(e).__name__}: {e}"}
+            print(f"  {nome:<16} ERRO {etapas[nome]['erro']}")
+            raise
+
+    try:
+        etapa('ler_csv', lambda: read_csv_data(csv))
+        etapa('compilar_store', lambda: compile_store(csv))
+        df, is_land = etapa('carregar_store', lambda: load_or_compile(csv))
+        indices = load_indexes(store_path(csv))
+        resultados = etapa('analisar', lambda: analyze_data(df, is_land, tipos, indices))
+        plots = etapa('criar_graficos', lambda: create_plots(resultados, tipos, top_x))
+        etapa('cubo_filtros', lambda: build_filter_cube(resultados['incidencia'], tipos, top_n=top_x))
+        etapa('pre_renderizar', lambda: render_charts(plots, tipos))
+        modelo = etapa('coocorrencia', lambda: build_cooccurrence(resultados['incidencia']))
+        # Consultas com a carta mais popular: a que toca mais decks
+        populares = list(resultados['cartas_comuns'].index[:3])
+        etapa('cartas_com', lambda: cooccurring_cards(modelo, populares[0]))
+        etapa('decks_similares', lambda: similar_decks(modelo, modelo['decks'][0]))
+        etapa('recomendar', lambda: recommend_cards(modelo, populares))
+        # Subtipo mais jogado: a consulta que devolve mais linhas do índice
+        etapa('cartas_subtipo', lambda: subtype_cards(df, indices['subtipos'], resultados['subtipos'].index[:1]))
+    except Exception:
+        pass
+    return etapas
+
+
+def bench_http(modulo_app, csv, requisicoes, concorrencia):
+    """Publica o snapshot de `csv` no app e mede as rotas principais pelo test client."""
+    snapshots = modulo_app.snapshots
+    snapshots.filepath = csv
+    inicio = time.perf_counter()
+    if not snapshots.reload(force=True):
+        return {'snapshot': {'erro': "falha ao construir o snapshot"}}
+    resultados = {'snapshot': {'mediana_s': round(time.perf_counter() - inicio, 6)}}
+    print(f"  {'snapshot':<16} {resultados['snapshot']['mediana_s']:>9.3f}s")
+
+    app = modulo_app.app
+    snapshot = snapshots.current()
+    etag = snapshot['paginas']['index']['etag']
+    nome_chart = chart_names(modulo_app.tipos)[0]
+    cartas = list(snapshot['analysis_results']['cartas_comuns'].index)
+    combinacoes = list(_combinacoes(modulo_app.tipos))
+
+    rotas = {
+        'index': lambda c, i: c.get('/'),
+        'index_gzip': lambda c, i: c.get('/', headers={'Accept-Encoding': 'gzip'}),
+        'index_304': lambda c, i: c.get('/', headers={'If-None-Match': f'"{etag}"'}),
+        'chart': lambda c, i: c.get(f"/api/charts/{nome_chart}?v={snapshot['chave_render']}",
+                                    headers={'Accept-Encoding': 'gzip'}),
+        # Cada requisição pede uma combinação diferente: figura montada sem cache
+        'dash_frio': lambda c, i: c.post('/dashboard/_dash-update-component',
+                                         json=_payload_dash(*combinacoes[i % len(combinacoes)])),
+        # Mesma combinação repetida: figura memoizada
+        'dash_quente': lambda c, i: c.post('/dashboard/_dash-update-component',
+                                           json=_payload_dash(*combinacoes[0])),
+        # Uma carta diferente por requisição: consulta calculada sem cache
+        'coocorrencia': lambda c, i: c.get('/api/cooccurrence', query_string={'carta': cartas[i % len(cartas)]}),
+    }
+
+    for nome, requisicao in rotas.items():
+        if nome == 'dash_frio':
+            modulo_app.cache.clear()
+        total = min(requisicoes, len(combinacoes)) if nome == 'dash_frio' else requisicoes
+        try:
+            resultados[nome] = measure_requests(app.test_client, requisicao, total, concorrencia)
+            r = resultados[nome]
+            print(f"  {nome:<16} {r['por_segundo']:>9.1f} req/s  p50 {r['p50_ms']:.2f} ms  "
+                  f"p99 {r['p99_ms']:.2f} ms  status {r['status']}")
+        except Exception as e:
+            resultados[nome] = {'erro': f"{type(e).__name__}: {e}"}
+            print(f"  {nome:<16} ERRO {resultados[nome]['erro']}")
+    return resultados
+
+
+def run(escalas=None, repeticoes=3, requisicoes=200, concorrencia=1, memoria=True, http=True, seed=0,
+        diretorio=None):
+    """
+    Executa a bateria de benchmarks em cada escala do dataset sintético.
+
+    Parâmetros:
+        escalas (list): Múltiplos do número de decks da referência (~6k linhas)
+        repeticoes (int): Execuções cronometradas de cada estágio
+        requisicoes (int): Requisições por rota nos benchmarks HTTP
+        concorrencia (int): Threads disparando requisições
+        memoria (bool): Mede o pico de memória com tracemalloc
+        http (bool): Inclui os benchmarks de rotas
+        seed (int): Semente do gerador sintético
+        diretorio (str): Onde gravar os CSVs e stores (padrão: temporário)
+
+    Retorna:
+        dict: Ambiente, parâmetros e medidas de cada escala (serializável em JSON)
+    """
+    escalas = escalas or ESCALAS_PADRAO
+    temporario = None
+    if diretorio is None:
+        temporario = tempfile.TemporaryDirectory(prefix='kindred-bench-')
+        diretorio = temporario.name
+    os.makedirs(diretorio, exist_ok=True)
+
+    relatorio = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        },
+        'parametros': {'escalas': escalas, 'repeticoes': repeticoes, 'requisicoes': requisicoes,
+                       'concorrencia': concorrencia, 'memoria': memoria, 'seed': seed},
+        'escalas': [],
+    }
+
+    try:
+        for escala in escalas:
+            csv = os.path.join(diretorio, f"decks_x{escala}_s{seed}.csv")
+            inicio = time.perf_counter()
+            df = write_decks(csv, escala, seed=seed)
+            medidas = {
+                'escala': escala,
+                'decks': int(round(DECKS_REFERENCIA * escala)),
+                'linhas': len(df),
+                'cartas': int(df['Nome'].nunique()),
+                'gerar_s': round(time.perf_counter() - inicio, 3),
+            }
+            del df
+            print(f"Escala {escala}×: {medidas['linhas']} linhas, {medidas['decks']} decks, "
+                  f"{medidas['cartas']} cartas")
+
+            modulo_app = _importar_app(csv)
+            medidas['etapas'] = bench_stages(csv, modulo_app.tipos, modulo_app.top_x, repeticoes, memoria)
+            if http:
+                medidas['http'] = bench_http(modulo_app, csv, requisicoes, concorrencia)
+            medidas['rss_max_mb'] = _rss_max_mb()
+            relatorio['escalas'].append(medidas)
+    finally:
+        if temporario is not None:
+            temporario.cleanup()
+    return relatorio
+
+
+def compare(atual, anterior, tolerancia=0.2):
+    """
+    Compara dois relatórios e lista as medidas que pioraram além da tolerância.
+
+    Tempos (mediana) e picos de memória dos estágios e p50/p99 das rotas são
+    comparados escala a escala.
+
+    Retorna:
+        list: Tuplas (escala, medida, anterior, atual, razão) das regressões
+    """
+    regressoes = []
+    anteriores = {m['escala']: m for m in anterior.get('escalas', [])}
+    for medidas in atual.get('escalas', []):
+        base = anteriores.get(medidas['escala'])
+        if base is None:
+            continue
+        pares = []
+        for nome, etapa in medidas.get('etapas', {}).items():
+            for chave in ('mediana_s', 'pico_memoria_mb'):
+                pares.append((f"{nome}.{chave}", etapa.get(chave), base.get('etapas', {}).get(nome, {}).get(chave)))
+        for nome, rota in medidas.get('http', {}).items():
+            for chave in ('mediana_s', 'p50_ms', 'p99_ms'):
+                pares.append((f"{nome}.{chave}", rota.get(chave), base.get('http', {}).get(nome, {}).get(chave)))
+
+        for nome, valor, valor_base in pares:
+            if valor is None or not valor_base:
+                continue
+            razao = valor / valor_base
+            if razao > 1 + tolerancia:
+                regressoes.append((medidas['escala'], nome, valor_base, valor, round(razao, 2)))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, análise, gráficos e rotas em datasets sintéticos")
+    parser.add_argument('--escalas', type=float, nargs='+', default=ESCALAS_PADRAO,
+                        help="Múltiplos do dataset atual (padrão: 1 10 100)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--requisicoes', type=int, default=200, help="Requisições por rota")
+    parser.add_argument('--concorrencia', type=int, default=1)
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória (mais rápido)")
+    parser.add_argument('--sem-http', action='store_true', help="Só os estágios de dados")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--diretorio', help="Diretório dos CSVs sintéticos (padrão: temporário)")
+    parser.add_argument('--saida', default='benchmark.json', help="Arquivo JSON com os resultados")
+    parser.add_argument('--comparar', metavar='JSON', help="Resultado anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Piora relativa tolerada na comparação")
+    args = parser.parse_args(argv)
+
+    escalas = [int(e) if float(e).is_integer() else e for e in args.escalas]
+    relatorio = run(escalas, args.repeticoes, args.requisicoes, args.concorrencia,
+                    memoria=not args.sem_memoria, http=not args.sem_http, seed=args.seed,
+                    diretorio=args.diretorio)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        diferentes = [k for k in ('repeticoes', 'requisicoes', 'concorrencia', 'seed')
+                      if anterior.get('parametros', {}).get(k) != relatorio['parametros'][k]]
+        if diferentes:
+            print(f"Aviso: parâmetros diferentes do resultado anterior ({', '.join(diferentes)})")
+        regressoes = compare(relatorio, anterior, args.tolerancia)
+        for escala, nome, antes, depois, razao in regressoes:
+            print(f"REGRESSÃO escala {escala}× {nome}: {antes} -> {depois} ({razao}×)")
+        if regressoes:
+            return 1
+        print("Nenhuma regressão acima da tolerância.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Dataset real usado como modelo das distribuições
+REFERENCIA = 'todos_os_decks.csv'
+
+# Dimensões do dataset de referência (~6k linhas)
+DECKS_REFERENCIA = 68
+
+# Tamanho do conjunto de cartas na escala 1 e teto (ordem de grandeza das cartas existentes)
+CARTAS_POR_ESCALA = 6000
+LIMITE_CARTAS = 30000
+
+# Expoente Zipf que aproxima a cauda da referência na escala 1 (~2,8k cartas distintas, ~60% em um só deck)
+ZIPF_PADRAO = 1.0
+
+# Rodadas de novo sorteio para cartas repetidas em um deck
+TENTATIVAS = 10
+
+# Colunas copiadas das linhas-modelo (preservam a distribuição conjunta cor × tipo × custo...)
+COLUNAS_MODELO = ['Cor', 'Custo', 'Tipo', 'Subtipo', 'Preco_USD', 'EDHREC_Rank']
+
+
+def _repetidas(deck, carta, eh_comandante):
+    """Linhas comuns cuja carta já apareceu antes no mesmo deck."""
+    chave = np.where(eh_comandante, -1 - np.arange(len(carta)), carta)
+    chave = deck.astype(np.int64) * (int(carta.max()) + 2) + chave
+    _, primeiras = np.unique(chave, return_index=True)
+    repetidas = np.ones(len(carta), dtype=bool)
+    repetidas[primeiras] = False
+    return repetidas
+
+
+def generate_decks(decks=DECKS_REFERENCIA, cartas=None, zipf=ZIPF_PADRAO, referencia=REFERENCIA, seed=0):
+    """
+    Gera um dataset sintético no formato de todos_os_decks.csv.
+
+    Cada deck sintético copia a composição de um deck real sorteado: o
+    comandante e, para cada linha, uma carta do conjunto com a mesma cor e
+    linha de tipo. Assim as distribuições de tamanho, tipo e cor (e a
+    coerência com a identidade do comandante) seguem as do dataset real.
+    Dentro de cada célula cor × tipo as cartas têm popularidade Zipf: poucas
+    aparecem em muitos decks e a maioria em um só.
+
+    Parâmetros:
+        decks (int): Número de decks
+        cartas (int): Cartas no conjunto (padrão: cresce com a raiz do número de decks)
+        zipf (float): Expoente da popularidade das cartas
+        referencia (str): CSV usado como modelo das distribuições
+        seed (int): Semente do gerador aleatório
+
+    Retorna:
+        pd.DataFrame: Linhas com as colunas originais do CSV
+    """
+    rng = np.random.default_rng(seed)
+    modelo = pd.read_csv(referencia)
+    modelo = modelo[~modelo['Deck'].str.endswith('INVALIDO', na=False)].reset_index(drop=True)
+    celula = modelo.groupby(['Cor', 'Tipo'], dropna=False, sort=False).ngroup().to_numpy()
+    comandante = modelo['Comandante'].to_numpy() == 1
+
+    if cartas is None:
+        cartas = int(min(LIMITE_CARTAS, round(CARTAS_POR_ESCALA * np.sqrt(decks / DECKS_REFERENCIA))))
+
+    # Conjunto de cartas: uma por célula cor × tipo e o resto sorteado entre as linhas reais
+    comuns = np.flatnonzero(~comandante)
+    _, primeiras = np.unique(celula[comuns], return_index=True)
+    origem = np.concatenate([comuns[primeiras],
+                             comuns[rng.integers(0, len(comuns), size=max(cartas - len(primeiras), 0))]])
+    celula_conjunto = celula[origem]
+
+    # Peso Zipf de cada carta dentro da sua célula, por ordem aleatória
+    pesos = np.empty(len(origem))
+    membros = {}
+    for c in np.unique(celula_conjunto):
+        indices = np.flatnonzero(celula_conjunto == c)
+        w = (rng.permutation(len(indices)) + 1.0) ** -zipf
+        pesos[indices] = w / w.sum()
+        membros[c] = indices
+
+    # Deck real usado como modelo por cada deck sintético
+    linhas_por_deck = list(modelo.groupby('Deck', sort=False).indices.values())
+    escolhidos = rng.integers(0, len(linhas_por_deck), size=decks)
+    linhas = np.concatenate([linhas_por_deck[i] for i in escolhidos])
+    deck = np.repeat(np.arange(decks), [len(linhas_por_deck[i]) for i in escolhidos])
+
+    # Cada linha comum recebe uma carta da mesma célula; cartas repetidas no
+    # mesmo deck são sorteadas de novo e, se persistirem, descartadas
+    eh_comandante = comandante[linhas]
+    celula_linha = celula[linhas]
+    carta = np.full(len(linhas), -1)
+    pendentes = ~eh_comandante
+    for _ in range(TENTATIVAS):
+        for c, indices in membros.items():
+            alvo = np.flatnonzero(pendentes & (celula_linha == c))
+            if len(alvo):
+                carta[alvo] = rng.choice(indices, size=len(alvo), p=pesos[indices])
+        pendentes = _repetidas(deck, carta, eh_comandante)
+        if not pendentes.any():
+            break
+
+    manter = ~pendentes
+    linhas, deck, carta, eh_comandante = linhas[manter], deck[manter], carta[manter], eh_comandante[manter]
+
+    atributos = modelo.iloc[np.where(eh_comandante, linhas, origem[np.maximum(carta, 0)])][COLUNAS_MODELO]
+    nomes = np.where(eh_comandante,
+                     np.char.add('Comandante Sintético ', np.char.zfill(deck.astype(str), 5)),
+                     np.char.add('Carta Sintética ', np.char.zfill(np.maximum(carta, 0).astype(str), 6)))
+
+    df = atributos.reset_index(drop=True)
+    df.insert(0, 'Nome', nomes.astype(object))
+    df.insert(1, 'Comandante', eh_comandante.astype(int))
+    df['Deck'] = np.char.add('Deck Sintético ', np.char.zfill(deck.astype(str), 5)).astype(object)
+    return df[modelo.columns.tolist()]
+
+
+def write_decks(destino, escala=1.0, **kwargs):
+    """
+    Gera e salva um CSV sintético `escala` vezes maior (em decks) que a referência.
+
+    Retorna:
+        pd.DataFrame: O dataset gerado
+    """
+    df = generate_decks(decks=max(1, int(round(DECKS_REFERENCIA * escala))), **kwargs)
+    df.to_csv(destino, index=False)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um CSV sintético de decks no formato de todos_os_decks.csv")
+    parser.add_argument('destino', help="Arquivo CSV de saída")
+    parser.add_argument('--escala', type=float, default=1.0, help="Múltiplo do número de decks da referência")
+    parser.add_argument('--cartas', type=int, help="Cartas no conjunto")
+    parser.add_argument('--zipf', type=float, default=ZIPF_PADRAO)
+    parser.add_argument('--referencia', default=REFERENCIA)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = write_decks(args.destino, args.escala, cartas=args.cartas, zipf=args.zipf,
+                     referencia=args.referencia, seed=args.seed)
+    print(f"{len(df)} linhas, {df['Deck'].nunique()} decks, {df['Nome'].nunique()} cartas em {args.destino}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# Ordem canônica das cores; bit i = CORES[i] (W=1, U=2, B=4, R=8, G=16)
+CORES = 'WUBRG'
+
+# Identidades que não são combinações de WUBRG (ex.: 'Erro') recebem um bit
+# próprio: nunca cabem em outra identidade e só contêm a identidade vazia
+COR_DESCONHECIDA = 1 << len(CORES)
+
+ROTULO_INCOLOR = 'Incolor'
+ROTULO_DESCONHECIDA = 'Desconhecida'
+
+# Modos de consulta aceitos por query()
+MODOS = ('exatamente', 'subconjunto', 'superconjunto')
+
+
+def color_mask(cores):
+    """
+    Converte uma identidade de cor em máscara de bits.
+
+    Aceita o texto do CSV ('GR', 'BUG', 'Incolor') ou uma lista de letras
+    (['W', 'U']); a ordem das letras não importa.
+    """
+    if cores is None or (isinstance(cores, float) and np.isnan(cores)):
+        return COR_DESCONHECIDA
+    if isinstance(cores, str):
+        cores = cores.strip()
+        if cores in ('', ROTULO_INCOLOR):
+            return 0
+    mascara = 0
+    for cor in cores:
+        if cor not in CORES:
+            return COR_DESCONHECIDA
+        mascara |= 1 << CORES.index(cor)
+    return mascara
+
+
+def color_label(mascara):
+    """Rótulo canônico (ordem WUBRG) de uma máscara: 'WG', 'UBG', 'Incolor'..."""
+    if mascara & COR_DESCONHECIDA:
+        return ROTULO_DESCONHECIDA
+    if mascara == 0:
+        return ROTULO_INCOLOR
+    return ''.join(cor for bit, cor in enumerate(CORES) if mascara & (1 << bit))
+
+
+def normalize_label(cores):
+    """Normaliza a grafia de uma identidade ('GW' e 'WG' viram 'WG')."""
+    return color_label(color_mask(cores))
+
+
+def encode_colors(serie):
+    """
+    Máscaras de cor de uma coluna categórica, linha a linha.
+
+    Cada categoria é convertida uma única vez; as linhas recebem o valor pelos
+    códigos categóricos. Valores ausentes viram COR_DESCONHECIDA.
+    """
+    categorias = serie.cat.categories
+    # Posição extra no final para códigos -1 (cor ausente)
+    por_categoria = np.array([color_mask(str(c)) for c in categorias] + [COR_DESCONHECIDA], dtype=np.int8)
+    return por_categoria[serie.cat.codes.to_numpy()]
+
+
+def normalize_colors(serie):
+    """Recodifica uma coluna de cores para os rótulos canônicos, unindo grafias equivalentes."""
+    categorico = pd.Categorical(serie)
+    rotulos = np.array([normalize_label(str(c)) for c in categorico.categories] + [None], dtype=object)
+    return pd.Categorical(rotulos[categorico.codes])
+
+
+def exactly(mascaras, alvo):
+    """Identidades iguais a `alvo`."""
+    return np.asarray(mascaras) == alvo
+
+
+def subset_of(mascaras, alvo):
+    """Identidades contidas em `alvo` (a carta pode entrar em um deck dessa identidade)."""
+    return (np.asarray(mascaras) & ~alvo) == 0
+
+
+def superset_of(mascaras, alvo):
+    """Identidades que contêm todas as cores de `alvo`."""
+    return (np.asarray(mascaras) & alvo) == alvo
+
+
+def query(mascaras, alvo, modo='superconjunto'):
+    """Aplica uma das consultas de MODOS sobre um vetor de máscaras."""
+    if modo == 'exatamente':
+        return exactly(mascaras, alvo)
+    if modo == 'subconjunto':
+        return subset_of(mascaras, alvo)
+    if modo == 'superconjunto':
+        return superset_of(mascaras, alvo)
+    raise ValueError(f"Modo de consulta desconhecido: {modo}")
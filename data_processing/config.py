@@ -0,0 +1,5 @@
+# Padrões compartilhados pelo app, pela ingestão e pela exportação estática.
+# Sem dependências: o app importa este módulo antes de carregar pandas/plotly.
+
+# Tipos de carta dos gráficos por tipo, do explorador e dos agregados da ingestão
+TIPOS_PADRAO = ('Land', 'Creature', 'Artifact', 'Enchantment', 'Planeswalker', 'Battle', 'Instant', 'Sorcery')
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from data_processing.data_analyzer import BIT_NAO_LAND
+
+# Métricas de associação entre duas cartas
+METRICAS = ('lift', 'jaccard', 'decks')
+
+# Mínimo padrão de decks em comum (lift e Jaccard são instáveis com contagens pequenas)
+SUPORTE_MINIMO = 2
+
+
+def build_cooccurrence(incidencia, sem_lands=True):
+    """
+    Monta a matriz esparsa deck×carta a partir dos pares da incidência.
+
+    Os pares carta×deck já vêm deduplicados dos códigos das colunas
+    deck/nome, então a matriz é binária (1 se a carta está no deck). As
+    consultas de coocorrência e similaridade são produtos desta matriz (ou da
+    transposta) por uma linha, sem laços por par de cartas ou de decks.
+
+    Parâmetros:
+        incidencia (dict): Resultado de data_analyzer.build_incidence
+        sem_lands (bool): Ignora os pares em que a carta só aparece como land
+
+    Retorna:
+        dict: 'matriz' (decks × cartas, CSR), 'transposta' (cartas × decks, CSR),
+              'cartas', 'decks', 'decks_por_carta' e 'cartas_por_deck'
+    """
+    validos = (incidencia['mascara'] & BIT_NAO_LAND) != 0 if sem_lands else slice(None)
+    deck, carta = incidencia['deck'][validos], incidencia['carta'][validos]
+    formato = (len(incidencia['decks']), len(incidencia['cartas']))
+
+    # float32 representa contagens exatas até 2**24 decks e ocupa metade do float64
+    matriz = sparse.csr_matrix((np.ones(len(deck), dtype=np.float32), (deck, carta)), shape=formato)
+    return {
+        'matriz': matriz,
+        'transposta': matriz.T.tocsr(),
+        'cartas': incidencia['cartas'],
+        'decks': incidencia['decks'],
+        'decks_por_carta': np.bincount(carta, minlength=formato[1]),
+        'cartas_por_deck': np.bincount(deck, minlength=formato[0]),
+    }
+
+
+def _indice(categorias, nome):
+    """Posição de `nome` nas categorias; KeyError se não existir."""
+    indice = categorias.get_indexer([nome])[0]
+    if indice < 0:
+        raise KeyError(nome)
+    return indice
+
+
+def _top_k(valores, k, validos):
+    """Índices dos k maiores `valores` entre os `validos` (seleção parcial, só os k são ordenados)."""
+    candidatos = np.flatnonzero(validos)
+    if len(candidatos) > k:
+        candidatos = candidatos[np.argpartition(-valores[candidatos], k - 1)[:k]]
+    # Maior valor primeiro; empates pela ordem das categorias
+    return candidatos[np.lexsort((candidatos, -valores[candidatos]))]
+
+
+def cooccurring_cards(modelo, carta, k=20, metrica='lift', suporte_minimo=SUPORTE_MINIMO):
+    """
+    Cartas mais associadas a `carta` nos decks.
+
+    A linha da carta na transposta vezes a matriz dá, para cada carta, o
+    número de decks que têm as duas (co). A partir dele:
+        lift = co × decks / (decks com a carta × decks com a outra): quantas
+               vezes a outra carta é mais frequente junto de `carta` que no geral
+        jaccard = co / (decks com uma ou outra)
+
+    Parâmetros:
+        modelo (dict): Resultado de build_cooccurrence
+        carta (str): Nome da carta (KeyError se não existir)
+        k (int): Número de cartas retornadas
+        metrica (str): 'lift', 'jaccard' ou 'decks' (co), usada na ordenação
+        suporte_minimo (int): Mínimo de decks em comum
+
+    Retorna:
+        pd.DataFrame: Colunas decks (em comum), lift e jaccard, indexado pelo nome
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica inválida: {metrica} (use {', '.join(METRICAS)})")
+
+    j = _indice(modelo['cartas'], carta)
+    co = (modelo['transposta'][j] @ modelo['matriz']).toarray().ravel()
+    n = modelo['decks_por_carta'].astype(np.float64)
+    total = np.count_nonzero(modelo['cartas_por_deck'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lift = np.where(n > 0, co * total / (n * n[j]), 0.0)
+        jaccard = np.where(n > 0, co / (n + n[j] - co), 0.0)
+
+    validos = co >= max(suporte_minimo, 1)
+    validos[j] = False
+    valores = {'lift': lift, 'jaccard': jaccard, 'decks': co}[metrica]
+    ordem = _top_k(valores, k, validos)
+
+    return pd.DataFrame({'decks': co[ordem].astype(np.int64), 'lift': lift[ordem], 'jaccard': jaccard[ordem]},
+                        index=pd.Index(modelo['cartas'][ordem], name='nome'))
+
+
+def similar_decks(modelo, deck, k=10):
+    """
+    Decks mais parecidos com `deck` pela similaridade de Jaccard das listas de cartas.
+
+    A matriz vezes a linha do deck dá, de uma vez, as cartas em comum com
+    cada um dos demais decks.
+
+    Parâmetros:
+        modelo (dict): Resultado de build_cooccurrence
+        deck (str): Nome do deck (KeyError se não existir)
+        k (int): Número de decks retornados
+
+    Retorna:
+        pd.DataFrame: Colunas cartas_em_comum e jaccard, indexado pelo deck
+    """
+    d = _indice(modelo['decks'], deck)
+    comuns = (modelo['matriz'] @ modelo['matriz'][d].T).toarray().ravel()
+    tamanhos = modelo['cartas_por_deck'].astype(np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(comuns > 0, comuns / (tamanhos + tamanhos[d] - comuns), 0.0)
+
+    validos = comuns > 0
+    validos[d] = False
+    ordem = _top_k(jaccard, k, validos)
+
+    return pd.DataFrame({'cartas_em_comum': comuns[ordem].astype(np.int64), 'jaccard': jaccard[ordem]},
+                        index=pd.Index(modelo['decks'][ordem], name='deck'))
+
+
+def recommend_cards(modelo, cartas, k=20, suporte_minimo=SUPORTE_MINIMO):
+    """
+    Cartas comumente jogadas com um conjunto de cartas (ex.: um deck em montagem).
+
+    Cada deck recebe o peso da fração das `cartas` que contém (matriz ×
+    indicador das cartas); a taxa de uma carta é a fração ponderada desses
+    decks que a jogam (transposta × pesos). O lift compara essa taxa com a
+    frequência da carta em todos os decks.
+
+    Parâmetros:
+        modelo (dict): Resultado de build_cooccurrence
+        cartas (list): Nomes das cartas; os desconhecidos são ignorados
+                       (KeyError se nenhum existir)
+        k (int): Número de cartas retornadas
+        suporte_minimo (int): Mínimo de decks com a carta recomendada
+
+    Retorna:
+        pd.DataFrame: Colunas taxa, lift e decks, indexado pelo nome, pela maior taxa
+    """
+    indices = modelo['cartas'].get_indexer(list(cartas))
+    indices = np.unique(indices[indices >= 0])
+    if not len(indices):
+        raise KeyError(', '.join(map(str, cartas)))
+
+    indicador = np.zeros(len(modelo['cartas']), dtype=np.float32)
+    indicador[indices] = 1.0
+    pesos = (modelo['matriz'] @ indicador).astype(np.float64) / len(indices)
+    # Cartas sem nenhum deck na matriz (ex.: só lands) não ponderam nada
+    soma_pesos = float(pesos.sum()) or 1.0
+
+    n = modelo['decks_por_carta']
+    total = np.count_nonzero(modelo['cartas_por_deck'])
+    taxa = modelo['transposta'] @ pesos / soma_pesos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lift = np.where(n > 0, taxa * total / n, 0.0)
+
+    validos = (taxa > 0) & (n >= max(suporte_minimo, 1))
+    validos[indices] = False
+    ordem = _top_k(taxa, k, validos)
+
+    return pd.DataFrame({'taxa': taxa[ordem], 'lift': lift[ordem], 'decks': n[ordem]},
+                        index=pd.Index(modelo['cartas'][ordem], name='nome'))
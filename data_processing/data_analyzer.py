@@ -1,47 +1,339 @@
+import logging
+
+import numpy as np
 import pandas as pd
 
+from data_processing.color_identity import encode_colors, query
+from data_processing.type_line import BIT_TIPO, lookup, parse_type_line
 
-def analyze_data(df, df_sem_land, tipos):
-    """Realiza análises estatísticas sobre os dados."""
-    try:
-        # Debug: verifica valores únicos nas colunas críticas
-        print("\nValores únicos em 'cor':", df['cor'].unique())
-        print("Valores únicos em 'comandante':", df['comandante'].unique())
+logger = logging.getLogger(__name__)
+
+# Bit reservado na máscara dos pares carta×deck: o par tem ao menos uma linha que não é land
+BIT_NAO_LAND = np.int64(1) << 62
+
+
+def type_line_mask(linha, tipos, subtipo=None):
+    """Máscara de bits (bit i = tipos[i]) de uma linha de tipo: tipos[i] é um supertipo, tipo ou subtipo da carta."""
+    campos = parse_type_line(linha, subtipo)
+    termos = set(campos['supertipos']) | set(campos['tipos']) | set(campos['subtipos'])
+    mascara = np.int64(0)
+    for bit, tipo in enumerate(tipos):
+        if tipo in termos:
+            mascara |= np.int64(1) << bit
+    return mascara
+
+
+def type_masks(df, tipos):
+    """
+    Converte a linha de tipo de cada carta em uma máscara de bits (bit i = tipos[i]).
+
+    Com a linha de tipo já decomposta no store (coluna mascara_tipos), só os
+    bits são remapeados. Sem ela (ou para termos que não são tipos de carta),
+    cada par tipo/subtipo distinto é analisado uma única vez e o resultado é
+    propagado às linhas pelos códigos categóricos.
+    """
+    if len(tipos) >= 62:
+        raise ValueError("No máximo 62 tipos podem ser filtrados")
+
+    if 'mascara_tipos' in df.columns and all(tipo in BIT_TIPO for tipo in tipos):
+        origem = df['mascara_tipos'].to_numpy()
+        mascara = np.zeros(len(df), dtype=np.int64)
+        for bit, tipo in enumerate(tipos):
+            mascara |= ((origem & BIT_TIPO[tipo]) != 0).astype(np.int64) << bit
+        return mascara
+
+    tipo, subtipo = df['tipo'], df['subtipo'] if 'subtipo' in df.columns else None
+    # Códigos deslocados em 1: o 0 é o valor ausente (código -1)
+    codigo_tipo = tipo.cat.codes.to_numpy().astype(np.int64) + 1
+    if subtipo is None:
+        codigo_subtipo, n_subtipos = np.zeros(len(df), dtype=np.int64), 1
+    else:
+        codigo_subtipo, n_subtipos = subtipo.cat.codes.to_numpy().astype(np.int64) + 1, len(subtipo.cat.categories) + 1
+    pares, grupo = np.unique(codigo_tipo * n_subtipos + codigo_subtipo, return_inverse=True)
+
+    por_par = np.zeros(len(pares), dtype=np.int64)
+    for k, par in enumerate(pares.tolist()):
+        i, j = divmod(par, n_subtipos)
+        por_par[k] = type_line_mask(tipo.cat.categories[i - 1] if i else None, tipos,
+                                    subtipo.cat.categories[j - 1] if j else None)
+
+    return por_par[grupo.ravel()]
+
+
+def build_incidence(df, is_land, tipos):
+    """
+    Monta a matriz esparsa de incidência carta×deck (formato COO).
+
+    Cada par (carta, deck) aparece uma vez, com a máscara de tipos das suas
+    linhas e o bit BIT_NAO_LAND. Os pares também são agregados em uma tabela
+    densa cartas × máscaras distintas, da qual saem todas as contagens.
+
+    Retorna:
+        dict: Vetores dos pares, categorias e a tabela de contagens por máscara
+    """
+    cartas = df['nome'].cat.categories
+    decks = df['deck'].cat.categories
+    carta = df['nome'].cat.codes.to_numpy().astype(np.int64)
+    deck = df['deck'].cat.codes.to_numpy().astype(np.int64)
+    cor = df['cor'].cat.codes.to_numpy().astype(np.int64)
+
+    cor_mascara = encode_colors(df['cor'])
+    comandante = df['comandante'].to_numpy() == 1
+
+    mascara = type_masks(df, tipos)
+    mascara = np.where(np.asarray(is_land, dtype=bool), mascara, mascara | BIT_NAO_LAND)
+
+    validas = (carta >= 0) & (deck >= 0)
+    carta, deck, cor, mascara = carta[validas], deck[validas], cor[validas], mascara[validas]
+    cor_mascara, comandante = cor_mascara[validas], comandante[validas]
+
+    # Identidade do deck: união das cores dos comandantes (cobre parceiros)
+    identidade_deck = np.zeros(len(decks), dtype=np.int8)
+    np.bitwise_or.at(identidade_deck, deck[comandante], cor_mascara[comandante])
+
+    # Deduplica os pares carta×deck, combinando as máscaras das linhas repetidas
+    chave = carta * max(len(decks), 1) + deck
+    pares, inverso = np.unique(chave, return_inverse=True)
+    mascara_par = np.zeros(len(pares), dtype=np.int64)
+    np.bitwise_or.at(mascara_par, inverso, mascara)
+    cor_par = np.empty(len(pares), dtype=np.int64)
+    cor_par[inverso] = cor
+    cor_mascara_par = np.empty(len(pares), dtype=np.int8)
+    cor_mascara_par[inverso] = cor_mascara
+
+    carta_par = pares // max(len(decks), 1)
+    deck_par = pares % max(len(decks), 1)
+
+    # Tabela cartas × máscaras distintas: o número de máscaras distintas é
+    # pequeno (combinações de tipos), então cada filtro depois custa O(cartas)
+    mascaras, mascara_id = np.unique(mascara_par, return_inverse=True)
+    contagem_mascaras = np.bincount(
+        carta_par * len(mascaras) + mascara_id,
+        minlength=len(cartas) * len(mascaras)
+    ).reshape(len(cartas), len(mascaras))
+
+    return {
+        'cartas': cartas,
+        'decks': decks,
+        'cores': df['cor'].cat.categories,
+        'carta': carta_par,
+        'deck': deck_par,
+        'mascara': mascara_par,
+        'cor': cor_par,
+        'cor_mascara': cor_mascara_par,
+        'identidade_deck': identidade_deck,
+        'tipos': list(tipos),
+        'mascaras': mascaras,
+        'contagem_mascaras': contagem_mascaras,
+    }
+
+
+def _ranking(cartas, contagens):
+    """Série de cartas com contagem > 0, da mais para a menos popular."""
+    presentes = np.flatnonzero(contagens)
+    serie = pd.Series(contagens[presentes], index=pd.Index(cartas[presentes], name='nome'), name='deck')
+    return serie.sort_values(ascending=False, kind='stable')
+
+
+def popularity(incidencia, bits):
+    """Número de decks por carta, considerando só pares cuja máscara contém todos os `bits`."""
+    selecionadas = (incidencia['mascaras'] & bits) == bits
+    contagens = incidencia['contagem_mascaras'][:, selecionadas].sum(axis=1)
+    return _ranking(incidencia['cartas'], contagens)
+
+
+def color_popularity(incidencia, alvo, modo='superconjunto', identidade='carta'):
+    """
+    Número de decks por carta filtrando os pares pela identidade de cor.
 
-        # Número de decks distintos
-        num_decks_distintos = df['deck'].nunique()
+    Parâmetros:
+        alvo (int): Máscara de cores (ver color_identity.color_mask)
+        modo (str): 'exatamente', 'subconjunto' ou 'superconjunto'
+        identidade (str): 'carta' compara a identidade da carta;
+                          'deck' compara a identidade do comandante do deck
+    """
+    if identidade == 'deck':
+        mascaras = incidencia['identidade_deck'][incidencia['deck']]
+    else:
+        mascaras = incidencia['cor_mascara']
+    selecionados = query(mascaras, alvo, modo)
+    contagens = np.bincount(incidencia['carta'][selecionados], minlength=len(incidencia['cartas']))
+    return _ranking(incidencia['cartas'], contagens)
 
-        # Comandantes
-        comandantes_decks = df[df['comandante'] == 1].groupby('deck').first()
 
-        # Preço por deck
-        preco_por_deck = df.groupby('deck')['preco_usd'].sum().sort_values(ascending=False)
+def subtype_popularity(df, indice, is_land=None):
+    """
+    Número de decks com ao menos uma carta de cada subtipo.
 
-        # Cores dos comandantes
-        cores_comandantes = comandantes_decks['cor'].value_counts()
+    As linhas de cada subtipo vêm do índice invertido do store (ver
+    type_line), sem varrer o texto das colunas; com `is_land`, as lands
+    (subtipos Plains, Forest...) ficam de fora.
+    """
+    n_decks = max(len(df['deck'].cat.categories), 1)
+    termo = np.repeat(np.arange(len(indice['termos'])), np.diff(indice['offsets']))
+    linhas = np.asarray(indice['linhas'])
+    deck = df['deck'].cat.codes.to_numpy()[linhas].astype(np.int64)
 
-        # Cartas mais comuns (sem lands)
-        cartas_comuns = df_sem_land.groupby('nome')['deck'].nunique().sort_values(ascending=False)
+    validos = deck >= 0
+    if is_land is not None:
+        validos &= ~np.asarray(is_land, dtype=bool)[linhas]
+    pares = np.unique(termo[validos] * n_decks + deck[validos])
+    contagens = np.bincount(pares // n_decks, minlength=len(indice['termos']))
+    return _ranking(np.asarray(indice['termos'], dtype=object), contagens).rename_axis('subtipo')
 
-        # EDHREC Rank por deck
-        edhrec_rank_por_deck = df.groupby('deck')['edhrec_rank'].sum() / 100
-        edhrec_rank_por_deck = edhrec_rank_por_deck.sort_values(ascending=False)
 
-        # Cartas por tipo
-        cartas_por_tipo = {}
-        for tipo in tipos:
-            tipo_cartas = df[df['tipo'].str.contains(tipo, case=False, na=False)]
-            cartas_por_tipo[tipo] = tipo_cartas.groupby('nome')['deck'].nunique().sort_values(ascending=False)
+def subtype_cards(df, indice, subtipos):
+    """
+    Número de decks por carta entre as cartas com algum dos `subtipos` (consulta ao índice invertido).
+
+    Retorna:
+        pd.Series: Cartas da mais para a menos popular
+    """
+    cartas = df['nome'].cat.categories
+    linhas = lookup(indice, subtipos)
+    carta = df['nome'].cat.codes.to_numpy()[linhas].astype(np.int64)
+    deck = df['deck'].cat.codes.to_numpy()[linhas].astype(np.int64)
+
+    n_decks = max(len(df['deck'].cat.categories), 1)
+    validos = (carta >= 0) & (deck >= 0)
+    pares = np.unique(carta[validos] * n_decks + deck[validos])
+    contagens = np.bincount(pares // n_decks, minlength=len(cartas))
+    return _ranking(cartas, contagens)
+
+
+def type_bit(incidencia, tipo):
+    """Bit da máscara correspondente a um tipo."""
+    return np.int64(1) << incidencia['tipos'].index(tipo)
+
+
+def deck_rankings(df, incidencia, tipos):
+    """
+    Rankings decomponíveis em somas por deck: preço, EDHREC Rank, cores dos
+    comandantes, cartas mais comuns e cartas por tipo.
+
+    São os mesmos mantidos no lugar pela ingestão incremental (ver
+    ingestion.aggregates_to_results).
+    """
+    decks = df['deck'].cat.categories
+    deck = df['deck'].cat.codes.to_numpy()
+    validas = deck >= 0
+    deck_validas = deck[validas]
+
+    # Número de decks distintos
+    num_decks_distintos = int(np.count_nonzero(np.bincount(deck_validas, minlength=len(decks))))
+
+    # Preço e EDHREC Rank por deck (somas vetorizadas pelos códigos do deck)
+    preco = np.bincount(deck_validas, weights=df['preco_usd'].to_numpy()[validas], minlength=len(decks))
+    edhrec = np.bincount(deck_validas, weights=df['edhrec_rank'].to_numpy()[validas], minlength=len(decks))
+    presentes = np.flatnonzero(np.bincount(deck_validas, minlength=len(decks)))
+    indice_decks = pd.Index(decks[presentes], name='deck')
+
+    preco_por_deck = pd.Series(preco[presentes], index=indice_decks, name='preco_usd')
+    preco_por_deck = preco_por_deck.sort_values(ascending=False, kind='stable')
+
+    edhrec_rank_por_deck = pd.Series(edhrec[presentes] / 100, index=indice_decks, name='edhrec_rank')
+    edhrec_rank_por_deck = edhrec_rank_por_deck.sort_values(ascending=False, kind='stable')
+
+    # Cores dos comandantes (primeiro comandante de cada deck)
+    linhas_comandante = np.flatnonzero(validas & (df['comandante'].to_numpy() == 1))
+    _, primeiras = np.unique(deck[linhas_comandante], return_index=True)
+    cor_comandantes = df['cor'].cat.codes.to_numpy()[linhas_comandante[primeiras]]
+    cor_comandantes = cor_comandantes[cor_comandantes >= 0]
+    cores_comandantes = _ranking(df['cor'].cat.categories,
+                                 np.bincount(cor_comandantes, minlength=len(df['cor'].cat.categories)))
+    cores_comandantes = cores_comandantes.rename('count').rename_axis('cor')
+
+    # Cartas mais comuns (sem lands)
+    cartas_comuns = popularity(incidencia, BIT_NAO_LAND)
+
+    # Cartas por tipo
+    cartas_por_tipo = {tipo: popularity(incidencia, type_bit(incidencia, tipo)) for tipo in tipos}
+
+    return {
+        'num_decks_distintos': num_decks_distintos,
+        'preco_por_deck': preco_por_deck,
+        'cores_comandantes': cores_comandantes,
+        'cartas_comuns': cartas_comuns,
+        'edhrec_rank_por_deck': edhrec_rank_por_deck,
+        'cartas_por_tipo': cartas_por_tipo,
+    }
+
+
+def analyze_data(df, is_land, tipos, indices=None, rankings=None):
+    """
+    Realiza análises estatísticas sobre os dados.
+
+    Com os índices invertidos do store (`indices`, ver data_store.load_indexes),
+    inclui também o ranking de subtipos ('subtipos'). Com `rankings` (os
+    agregados da ingestão incremental, no formato de deck_rankings), esses
+    rankings não são recalculados do corpus.
+    """
+    try:
+        # Resumo das colunas críticas (só com o log em nível DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Análise de %d linhas: cores %s, comandante %s", len(df),
+                         list(df['cor'].cat.categories), sorted(df['comandante'].unique().tolist()))
+
+        # Incidência carta×deck construída uma única vez para todos os rankings
+        incidencia = build_incidence(df, is_land, tipos)
+        if rankings is None:
+            rankings = deck_rankings(df, incidencia, tipos)
+
+        # Cartas por cor (tabela cor × carta em uma única contagem)
+        cores = df['cor'].cat.categories
+        n_cartas = len(incidencia['cartas'])
+        pares_com_cor = incidencia['cor'] >= 0
+        contagem_cores = np.bincount(
+            incidencia['cor'][pares_com_cor] * n_cartas + incidencia['carta'][pares_com_cor],
+            minlength=len(cores) * n_cartas
+        ).reshape(len(cores), n_cartas)
+        cartas_por_cor = {
+            str(cor): _ranking(incidencia['cartas'], contagem_cores[i])
+            for i, cor in enumerate(cores) if contagem_cores[i].any()
+        }
+
+        resultados_subtipos = {}
+        if indices and 'subtipos' in indices:
+            resultados_subtipos['subtipos'] = subtype_popularity(df, indices['subtipos'], is_land)
 
         return {
-            'num_decks_distintos': num_decks_distintos,
-            'preco_por_deck': preco_por_deck,
-            'cores_comandantes': cores_comandantes,
-            'cartas_comuns': cartas_comuns,
-            'edhrec_rank_por_deck': edhrec_rank_por_deck,
-            'cartas_por_tipo': cartas_por_tipo
+            **resultados_subtipos,
+            **rankings,
+            'cartas_por_cor': cartas_por_cor,
+            'incidencia': incidencia
         }
 
     except Exception as e:
-        print(f"Erro na análise de dados: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error("Erro na análise de dados: %s", e)
+        raise
+
+
+def compare_popularity(contagens_a, total_a, contagens_b, total_b, top_n=50):
+    """
+    Compara a popularidade de cada item (carta, cor...) entre dois conjuntos de decks.
+
+    Usa só os rankings agregados de cada snapshot (item → número de decks),
+    sem voltar às linhas dos datasets. A popularidade é a fração dos decks
+    do conjunto em que o item aparece, então conjuntos de tamanhos diferentes
+    são comparáveis.
+
+    Parâmetros:
+        contagens_a (pd.Series): Número de decks por item no conjunto A
+        total_a (int): Número de decks do conjunto A
+        contagens_b (pd.Series): Número de decks por item no conjunto B
+        total_b (int): Número de decks do conjunto B
+        top_n (int): Itens retornados, pelas maiores variações absolutas (None: todos)
+
+    Retorna:
+        pd.DataFrame: Colunas decks_a, decks_b, fracao_a, fracao_b e delta
+                      (fracao_b - fracao_a), indexado pelo item
+    """
+    tabela = pd.concat({'decks_a': contagens_a, 'decks_b': contagens_b}, axis=1).fillna(0).astype('int64')
+    tabela['fracao_a'] = tabela['decks_a'] / max(total_a, 1)
+    tabela['fracao_b'] = tabela['decks_b'] / max(total_b, 1)
+    tabela['delta'] = tabela['fracao_b'] - tabela['fracao_a']
+
+    ordem = np.argsort(-tabela['delta'].abs().to_numpy(), kind='stable')
+    if top_n is not None:
+        ordem = ordem[:top_n]
+    return tabela.iloc[ordem]
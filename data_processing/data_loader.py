@@ -1,49 +1,32 @@
-import pandas as pd
+from data_processing.data_store import load_indexes, load_or_compile, store_path
 
 
 def load_and_preprocess_data(filepath):
-    """Carrega e pré-processa os dados do arquivo CSV."""
-    try:
-        df = pd.read_csv(filepath)
-
-        # Verifica colunas existentes (debug)
-        #print("\nColunas disponíveis no CSV:", df.columns.tolist())
-
-        # Padroniza nomes de colunas (case insensitive)
-        df.columns = df.columns.str.strip().str.lower()
+    """
+    Carrega os dados do store colunar compilado a partir do CSV.
 
-        # Renomeia colunas para nomes esperados
-        column_mapping = {
-            'preco_usd': 'preco_usd',
-            'edhrec_rank': 'edhrec_rank',
-            'deck': 'deck',
-            'comandante': 'comandante',
-            'cor': 'cor',
-            'tipo': 'tipo',
-            'nome': 'nome'
-        }
+    O CSV só é relido quando o store está ausente ou desatualizado; nos demais
+    casos as colunas são mapeadas em memória e compartilhadas entre workers.
 
-        # Aplica o mapeamento de colunas
-        for original, new in column_mapping.items():
-            if original in df.columns:
-                df.rename(columns={original: new}, inplace=True)
-
-        # Filtra decks inválidos
-        df = df[~df['deck'].str.endswith('INVALIDO', na=False)]
+    Retorna:
+        tuple: (DataFrame com nome/deck/cor/tipo/subtipo categóricos,
+                máscara booleana das linhas que são lands)
+    """
+    try:
+        return load_or_compile(filepath)
 
-        # Converte colunas numéricas
-        df['preco_usd'] = pd.to_numeric(df['preco_usd'], errors='coerce').fillna(0)
-        df['edhrec_rank'] = pd.to_numeric(df['edhrec_rank'], errors='coerce').fillna(0)
+    except Exception as e:
+        print(f"Erro ao carregar dados: {str(e)}")
+        raise
 
-        # Debug: mostra amostra dos dados
-        #print("\nAmostra dos dados carregados:")
-        #print(df[['deck', 'preco_usd', 'edhrec_rank', 'cor']].head())
 
-        # Filtra cartas que não são do tipo "Land"
-        df_sem_land = df[~df['tipo'].str.contains('land', case=False, na=False)]
+def load_type_indexes(filepath):
+    """
+    Índices invertidos tipo → linhas e subtipo → linhas do store do CSV.
 
-        return df, df_sem_land
+    O store precisa ter sido aberto antes por load_and_preprocess_data.
 
-    except Exception as e:
-        print(f"Erro ao carregar dados: {str(e)}")
-        raise
\ No newline at end of file
+    Retorna:
+        dict: Ver data_store.load_indexes
+    """
+    return load_indexes(store_path(filepath))
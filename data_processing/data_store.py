@@ -0,0 +1,228 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_processing.color_identity import normalize_colors
+from data_processing.type_line import BIT_TIPO, parse_type_columns
+
+# Versão do layout (e da decomposição da linha de tipo) em disco; incrementar invalida stores antigos
+VERSAO_STORE = 4
+
+# Colunas de texto guardadas como códigos inteiros + dicionário de categorias
+# (supertipos/tipos_carta/subtipos: linha de tipo decomposta, ver type_line)
+COLUNAS_CATEGORICAS = ['nome', 'deck', 'cor', 'tipo', 'subtipo', 'supertipos', 'tipos_carta', 'subtipos']
+
+# Colunas numéricas e o dtype usado no store
+COLUNAS_NUMERICAS = {
+    'comandante': np.int8,
+    'custo': np.float32,
+    'preco_usd': np.float64,
+    'edhrec_rank': np.float64,
+    'faces': np.int8,
+    'mascara_tipos': np.int32,
+}
+
+
+def store_path(filepath):
+    """Retorna o diretório do store compilado correspondente a um CSV."""
+    base, _ = os.path.splitext(filepath)
+    return f"{base}.store"
+
+
+def source_signature(filepath):
+    """Identifica a versão do CSV de origem (tamanho + mtime)."""
+    stat = os.stat(filepath)
+    return {'tamanho': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_csv_data(filepath):
+    """Lê o CSV bruto e aplica a limpeza básica (colunas, decks inválidos, numéricos)."""
+    return clean_data(pd.read_csv(filepath))
+
+
+def clean_data(df):
+    """Padroniza colunas, remove decks inválidos e converte as colunas numéricas."""
+    # Padroniza nomes de colunas (case insensitive)
+    df.columns = df.columns.str.strip().str.lower()
+
+    # Filtra decks inválidos
+    df = df[~df['deck'].str.endswith('INVALIDO', na=False)].reset_index(drop=True)
+
+    # Converte colunas numéricas ('Erro' e vazios viram 0 / NaN)
+    df['preco_usd'] = pd.to_numeric(df['preco_usd'], errors='coerce').fillna(0)
+    df['edhrec_rank'] = pd.to_numeric(df['edhrec_rank'], errors='coerce').fillna(0)
+    if 'custo' in df.columns:
+        df['custo'] = pd.to_numeric(df['custo'], errors='coerce')
+
+    # Grafias equivalentes da identidade de cor ('GW'/'WG') viram um único rótulo
+    df['cor'] = normalize_colors(df['cor'])
+
+    return df
+
+
+def compile_store(filepath, destino=None):
+    """
+    Compila o CSV em um store colunar memory-mappable.
+
+    Cada coluna categórica vira um arquivo .npy de códigos int32 e uma lista de
+    categorias no meta.json; as numéricas viram .npy do dtype correspondente.
+    A linha de tipo é decomposta uma única vez (ver type_line) em colunas e
+    nos índices invertidos tipo → linhas e subtipo → linhas, gravados como
+    pares offsets/linhas. A máscara de lands é gravada como um vetor booleano.
+
+    Parâmetros:
+        filepath (str): Caminho do CSV de origem
+        destino (str): Diretório do store (padrão: <csv>.store)
+
+    Retorna:
+        str: Diretório do store gerado
+    """
+    destino = destino or store_path(filepath)
+    assinatura = source_signature(filepath)
+    df = read_csv_data(filepath)
+    campos_tipo = parse_type_columns(df['tipo'], df['subtipo'])
+    for coluna in ('supertipos', 'tipos_carta', 'subtipos', 'faces', 'mascara_tipos'):
+        df[coluna] = campos_tipo[coluna]
+
+    # Grava em um diretório temporário e troca de uma vez, para que workers
+    # concorrentes nunca leiam um store pela metade
+    pai = os.path.dirname(os.path.abspath(destino))
+    tmp = tempfile.mkdtemp(prefix='.store-', dir=pai)
+    try:
+        meta = {
+            'versao': VERSAO_STORE,
+            'origem': assinatura,
+            'linhas': len(df),
+            'categoricas': {},
+            'numericas': {},
+            'indices': {},
+        }
+
+        for coluna in COLUNAS_CATEGORICAS:
+            if coluna not in df.columns:
+                continue
+            categorico = pd.Categorical(df[coluna])
+            np.save(os.path.join(tmp, f"{coluna}.npy"), categorico.codes.astype(np.int32))
+            meta['categoricas'][coluna] = [str(c) for c in categorico.categories]
+
+        for coluna, dtype in COLUNAS_NUMERICAS.items():
+            if coluna not in df.columns:
+                continue
+            np.save(os.path.join(tmp, f"{coluna}.npy"), df[coluna].to_numpy(dtype=dtype))
+            meta['numericas'][coluna] = np.dtype(dtype).name
+
+        for nome, indice in campos_tipo['indices'].items():
+            np.save(os.path.join(tmp, f"indice_{nome}_offsets.npy"), indice['offsets'])
+            np.save(os.path.join(tmp, f"indice_{nome}_linhas.npy"), indice['linhas'])
+            meta['indices'][nome] = [str(termo) for termo in indice['termos']]
+
+        is_land = (df['mascara_tipos'].to_numpy() & BIT_TIPO['Land']) != 0
+        np.save(os.path.join(tmp, 'is_land.npy'), is_land)
+
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(meta, arquivo, ensure_ascii=False)
+
+        antigo = None
+        if os.path.isdir(destino):
+            antigo = tempfile.mkdtemp(prefix='.store-old-', dir=pai)
+            os.replace(destino, os.path.join(antigo, 'store'))
+        try:
+            os.replace(tmp, destino)
+        except OSError:
+            # Outro worker compilou o mesmo CSV ao mesmo tempo e publicou antes
+            # (os.replace sobre um diretório não vazio falha): o store dele serve
+            existente = _store_valido(filepath, destino)
+            if existente is None or existente.get('origem') != assinatura:
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+        if antigo:
+            shutil.rmtree(antigo, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return destino
+
+
+def _store_valido(filepath, diretorio):
+    """Verifica se o store existe e corresponde à versão atual do CSV."""
+    try:
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('versao') != VERSAO_STORE:
+        return None
+    if os.path.exists(filepath) and meta.get('origem') != source_signature(filepath):
+        return None
+    return meta
+
+
+def load_store(diretorio, meta=None):
+    """
+    Abre um store compilado com os vetores mapeados em memória.
+
+    Retorna:
+        tuple: (DataFrame com colunas categóricas, máscara booleana de lands)
+    """
+    if meta is None:
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+
+    colunas = {}
+    for coluna, categorias in meta['categoricas'].items():
+        codigos = np.load(os.path.join(diretorio, f"{coluna}.npy"), mmap_mode='r')
+        colunas[coluna] = pd.Categorical.from_codes(codigos, categories=categorias)
+
+    for coluna in meta['numericas']:
+        colunas[coluna] = np.load(os.path.join(diretorio, f"{coluna}.npy"), mmap_mode='r')
+
+    df = pd.DataFrame(colunas, copy=False)
+    is_land = np.load(os.path.join(diretorio, 'is_land.npy'), mmap_mode='r')
+
+    return df, is_land
+
+
+def load_indexes(diretorio, meta=None):
+    """
+    Abre os índices invertidos do store (vetores mapeados em memória).
+
+    Retorna:
+        dict: Nome do índice ('tipos', 'subtipos') -> {'termos', 'offsets', 'linhas'} (ver type_line.lookup)
+    """
+    if meta is None:
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+
+    return {
+        nome: {
+            'termos': pd.Index(termos, dtype=object),
+            'offsets': np.load(os.path.join(diretorio, f"indice_{nome}_offsets.npy"), mmap_mode='r'),
+            'linhas': np.load(os.path.join(diretorio, f"indice_{nome}_linhas.npy"), mmap_mode='r'),
+        }
+        for nome, termos in meta.get('indices', {}).items()
+    }
+
+
+def load_or_compile(filepath):
+    """Abre o store do CSV, recompilando-o se estiver ausente ou desatualizado."""
+    diretorio = store_path(filepath)
+    meta = _store_valido(filepath, diretorio)
+    if meta is None:
+        compile_store(filepath, diretorio)
+    return load_store(diretorio)
+
+
+if __name__ == '__main__':
+    # Uso: python -m data_processing.data_store todos_os_decks.csv [destino]
+    if len(sys.argv) < 2:
+        print("Uso: python -m data_processing.data_store <arquivo.csv> [destino]")
+        sys.exit(1)
+    caminho = compile_store(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Store compilado em {caminho}")
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from data_processing.color_identity import CORES, MODOS, query
+from data_processing.data_analyzer import type_bit
+
+
+def build_filter_cube(incidencia, tipos, top_n=50, modos=MODOS):
+    """
+    Pré-calcula o ranking de cartas para cada combinação (tipo × modo × subconjunto de cores).
+
+    Uma carta entra na célula (tipo, modo, cores) se o tipo aparece na sua
+    linha de tipo e se sua identidade de cor atende à consulta `modo` contra
+    as cores selecionadas (ver color_identity.query). São 32 subconjuntos por
+    tipo e modo; cada célula é uma contagem vetorizada sobre os pares
+    carta×deck do tipo.
+
+    Retorna:
+        dict: (tipo, modo, máscara de cores) -> pd.Series com as top_n cartas
+    """
+    cartas = incidencia['cartas']
+
+    cubo = {}
+    for tipo in tipos:
+        do_tipo = (incidencia['mascara'] & type_bit(incidencia, tipo)) != 0
+        carta_tipo, cor_tipo = incidencia['carta'][do_tipo], incidencia['cor_mascara'][do_tipo]
+
+        for modo in modos:
+            for selecao in range(1 << len(CORES)):
+                contagens = np.bincount(carta_tipo[query(cor_tipo, selecao, modo)], minlength=len(cartas))
+                presentes = np.flatnonzero(contagens)
+                # Mais decks primeiro; empates em ordem alfabética (códigos categóricos)
+                ordem = presentes[np.lexsort((presentes, -contagens[presentes]))][:top_n]
+                cubo[(tipo, modo, selecao)] = pd.Series(contagens[ordem],
+                                                        index=pd.Index(cartas[ordem], name='nome'), name='deck')
+
+    return cubo
@@ -0,0 +1,345 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_processing.data_analyzer import BIT_NAO_LAND, build_incidence, type_line_mask
+from data_processing.data_loader import load_and_preprocess_data
+from data_processing.data_store import clean_data, source_signature
+from data_processing.config import TIPOS_PADRAO
+from data_processing.type_line import parse_type_line
+
+
+def aggregates_path(filepath):
+    """Retorna o arquivo de agregados incrementais correspondente a um CSV."""
+    base, _ = os.path.splitext(filepath)
+    return f"{base}.agregados.json"
+
+
+def _novo_estado(tipos):
+    return {
+        'tipos': list(tipos),
+        'decks': {},
+        'cores_comandantes': {},
+        'cartas_comuns': {},
+        'cartas_por_tipo': {tipo: {} for tipo in tipos},
+    }
+
+
+def _somar(contador, chave, delta):
+    """Soma `delta` a um contador, removendo a chave quando chega a zero."""
+    valor = contador.get(chave, 0) + delta
+    if valor:
+        contador[chave] = valor
+    else:
+        contador.pop(chave, None)
+
+
+def _aplicar_deck(agregados, contribuicao, sinal):
+    """Soma (sinal=1) ou subtrai (sinal=-1) a contribuição de um deck dos contadores."""
+    if contribuicao['cor_comandante'] is not None:
+        _somar(agregados['cores_comandantes'], contribuicao['cor_comandante'], sinal)
+
+    for carta, mascara in contribuicao['cartas'].items():
+        if mascara & BIT_NAO_LAND:
+            _somar(agregados['cartas_comuns'], carta, sinal)
+        for bit, tipo in enumerate(agregados['tipos']):
+            if mascara & (1 << bit):
+                _somar(agregados['cartas_por_tipo'][tipo], carta, sinal)
+
+
+def build_aggregates(df, is_land, tipos):
+    """
+    Constrói os agregados incrementais a partir do dataset completo.
+
+    Para cada deck guarda sua contribuição (somas de preço/EDHREC, cor do
+    comandante e máscara de tipos de cada carta), o que permite depois
+    adicionar ou remover um deck em O(cartas do deck).
+    """
+    agregados = _novo_estado(tipos)
+    incidencia = build_incidence(df, is_land, tipos)
+    decks = incidencia['decks']
+
+    deck = df['deck'].cat.codes.to_numpy()
+    validas = deck >= 0
+    preco = np.bincount(deck[validas], weights=df['preco_usd'].to_numpy()[validas], minlength=len(decks))
+    edhrec = np.bincount(deck[validas], weights=df['edhrec_rank'].to_numpy()[validas], minlength=len(decks))
+
+    linhas_comandante = np.flatnonzero(validas & (df['comandante'].to_numpy() == 1))
+    decks_comandante, primeiras = np.unique(deck[linhas_comandante], return_index=True)
+    cores_comandante = df['cor'].iloc[linhas_comandante[primeiras]].to_numpy()
+    cor_por_deck = dict(zip(decks_comandante.tolist(), cores_comandante))
+
+    for codigo in np.unique(incidencia['deck']).tolist():
+        agregados['decks'][str(decks[codigo])] = {
+            'preco': float(preco[codigo]),
+            'edhrec': float(edhrec[codigo]),
+            'cor_comandante': None if pd.isna(cor_por_deck.get(codigo)) else str(cor_por_deck[codigo]),
+            'cartas': {},
+        }
+
+    for carta, codigo, mascara in zip(incidencia['carta'].tolist(), incidencia['deck'].tolist(),
+                                      incidencia['mascara'].tolist()):
+        agregados['decks'][str(decks[codigo])]['cartas'][str(incidencia['cartas'][carta])] = mascara
+
+    for contribuicao in agregados['decks'].values():
+        _aplicar_deck(agregados, contribuicao, 1)
+
+    return agregados
+
+
+def deck_contribution(linhas, tipos):
+    """Calcula a contribuição de um único deck (DataFrame já limpo) aos agregados."""
+    comandantes = linhas[linhas['comandante'] == 1]
+    cor_comandante = comandantes['cor'].iloc[0] if not comandantes.empty else None
+
+    subtipos = linhas['subtipo'] if 'subtipo' in linhas.columns else [None] * len(linhas)
+    cartas = {}
+    for nome, tipo, subtipo in zip(linhas['nome'], linhas['tipo'], subtipos):
+        mascara = int(type_line_mask(tipo, tipos, subtipo))
+        if 'Land' not in parse_type_line(tipo, subtipo)['tipos']:
+            mascara |= int(BIT_NAO_LAND)
+        cartas[str(nome)] = cartas.get(str(nome), 0) | mascara
+
+    return {
+        'preco': float(linhas['preco_usd'].sum()),
+        'edhrec': float(linhas['edhrec_rank'].sum()),
+        'cor_comandante': None if pd.isna(cor_comandante) else str(cor_comandante),
+        'cartas': cartas,
+    }
+
+
+def add_deck(agregados, nome_deck, linhas):
+    """Adiciona um deck novo aos agregados. Falha se o deck já existir."""
+    if nome_deck in agregados['decks']:
+        raise ValueError(f"Deck '{nome_deck}' já existe")
+    contribuicao = deck_contribution(linhas, agregados['tipos'])
+    agregados['decks'][nome_deck] = contribuicao
+    _aplicar_deck(agregados, contribuicao, 1)
+
+
+def remove_deck(agregados, nome_deck):
+    """Remove um deck dos agregados. Falha se o deck não existir."""
+    if nome_deck not in agregados['decks']:
+        raise KeyError(f"Deck '{nome_deck}' não encontrado")
+    _aplicar_deck(agregados, agregados['decks'].pop(nome_deck), -1)
+
+
+def replace_deck(agregados, nome_deck, linhas):
+    """Substitui (ou cria) um deck nos agregados."""
+    if nome_deck in agregados['decks']:
+        remove_deck(agregados, nome_deck)
+    add_deck(agregados, nome_deck, linhas)
+
+
+def _ranking(contador, nome_indice, nome_serie, dtype='int64'):
+    """Série ordenada do maior para o menor valor (empates em ordem alfabética)."""
+    serie = pd.Series(contador, dtype=dtype, name=nome_serie)
+    serie = serie.rename_axis(nome_indice).sort_index()
+    return serie.sort_values(ascending=False, kind='stable')
+
+
+def aggregates_to_results(agregados):
+    """Converte os agregados no mesmo formato de resultados de analyze_data."""
+    decks = agregados['decks']
+    return {
+        'num_decks_distintos': len(decks),
+        'preco_por_deck': _ranking({d: c['preco'] for d, c in decks.items()}, 'deck', 'preco_usd', 'float64'),
+        'cores_comandantes': _ranking(agregados['cores_comandantes'], 'cor', 'count'),
+        'cartas_comuns': _ranking(agregados['cartas_comuns'], 'nome', 'deck'),
+        'edhrec_rank_por_deck': _ranking({d: c['edhrec'] / 100 for d, c in decks.items()}, 'deck', 'edhrec_rank', 'float64'),
+        'cartas_por_tipo': {
+            tipo: _ranking(contador, 'nome', 'deck') for tipo, contador in agregados['cartas_por_tipo'].items()
+        },
+    }
+
+
+def save_aggregates(agregados, filepath):
+    """Grava os agregados ao lado do CSV, com a assinatura do CSV de origem."""
+    destino = aggregates_path(filepath)
+    dados = dict(agregados, origem=source_signature(filepath))
+    fd, tmp = tempfile.mkstemp(prefix='.agregados-', dir=os.path.dirname(os.path.abspath(destino)))
+    with os.fdopen(fd, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+    os.replace(tmp, destino)
+
+
+def current_aggregates(filepath, tipos=TIPOS_PADRAO):
+    """
+    Abre os agregados gravados pela ingestão, sem reconstruí-los.
+
+    Retorna:
+        dict: Os agregados, ou None se estão ausentes, desatualizados em
+              relação ao CSV ou com outra lista de tipos
+    """
+    try:
+        with open(aggregates_path(filepath), encoding='utf-8') as arquivo:
+            agregados = json.load(arquivo)
+        if agregados.pop('origem') == source_signature(filepath) and agregados['tipos'] == list(tipos):
+            return agregados
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def load_aggregates(filepath, tipos=TIPOS_PADRAO):
+    """
+    Abre os agregados do CSV, reconstruindo-os do zero se estiverem ausentes,
+    desatualizados em relação ao CSV ou com outra lista de tipos.
+    """
+    agregados = current_aggregates(filepath, tipos)
+    if agregados is not None:
+        return agregados
+
+    df, is_land = load_and_preprocess_data(filepath)
+    return build_aggregates(df, is_land, tipos)
+
+
+def _colunas_csv(filepath):
+    with open(filepath, newline='', encoding='utf-8') as arquivo:
+        return next(csv.reader(arquivo))
+
+
+def _alinhar_colunas(filepath, linhas_brutas):
+    """
+    Linhas do deck na ordem de colunas do CSV do dataset.
+
+    Feito antes de qualquer alteração: um deck sem alguma coluna do dataset
+    levanta ValueError com o dataset e os agregados ainda intactos.
+    """
+    colunas = _colunas_csv(filepath)
+    por_nome = {c.strip().lower(): c for c in linhas_brutas.columns}
+    faltando = [c for c in colunas if c.strip().lower() not in por_nome]
+    if faltando:
+        raise ValueError(f"O arquivo do deck não tem as colunas do dataset: {', '.join(faltando)}")
+    return linhas_brutas[[por_nome[c.strip().lower()] for c in colunas]]
+
+
+def _falta_quebra_final(filepath):
+    """Indica se o arquivo não vazio termina sem quebra de linha."""
+    with open(filepath, 'rb') as arquivo:
+        if arquivo.seek(0, os.SEEK_END) == 0:
+            return False
+        arquivo.seek(-1, os.SEEK_END)
+        return arquivo.read(1) not in (b'\n', b'\r')
+
+
+def _regravar_csv(filepath, nome_deck, linhas=None):
+    """
+    Regrava o CSV sem as linhas do deck e, com `linhas`, com as novas no fim.
+
+    O CSV não permite apagar linhas no lugar, então replace/remove custam uma
+    cópia sequencial do arquivo (O(corpus) em E/S, sem parse nem análise);
+    os agregados continuam sendo atualizados em O(cartas do deck). Remoção e
+    inclusão vão para o mesmo arquivo temporário, trocado de uma vez: uma
+    falha no meio deixa o dataset original intacto.
+    """
+    fd, tmp = tempfile.mkstemp(prefix='.decks-', dir=os.path.dirname(os.path.abspath(filepath)))
+    try:
+        with open(filepath, newline='', encoding='utf-8') as origem, \
+                os.fdopen(fd, 'w', newline='', encoding='utf-8') as destino:
+            leitor = csv.reader(origem)
+            escritor = csv.writer(destino, lineterminator='\n')
+            cabecalho = next(leitor)
+            escritor.writerow(cabecalho)
+            indice_deck = [c.strip().lower() for c in cabecalho].index('deck')
+            for linha in leitor:
+                if linha[indice_deck] != nome_deck:
+                    escritor.writerow(linha)
+            if linhas is not None:
+                linhas.to_csv(destino, header=False, index=False, lineterminator='\n')
+        os.replace(tmp, filepath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _anexar_ao_csv(filepath, linhas):
+    """Acrescenta as linhas do deck (já alinhadas, ver _alinhar_colunas) ao final do CSV."""
+    # Sem quebra de linha no fim do arquivo, a primeira linha nova seria colada à última
+    falta_quebra = _falta_quebra_final(filepath)
+    with open(filepath, 'a', newline='', encoding='utf-8') as arquivo:
+        if falta_quebra:
+            arquivo.write('\n')
+        linhas.to_csv(arquivo, header=False, index=False, lineterminator='\n')
+
+
+def ingest_deck(filepath, acao, nome_deck=None, deck_csv=None, tipos=TIPOS_PADRAO):
+    """
+    Adiciona, substitui ou remove um deck do dataset, atualizando os agregados.
+
+    Os agregados gravados ao lado do CSV são usados pelo app na próxima
+    construção do snapshot (ver current_aggregates), no lugar dos rankings
+    recalculados do corpus. 'add' só acrescenta linhas ao CSV; 'replace' e
+    'remove' regravam o arquivo (ver _regravar_csv). As colunas do deck são
+    conferidas antes de qualquer alteração no CSV ou nos agregados.
+
+    Parâmetros:
+        filepath (str): CSV do dataset (ex.: todos_os_decks.csv)
+        acao (str): 'add', 'replace' ou 'remove'
+        nome_deck (str): Nome do deck (padrão: coluna Deck do deck_csv)
+        deck_csv (str): CSV com as linhas do deck, nas mesmas colunas do dataset
+
+    Retorna:
+        dict: Agregados atualizados
+    """
+    agregados = load_aggregates(filepath, tipos)
+
+    linhas_brutas = linhas = None
+    if acao in ('add', 'replace'):
+        linhas_brutas = pd.read_csv(deck_csv)
+        colunas = {c: c.strip().lower() for c in linhas_brutas.columns}
+        if nome_deck is not None:
+            linhas_brutas[next(c for c, n in colunas.items() if n == 'deck')] = nome_deck
+        linhas = clean_data(linhas_brutas.copy())
+        decks = linhas['deck'].unique()
+        if len(decks) != 1:
+            raise ValueError(f"O arquivo do deck deve conter exatamente um deck válido (encontrados: {len(decks)})")
+        nome_deck = str(decks[0])
+        linhas_brutas = _alinhar_colunas(filepath, linhas_brutas)
+
+    if acao == 'add':
+        add_deck(agregados, nome_deck, linhas)
+        _anexar_ao_csv(filepath, linhas_brutas)
+    elif acao == 'replace':
+        replace_deck(agregados, nome_deck, linhas)
+        _regravar_csv(filepath, nome_deck, linhas_brutas)
+    elif acao == 'remove':
+        remove_deck(agregados, nome_deck)
+        _regravar_csv(filepath, nome_deck)
+    else:
+        raise ValueError(f"Ação desconhecida: {acao}")
+
+    save_aggregates(agregados, filepath)
+    return agregados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão incremental de decks")
+    parser.add_argument('acao', choices=['add', 'replace', 'remove'])
+    parser.add_argument('alvo', help="CSV do deck (add/replace) ou nome do deck (remove)")
+    parser.add_argument('--dataset', default='todos_os_decks.csv', help="CSV do dataset")
+    parser.add_argument('--deck', help="Sobrescreve o nome do deck do CSV (add/replace)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.acao == 'remove':
+            agregados = ingest_deck(args.dataset, 'remove', nome_deck=args.alvo)
+        else:
+            agregados = ingest_deck(args.dataset, args.acao, nome_deck=args.deck, deck_csv=args.alvo)
+    except (KeyError, ValueError) as e:
+        print(f"Erro na ingestão: {e}")
+        return 1
+
+    print(f"Ingestão concluída: {len(agregados['decks'])} decks no dataset")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) dos histogramas de latência: de 1 ms a 10 s
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Limites (s) dos histogramas dos estágios de construção do snapshot
+BUCKETS_ETAPA = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+try:
+    _PAGINA = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGINA = 4096
+
+
+def rss_bytes():
+    """Memória residente atual do processo (Linux; None em outras plataformas)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    texto = ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares)
+    return f'{{{texto}}}'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class _Metrica:
+    """Base das métricas: uma série por combinação de valores dos rótulos."""
+
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _chave(self, valores):
+        if len(valores) != len(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}")
+        return tuple(str(v) for v in valores)
+
+    def render(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for valores, serie in series:
+            linhas.extend(self._linhas(valores, serie))
+        return linhas
+
+
+class Counter(_Metrica):
+    """Contador monotônico."""
+
+    tipo = 'counter'
+
+    def inc(self, *valores, quantidade=1):
+        chave = self._chave(valores)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + quantidade
+
+    def value(self, *valores):
+        return self._series.get(self._chave(valores), 0)
+
+    def _linhas(self, valores, total):
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_numero(total)}"]
+
+
+class Gauge(_Metrica):
+    """Valor instantâneo."""
+
+    tipo = 'gauge'
+
+    def set(self, valor, *valores):
+        chave = self._chave(valores)
+        with self._lock:
+            self._series[chave] = valor
+
+    def value(self, *valores):
+        return self._series.get(self._chave(valores))
+
+    def _linhas(self, valores, valor):
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_numero(valor)}"]
+
+
+class Histogram(_Metrica):
+    """Histograma de buckets fixos (contagens não acumuladas até a exposição)."""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor, *valores):
+        chave = self._chave(valores)
+        # Busca binária fora do lock; dentro dele só incrementos
+        posicao = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def count(self, *valores):
+        serie = self._series.get(self._chave(valores))
+        return serie[2] if serie else 0
+
+    def _linhas(self, valores, serie):
+        contagens, soma, total = serie
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + (float('inf'),), contagens):
+            acumulado += contagem
+            rotulos = _formatar_rotulos(self.rotulos, valores, ('le', _numero(limite)))
+            linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+        rotulos = _formatar_rotulos(self.rotulos, valores)
+        linhas.append(f"{self.nome}_sum{rotulos} {_numero(soma)}")
+        linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+
+class Registry:
+    """Conjunto de métricas do processo, exposto no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, classe, nome, ajuda, rotulos, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, ajuda, rotulos, **kwargs)
+            elif not isinstance(metrica, classe) or metrica.rotulos != tuple(rotulos):
+                raise ValueError(f"Métrica {nome} já registrada com outro tipo ou rótulos")
+            return metrica
+
+    def counter(self, nome, ajuda, rotulos=()):
+        return self._registrar(Counter, nome, ajuda, rotulos)
+
+    def gauge(self, nome, ajuda, rotulos=()):
+        return self._registrar(Gauge, nome, ajuda, rotulos)
+
+    def histogram(self, nome, ajuda, rotulos=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histogram, nome, ajuda, rotulos, buckets=buckets)
+
+    def render(self):
+        """Texto de exposição (text/plain; version=0.0.4) de todas as métricas."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for metrica in metricas:
+            linhas.extend(metrica.render())
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro padrão do processo (cada worker do gunicorn expõe o seu)
+REGISTRY = Registry()
+
+DURACAO_ETAPA = REGISTRY.histogram(
+    'kindred_stage_duration_seconds', "Duração dos estágios de construção do snapshot", ('etapa',),
+    buckets=BUCKETS_ETAPA)
+RSS_ETAPA = REGISTRY.gauge(
+    'kindred_stage_rss_bytes', "Memória residente do processo ao fim da última execução do estágio", ('etapa',))
+DELTA_RSS_ETAPA = REGISTRY.gauge(
+    'kindred_stage_rss_delta_bytes', "Variação da memória residente na última execução do estágio", ('etapa',))
+CACHE = REGISTRY.counter(
+    'kindred_cache_requests_total', "Consultas a caches da aplicação", ('cache', 'resultado'))
+
+
+@contextmanager
+def stage(nome, log=None):
+    """
+    Mede a duração e a variação de memória residente de um estágio.
+
+    O tempo vai para o histograma kindred_stage_duration_seconds e a memória
+    para os gauges kindred_stage_rss_*; o resumo também é registrado no log.
+    Ler a memória custa uma leitura de /proc, então é feito só nos estágios
+    de construção, nunca por requisição.
+    """
+    rss_inicio = rss_bytes()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        DURACAO_ETAPA.observe(duracao, nome)
+        rss_fim = rss_bytes()
+        if rss_fim is not None:
+            RSS_ETAPA.set(rss_fim, nome)
+            DELTA_RSS_ETAPA.set(rss_fim - rss_inicio, nome)
+            (log or logger).info("Etapa %s: %.3fs, RSS %.1f MB (%+.1f MB)", nome, duracao,
+                                 rss_fim / (1 << 20), (rss_fim - rss_inicio) / (1 << 20))
+        else:
+            (log or logger).info("Etapa %s: %.3fs", nome, duracao)
+
+
+def cache_result(cache, acerto):
+    """Conta um acerto ou falta em um cache da aplicação."""
+    CACHE.inc(cache, 'hit' if acerto else 'miss')
@@ -0,0 +1,257 @@
+import glob
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from data_processing.metrics import REGISTRY
+from data_processing.snapshot import SnapshotManager
+
+logger = logging.getLogger(__name__)
+
+# Nomes de coleção aceitos (aparecem nas URLs /c/<nome>/)
+NOME_VALIDO = re.compile(r'^[A-Za-z0-9_-]+$')
+
+CARREGADAS = REGISTRY.gauge('kindred_collections_loaded', "Coleções com snapshot em memória")
+BYTES_COLECAO = REGISTRY.gauge(
+    'kindred_collection_bytes', "Memória estimada do snapshot de cada coleção (0 se descarregada)", ('colecao',))
+DESCARTES = REGISTRY.counter('kindred_collection_evictions_total', "Coleções descarregadas para liberar memória")
+
+
+def discover_collections(especificacao):
+    """
+    Lê a configuração das coleções.
+
+    Parâmetros:
+        especificacao (str): Diretório com um CSV por coleção (o nome é o do
+                             arquivo, sem extensão) ou lista 'nome=arquivo.csv'
+                             separada por vírgulas
+
+    Retorna:
+        dict: Nome da coleção → CSV de origem
+    """
+    especificacao = (especificacao or '').strip()
+    if not especificacao:
+        return {}
+
+    if os.path.isdir(especificacao):
+        arquivos = sorted(glob.glob(os.path.join(especificacao, '*.csv')))
+        colecoes = {os.path.splitext(os.path.basename(arquivo))[0]: arquivo for arquivo in arquivos}
+    else:
+        colecoes = {}
+        for item in especificacao.split(','):
+            nome, separador, arquivo = item.strip().partition('=')
+            if not separador or not arquivo:
+                raise ValueError(f"Coleção inválida '{item}': use nome=arquivo.csv")
+            colecoes[nome.strip()] = arquivo.strip()
+    return colecoes
+
+
+def _mapeado(array):
+    """Indica se o array (ou algum array de que é vista) está mapeado de um arquivo."""
+    import mmap
+    import numpy as np
+
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def estimate_bytes(obj, _vistos=None):
+    """
+    Estima a memória ocupada por um snapshot (arrays, objetos pandas e os
+    dicionários/listas que os agrupam).
+
+    Vetores mapeados do store em disco não contam: suas páginas pertencem ao
+    cache do sistema, que as descarta sob pressão de memória.
+    """
+    import numpy as np
+    import pandas as pd
+    from scipy import sparse
+
+    vistos = set() if _vistos is None else _vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_bytes(chave, vistos) + estimate_bytes(valor, vistos)
+                                        for chave, valor in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(item, vistos) for item in obj)
+    if isinstance(obj, np.ndarray):
+        if _mapeado(obj):
+            return 0
+        if obj.dtype == object:
+            return obj.nbytes + sum(sys.getsizeof(item) for item in obj.ravel())
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return estimate_bytes(obj.index, vistos) + sum(estimate_bytes(obj[coluna], vistos) for coluna in obj.columns)
+    if isinstance(obj, pd.Series):
+        if isinstance(obj.dtype, pd.CategoricalDtype):
+            valores = estimate_bytes(obj.array.codes, vistos) + estimate_bytes(obj.cat.categories, vistos)
+        else:
+            valores = estimate_bytes(obj.to_numpy(copy=False), vistos)
+        return valores + estimate_bytes(obj.index, vistos)
+    if sparse.issparse(obj):
+        return sum(estimate_bytes(getattr(obj, atributo), vistos) for atributo in ('data', 'indices', 'indptr')
+                   if hasattr(obj, atributo))
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    return sys.getsizeof(obj)
+
+
+class Collection:
+    """Uma coleção de decks (um CSV) e o gerenciador do seu snapshot."""
+
+    def __init__(self, nome, filepath, snapshots):
+        self.nome = nome
+        self.filepath = filepath
+        self.snapshots = snapshots
+        self.ultimo_acesso = time.monotonic()
+        # Objetos do app ligados à coleção (ex.: o dashboard); descartados junto com ela
+        self.anexos = {}
+
+
+class CollectionRegistry:
+    """
+    Coleções servidas pelo app, carregadas sob demanda e descarregadas por LRU.
+
+    Cada coleção tem seu próprio SnapshotManager. A primeira consulta a uma
+    coleção dispara a construção do snapshot em segundo plano. Depois de cada
+    construção, a memória estimada dos snapshots em memória é comparada ao
+    `limite_bytes`; as coleções usadas há mais tempo são descarregadas até
+    caber. As coleções `fixas` nunca são descarregadas, nem a que acabou de
+    ser construída.
+    """
+
+    def __init__(self, colecoes, construir, vazio=None, limite_bytes=None, fixas=(), intervalo_recarga=0,
+                 log=None):
+        """
+        Parâmetros:
+            colecoes (dict): Nome → CSV de origem
+            construir (callable): Recebe (nome, filepath) e retorna o dict de dados do snapshot
+            vazio (dict): Dados usados enquanto o snapshot de uma coleção não foi construído
+            limite_bytes (int): Memória estimada máxima dos snapshots em memória (None: sem limite)
+            fixas (iterable): Coleções nunca descarregadas
+            intervalo_recarga (float): Intervalo (s) de verificação dos CSVs; 0 desativa
+            log (logging.Logger): Logger para carga e descarte de coleções
+        """
+        invalidos = [nome for nome in colecoes if not NOME_VALIDO.match(nome)]
+        if invalidos:
+            raise ValueError(f"Nomes de coleção inválidos: {', '.join(invalidos)} (use letras, números, '_' e '-')")
+
+        self.colecoes = dict(colecoes)
+        self.limite_bytes = limite_bytes
+        self.fixas = set(fixas)
+        self.intervalo_recarga = intervalo_recarga
+        self.logger = log or logger
+        self._construir = construir
+        self._vazio = vazio
+        self._lock = threading.RLock()
+        self._carregadas = {}
+        # Memória estimada do último snapshot de cada coleção (mantida após o descarte)
+        self._tamanhos = {}
+
+    def __contains__(self, nome):
+        return nome in self.colecoes
+
+    def names(self):
+        """Nomes das coleções configuradas."""
+        return list(self.colecoes)
+
+    def loaded(self):
+        """Coleções atualmente em memória."""
+        with self._lock:
+            return list(self._carregadas.values())
+
+    def estimated_bytes(self, nome):
+        """Memória estimada do último snapshot construído da coleção (None se nunca construído)."""
+        return self._tamanhos.get(nome)
+
+    def find(self, nome):
+        """Coleção em memória, sem carregá-la nem marcar o acesso (None se não está carregada)."""
+        return self._carregadas.get(nome)
+
+    def get(self, nome, carregar=True):
+        """
+        Retorna a coleção, criando-a (e disparando a construção em segundo
+        plano, se `carregar`) quando não está em memória. Levanta KeyError se
+        a coleção não está configurada.
+        """
+        if nome not in self.colecoes:
+            raise KeyError(nome)
+
+        with self._lock:
+            colecao = self._carregadas.get(nome)
+            if colecao is None:
+                # Abre espaço antes de carregar, se o tamanho da coleção já é conhecido
+                if self._tamanhos.get(nome):
+                    self._liberar(self._tamanhos[nome], preservar=nome)
+                colecao = self._abrir(nome)
+                if carregar:
+                    colecao.snapshots.reload_async(force=True)
+            colecao.ultimo_acesso = time.monotonic()
+            return colecao
+
+    def _abrir(self, nome):
+        def construir(filepath):
+            dados = self._construir(nome, filepath)
+            tamanho = estimate_bytes(dados)
+            with self._lock:
+                self._tamanhos[nome] = tamanho
+                BYTES_COLECAO.set(tamanho, nome)
+                self._liberar(0, preservar=nome)
+            return dados
+
+        snapshots = SnapshotManager(self.colecoes[nome], construir, vazio=self._vazio, log=self.logger,
+                                    escopo=nome)
+        colecao = Collection(nome, self.colecoes[nome], snapshots)
+        self._carregadas[nome] = colecao
+        CARREGADAS.set(len(self._carregadas))
+        snapshots.start_watcher(self.intervalo_recarga)
+        return colecao
+
+    def _liberar(self, necessario, preservar=None):
+        """Descarrega coleções, da menos recentemente usada, até caber `necessario` bytes a mais."""
+        if self.limite_bytes is None:
+            return
+        candidatas = sorted((c for c in self._carregadas.values()
+                             if c.nome not in self.fixas and c.nome != preservar),
+                            key=lambda c: c.ultimo_acesso)
+        for colecao in candidatas:
+            if self._em_memoria() + necessario <= self.limite_bytes:
+                return
+            self.evict(colecao.nome)
+        if self._em_memoria() + necessario > self.limite_bytes:
+            self.logger.warning("Coleções em memória (%.1f MB) acima do limite de %.1f MB",
+                                (self._em_memoria() + necessario) / (1 << 20), self.limite_bytes / (1 << 20))
+
+    def _em_memoria(self):
+        return sum(self._tamanhos.get(nome) or 0 for nome in self._carregadas)
+
+    def evict(self, nome):
+        """
+        Descarrega uma coleção. Requisições que já obtiveram o snapshot seguem
+        usando-o; a próxima consulta à coleção a carrega de novo.
+
+        Retorna:
+            bool: True se a coleção estava em memória
+        """
+        with self._lock:
+            colecao = self._carregadas.pop(nome, None)
+            if colecao is None:
+                return False
+            CARREGADAS.set(len(self._carregadas))
+            BYTES_COLECAO.set(0, nome)
+            DESCARTES.inc()
+        # Sem esperar: o observador pode estar no meio de uma construção
+        colecao.snapshots.stop_watcher(esperar=False)
+        colecao.anexos.clear()
+        self.logger.info("Coleção %s descarregada (%.1f MB estimados)", nome,
+                         (self._tamanhos.get(nome) or 0) / (1 << 20))
+        return True
@@ -0,0 +1,440 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+
+from flask_caching.backends.base import BaseCache
+
+from data_processing.metrics import CACHE
+
+try:
+    import redis
+except ImportError:  # redis é opcional; sem ele o cache compartilhado usa SQLite
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Arquivo padrão do cache SQLite, compartilhado pelos workers do mesmo usuário
+# na máquina. Fica no diretório de cache do usuário (e não em /tmp): os valores
+# são lidos com pickle, então só o dono pode poder escrever no arquivo
+CAMINHO_PADRAO = os.environ.get('KINDRED_SHARED_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'kindredwars', 'cache.sqlite')
+
+# Tamanho máximo das entradas no SQLite antes da remoção das menos usadas
+LIMITE_PADRAO = 256 * 1024 * 1024
+
+# Segundos em que uma entrada expirada ainda pode ser servida enquanto outro worker a recalcula
+GRACA_PADRAO = 60
+
+# Tempo máximo que um worker espera o valor que outro está calculando
+ESPERA_PADRAO = 10.0
+
+# Validade da trava de cálculo (libera a chave se o worker que a tinha morrer)
+TTL_TRAVA = 30.0
+
+# Intervalo entre consultas enquanto espera outro worker
+INTERVALO_ESPERA = 0.05
+
+# Acesso registrado no máximo uma vez por este intervalo (evita escrita a cada leitura)
+INTERVALO_ACESSO = 30.0
+
+
+def _verificar_dono(caminho):
+    """
+    Recusa um arquivo de cache que outro usuário possa ter escrito.
+
+    Os valores do cache são lidos com pickle: quem escreve no arquivo executa
+    código no processo que o lê. Levanta RuntimeError se o arquivo não é do
+    usuário atual ou se grupo/outros podem escrever nele (só em POSIX).
+    """
+    if os.name != 'posix':
+        return
+    info = os.stat(caminho)
+    if info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise RuntimeError(f"Cache {caminho} pode ser alterado por outros usuários; "
+                           f"use um arquivo próprio (KINDRED_SHARED_CACHE) com permissão 0600")
+
+
+class SharedCache(BaseCache, ABC):
+    """
+    Cache compartilhado entre processos, com proteção contra estouro de recálculo.
+
+    Quando uma chave falta ou expira, só o primeiro processo que a pede recebe
+    None e a recalcula (ele ganha uma trava com validade). Os demais recebem o
+    valor expirado, se ainda estiver no período de graça, ou esperam até
+    `espera` segundos pelo valor novo. O `set` do processo que calculou libera
+    a trava. Assim o `memoize` do Flask-Caching ganha a proteção sem mudanças.
+    Quem recebeu None e desiste de gravar (erro, 404...) chama `release`, senão
+    os demais esperam pelo valor até o fim da validade da trava.
+
+    As subclasses implementam só o armazenamento (_ler, _gravar, _travar...).
+    """
+
+    def __init__(self, default_timeout=300, graca=GRACA_PADRAO, espera=ESPERA_PADRAO, nome='compartilhado'):
+        super().__init__(default_timeout=default_timeout)
+        self.graca = graca
+        self.espera = espera
+        self.nome = nome
+
+    # Primitivas de armazenamento
+    @abstractmethod
+    def _ler(self, chave):
+        """Retorna (bytes, expira) ou None; expira=0 significa sem validade."""
+
+    @abstractmethod
+    def _gravar(self, chave, dados, expira, so_se_ausente=False):
+        """Grava a entrada; com `so_se_ausente`, só se não houver valor válido. True se gravou."""
+
+    @abstractmethod
+    def _apagar(self, chave):
+        """Remove a entrada; True se existia."""
+
+    @abstractmethod
+    def _limpar(self):
+        """Remove todas as entradas e travas."""
+
+    @abstractmethod
+    def _travar(self, chave):
+        """Tenta obter a trava de cálculo da chave (em nome de _dono()); True se obteve."""
+
+    @abstractmethod
+    def _destravar(self, chave):
+        """Libera a trava da chave só se ela ainda for de _dono() (pode ter expirado e passado a outro)."""
+
+    @abstractmethod
+    def _travada(self, chave):
+        """Indica se alguém tem a trava (não expirada) da chave."""
+
+    def _tocar(self, chave):
+        """Registra um acesso (para a remoção das menos usadas)."""
+
+    @staticmethod
+    def _dono():
+        """Dono das travas obtidas pela thread atual (o get e o set de um cálculo rodam na mesma thread)."""
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    # API do BaseCache
+    def _expiracao(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    def _registrar(self, resultado):
+        CACHE.inc(self.nome, resultado)
+
+    def _valor(self, chave):
+        """Valor válido (não expirado) da chave, sem travas."""
+        linha = self._ler(chave)
+        if linha is None:
+            return None, None
+        dados, expira = linha
+        agora = time.time()
+        if expira == 0 or agora < expira:
+            return pickle.loads(dados), None
+        if agora < expira + self.graca:
+            return None, dados
+        return None, None
+
+    def get(self, key):
+        valor, expirado = self._valor(key)
+        if valor is not None:
+            self._tocar(key)
+            self._registrar('hit')
+            return valor
+
+        if self._travar(key):
+            # Este processo recalcula; o set() seguinte libera a trava
+            self._registrar('miss')
+            return None
+
+        if expirado is not None:
+            # Outro processo está recalculando: serve o valor anterior
+            self._registrar('stale')
+            return pickle.loads(expirado)
+
+        limite = time.monotonic() + self.espera
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            valor, _ = self._valor(key)
+            if valor is not None:
+                self._registrar('espera')
+                return valor
+            if not self._travada(key):
+                break
+
+        # O outro processo falhou ou demorou demais: calcula também
+        self._registrar('miss')
+        return None
+
+    def get_many(self, *keys):
+        # Leitura simples, sem travas (usada pelo Flask-Caching para versões de chaves)
+        return [self._valor(chave)[0] for chave in keys]
+
+    def set(self, key, value, timeout=None):
+        try:
+            self._gravar(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiracao(timeout))
+            return True
+        finally:
+            self._destravar(key)
+
+    def release(self, key):
+        """Libera a trava de cálculo obtida no get, sem gravar valor (o cálculo falhou)."""
+        self._destravar(key)
+
+    def add(self, key, value, timeout=None):
+        return self._gravar(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiracao(timeout),
+                            so_se_ausente=True)
+
+    def delete(self, key):
+        return self._apagar(key)
+
+    def has(self, key):
+        return self._valor(key)[0] is not None
+
+    def clear(self):
+        self._limpar()
+        return True
+
+
+class SQLiteCache(SharedCache):
+    """
+    Cache compartilhado em um arquivo SQLite (modo WAL), sem serviço externo.
+
+    Serve aos workers de uma mesma máquina e sobrevive a reinícios. Quando o
+    total das entradas passa de `limite_bytes`, as expiradas e depois as
+    menos acessadas recentemente são removidas.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, limite_bytes=LIMITE_PADRAO, **kwargs):
+        super().__init__(**kwargs)
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        self._local = threading.local()
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, mode=0o700, exist_ok=True)
+        # Criado só para o dono; o SQLite cria os arquivos -wal/-shm com as mesmas permissões
+        os.close(os.open(caminho, os.O_RDWR | os.O_CREAT, 0o600))
+        _verificar_dono(caminho)
+        with self._conexao() as conexao:
+            conexao.executescript('''
+                CREATE TABLE IF NOT EXISTS entradas (
+                    chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL NOT NULL,
+                    tamanho INTEGER NOT NULL, acesso REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entradas_acesso ON entradas (acesso);
+                CREATE TABLE IF NOT EXISTS travas (chave TEXT PRIMARY KEY, dono TEXT, expira REAL NOT NULL);
+            ''')
+
+    def _conexao(self):
+        """Conexão da thread atual (refeita após fork, como nos workers do gunicorn)."""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+            self._local.acessos = {}
+        return conexao
+
+    def _ler(self, chave):
+        return self._conexao().execute('SELECT valor, expira FROM entradas WHERE chave = ?', (chave,)).fetchone()
+
+    def _tocar(self, chave):
+        agora = time.time()
+        acessos = self._local.acessos
+        if agora - acessos.get(chave, 0) < INTERVALO_ACESSO:
+            return
+        acessos[chave] = agora
+        self._conexao().execute('UPDATE entradas SET acesso = ? WHERE chave = ?', (agora, chave))
+
+    def _gravar(self, chave, dados, expira, so_se_ausente=False):
+        conexao = self._conexao()
+        agora = time.time()
+        if so_se_ausente:
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                conexao.execute('DELETE FROM entradas WHERE chave = ? AND expira != 0 AND expira <= ?',
+                                (chave, agora))
+                cursor = conexao.execute('INSERT OR IGNORE INTO entradas VALUES (?, ?, ?, ?, ?)',
+                                         (chave, dados, expira, len(dados), agora))
+                conexao.execute('COMMIT')
+            except Exception:
+                conexao.execute('ROLLBACK')
+                raise
+            gravou = cursor.rowcount == 1
+        else:
+            conexao.execute('INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?)',
+                            (chave, dados, expira, len(dados), agora))
+            gravou = True
+        if gravou:
+            self._evict()
+        return gravou
+
+    def _evict(self):
+        """Remove entradas vencidas e, se preciso, as menos usadas até ~90% do limite."""
+        conexao = self._conexao()
+        total = conexao.execute('SELECT COALESCE(SUM(tamanho), 0) FROM entradas').fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+
+        conexao.execute('DELETE FROM entradas WHERE expira != 0 AND expira + ? < ?', (self.graca, time.time()))
+        total = conexao.execute('SELECT COALESCE(SUM(tamanho), 0) FROM entradas').fetchone()[0]
+        excesso = total - int(self.limite_bytes * 0.9)
+        if excesso <= 0:
+            return
+
+        remover = []
+        for chave, tamanho in conexao.execute('SELECT chave, tamanho FROM entradas ORDER BY acesso'):
+            remover.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        conexao.executemany('DELETE FROM entradas WHERE chave = ?', remover)
+        CACHE.inc(self.nome, 'evict', quantidade=len(remover))
+
+    def _apagar(self, chave):
+        return self._conexao().execute('DELETE FROM entradas WHERE chave = ?', (chave,)).rowcount > 0
+
+    def _limpar(self):
+        self._conexao().executescript('DELETE FROM entradas; DELETE FROM travas;')
+
+    def _travar(self, chave):
+        conexao = self._conexao()
+        agora = time.time()
+        conexao.execute('BEGIN IMMEDIATE')
+        try:
+            conexao.execute('DELETE FROM travas WHERE chave = ? AND expira < ?', (chave, agora))
+            cursor = conexao.execute('INSERT OR IGNORE INTO travas VALUES (?, ?, ?)',
+                                     (chave, self._dono(), agora + TTL_TRAVA))
+            conexao.execute('COMMIT')
+        except Exception:
+            conexao.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def _destravar(self, chave):
+        self._conexao().execute('DELETE FROM travas WHERE chave = ? AND dono = ?', (chave, self._dono()))
+
+    def _travada(self, chave):
+        return self._conexao().execute('SELECT 1 FROM travas WHERE chave = ? AND expira >= ?',
+                                       (chave, time.time())).fetchone() is not None
+
+
+# Apaga a trava só se o valor (dono) for o informado
+DESTRAVAR_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCache(SharedCache):
+    """
+    Cache compartilhado no Redis, para workers em máquinas diferentes.
+
+    A remoção por tamanho fica a cargo do Redis (maxmemory + allkeys-lru);
+    as entradas vivem no Redis até o fim do período de graça.
+    """
+
+    def __init__(self, url, prefixo='kindred:', **kwargs):
+        if redis is None:
+            raise RuntimeError("O pacote redis não está instalado")
+        super().__init__(**kwargs)
+        self._redis = redis.Redis.from_url(url)
+        self.prefixo = prefixo
+        self._destravar_se_dono = self._redis.register_script(DESTRAVAR_LUA)
+
+    def _ler(self, chave):
+        linha = self._redis.hmget(self.prefixo + chave, 'valor', 'expira')
+        if linha[0] is None:
+            return None
+        return linha[0], float(linha[1])
+
+    def _gravar(self, chave, dados, expira, so_se_ausente=False):
+        nome = self.prefixo + chave
+        if so_se_ausente and self._valor(chave)[0] is not None:
+            return False
+        with self._redis.pipeline() as pipe:
+            pipe.delete(nome)
+            pipe.hset(nome, mapping={'valor': dados, 'expira': expira})
+            if expira:
+                pipe.expireat(nome, int(expira + self.graca) + 1)
+            pipe.execute()
+        return True
+
+    def _apagar(self, chave):
+        return self._redis.delete(self.prefixo + chave) > 0
+
+    def _limpar(self):
+        for nome in self._redis.scan_iter(f"{self.prefixo}*"):
+            self._redis.delete(nome)
+
+    def _travar(self, chave):
+        return bool(self._redis.set(f"{self.prefixo}trava:{chave}", self._dono(), nx=True,
+                                    px=int(TTL_TRAVA * 1000)))
+
+    def _destravar(self, chave):
+        # Comparar e apagar em um passo só (script Lua, atômico no Redis)
+        self._destravar_se_dono(keys=[f"{self.prefixo}trava:{chave}"], args=[self._dono()])
+
+    def _travada(self, chave):
+        return self._redis.exists(f"{self.prefixo}trava:{chave}") > 0
+
+
+def memoize(cache, **opcoes):
+    """
+    `cache.memoize(**opcoes)` que libera a trava de cálculo quando a função falha.
+
+    O memoize do Flask-Caching só grava (e assim libera a trava do get) quando
+    a função retorna; se ela levanta uma exceção, a chave ficaria travada por
+    TTL_TRAVA e cada chamada igual esperaria `espera` segundos antes de falhar
+    de novo. Caches sem trava (SimpleCache...) não são afetados.
+    """
+    def decorador(funcao):
+        memoizada = cache.memoize(**opcoes)(funcao)
+
+        @wraps(funcao)
+        def chamar(*args, **kwargs):
+            try:
+                return memoizada(*args, **kwargs)
+            except Exception:
+                liberar = getattr(cache.cache, 'release', None)
+                if liberar is not None:
+                    liberar(memoizada.make_cache_key(funcao, *args, **kwargs))
+                raise
+
+        chamar.uncached = memoizada.uncached
+        chamar.make_cache_key = memoizada.make_cache_key
+        return chamar
+
+    return decorador
+
+
+def shared_cache(app, config, args, kwargs):
+    """
+    Fábrica para CACHE_TYPE = 'data_processing.shared_cache.shared_cache'.
+
+    Usa o Redis de CACHE_REDIS_URL quando configurado e disponível; senão o
+    arquivo SQLite de CACHE_SHARED_PATH. Outras opções: CACHE_MAX_BYTES
+    (limite do SQLite), CACHE_STALE_TIMEOUT (graça) e CACHE_LOCK_WAIT (espera).
+    """
+    opcoes = dict(
+        default_timeout=kwargs.get('default_timeout', config.get('CACHE_DEFAULT_TIMEOUT', 300)),
+        graca=config.get('CACHE_STALE_TIMEOUT', GRACA_PADRAO),
+        espera=config.get('CACHE_LOCK_WAIT', ESPERA_PADRAO),
+    )
+
+    url = config.get('CACHE_REDIS_URL')
+    if url:
+        if redis is not None:
+            return RedisCache(url, prefixo=config.get('CACHE_KEY_PREFIX') or 'kindred:', **opcoes)
+        logger.warning("CACHE_REDIS_URL definido mas o pacote redis não está instalado; usando SQLite")
+
+    return SQLiteCache(config.get('CACHE_SHARED_PATH') or CAMINHO_PADRAO,
+                       limite_bytes=config.get('CACHE_MAX_BYTES', LIMITE_PADRAO), **opcoes)
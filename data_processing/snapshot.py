@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from data_processing.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RECARGAS = REGISTRY.counter('kindred_snapshot_reloads_total', "Reconstruções do snapshot", ('resultado',))
+DURACAO_RECARGA = REGISTRY.gauge('kindred_snapshot_build_seconds', "Duração da última reconstrução publicada")
+
+
+def source_signature(filepath):
+    """Assinatura do CSV de origem (importa o data_store, e o pandas, só quando usada)."""
+    from data_processing.data_store import source_signature
+    return source_signature(filepath)
+
+
+def persisted_path(filepath):
+    """Arquivo da análise pré-calculada correspondente a um CSV."""
+    base, _ = os.path.splitext(filepath)
+    return f"{base}.snapshot.pkl"
+
+
+def save_persisted(filepath, dados, assinatura, versao_codigo):
+    """
+    Grava dados pré-calculados do snapshot (análise, cubo...) ao lado do CSV.
+
+    A gravação é atômica (arquivo temporário + troca); falhas só são registradas.
+
+    Parâmetros:
+        dados (dict): Objetos serializáveis com pickle
+        assinatura (dict): Assinatura do CSV usado no cálculo
+        versao_codigo (str): Identifica o código e os parâmetros que geraram os dados
+    """
+    destino = persisted_path(filepath)
+    try:
+        fd, tmp = tempfile.mkstemp(prefix='.snapshot-', dir=os.path.dirname(os.path.abspath(destino)))
+        with os.fdopen(fd, 'wb') as arquivo:
+            pickle.dump({'assinatura': assinatura, 'versao_codigo': versao_codigo, 'dados': dados},
+                        arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, destino)
+    except Exception as e:
+        logger.warning("Não foi possível gravar %s: %s", destino, e)
+
+
+def load_persisted(filepath, assinatura, versao_codigo):
+    """
+    Lê os dados pré-calculados se forem do mesmo CSV e da mesma versão do código.
+
+    Retorna:
+        dict: Os dados gravados por save_persisted, ou None se ausentes/desatualizados
+    """
+    origem = persisted_path(filepath)
+    try:
+        with open(origem, 'rb') as arquivo:
+            conteudo = pickle.load(arquivo)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignorando %s ilegível: %s", origem, e)
+        return None
+    if conteudo.get('assinatura') != assinatura or conteudo.get('versao_codigo') != versao_codigo:
+        return None
+    return conteudo['dados']
+
+
+def snapshot_version(assinatura, escopo=None):
+    """
+    Versão de um snapshot: hash da assinatura do CSV, igual entre workers.
+
+    O `escopo` (ex.: o nome da coleção) separa CSVs distintos com a mesma
+    assinatura (tamanho e mtime), que de outro modo dividiriam chaves de cache.
+    """
+    chave = repr(sorted((assinatura or {}).items()))
+    if escopo is not None:
+        chave = f"{escopo}:{chave}"
+    return hashlib.sha1(chave.encode()).hexdigest()[:12]
+
+
+class SnapshotManager:
+    """
+    Mantém o snapshot de análise atual e o reconstrói fora do caminho das requisições.
+
+    O snapshot é um dicionário imutável, trocado por atribuição de referência:
+    uma requisição que já obteve o snapshot via `current()` continua usando-o
+    até o fim, mesmo que um novo seja publicado no meio. Falhas na
+    reconstrução são registradas e o snapshot anterior continua em uso.
+
+    Cada snapshot recebe:
+        geracao (int): contador crescente dentro do processo
+        versao (str): hash da assinatura do CSV, igual entre workers, usado
+                      para versionar chaves de cache
+    """
+
+    def __init__(self, filepath, construir, vazio=None, log=None, escopo=None):
+        """
+        Parâmetros:
+            filepath (str): CSV de origem observado
+            construir (callable): Recebe o filepath e retorna o dict de dados do snapshot
+            vazio (dict): Dados usados enquanto nenhum snapshot foi construído
+            log (logging.Logger): Logger para eventos de reconstrução
+            escopo (str): Incluído na versão dos snapshots (ver snapshot_version)
+        """
+        self.filepath = filepath
+        self.escopo = escopo
+        self.logger = log or logger
+        self._construir = construir
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._parar = threading.Event()
+        self._snapshot = dict(vazio or {}, geracao=0, versao='vazio', origem=None)
+        # Mensagem da última reconstrução que falhou (None após um sucesso)
+        self.ultimo_erro = None
+
+    def current(self):
+        """Retorna o snapshot publicado (leitura atômica da referência)."""
+        return self._snapshot
+
+    def ready(self):
+        """Indica se algum snapshot já foi publicado."""
+        return self._snapshot['geracao'] > 0
+
+    def _assinatura(self):
+        try:
+            return source_signature(self.filepath)
+        except OSError:
+            return None
+
+    def is_stale(self):
+        """Indica se o CSV mudou desde o snapshot atual."""
+        return self._assinatura() != self._snapshot['origem']
+
+    def reload(self, force=False):
+        """
+        Reconstrói e publica um novo snapshot se o CSV mudou (ou se `force`).
+
+        Só uma reconstrução roda por vez; chamadas concorrentes retornam
+        imediatamente sem reconstruir.
+
+        Retorna:
+            bool: True se um novo snapshot foi publicado
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            assinatura = self._assinatura()
+            if not force and assinatura == self._snapshot['origem']:
+                return False
+
+            inicio = time.perf_counter()
+            dados = self._construir(self.filepath)
+            versao = snapshot_version(assinatura, self.escopo)
+            novo = dict(dados, geracao=self._snapshot['geracao'] + 1, versao=versao, origem=assinatura)
+
+            self._snapshot = novo
+            self.ultimo_erro = None
+            RECARGAS.inc('ok')
+            DURACAO_RECARGA.set(time.perf_counter() - inicio)
+            self.logger.info("Snapshot %s (versão %s) publicado em %.2fs",
+                             novo['geracao'], versao, time.perf_counter() - inicio)
+            return True
+        except Exception as e:
+            self.ultimo_erro = f"{type(e).__name__}: {e}"
+            RECARGAS.inc('erro')
+            self.logger.exception("Erro ao reconstruir snapshot de %s", self.filepath)
+            return False
+        finally:
+            self._lock.release()
+
+    def reload_async(self, force=False):
+        """Dispara `reload` em uma thread de fundo e retorna a thread."""
+        thread = threading.Thread(target=self.reload, kwargs={'force': force},
+                                  name='snapshot-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def start_watcher(self, intervalo=30):
+        """Inicia uma thread daemon que verifica o CSV a cada `intervalo` segundos."""
+        if self._watcher is not None or not intervalo:
+            return
+
+        def observar():
+            while not self._parar.wait(intervalo):
+                if self.is_stale():
+                    self.reload()
+
+        self._watcher = threading.Thread(target=observar, name='snapshot-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self, esperar=True):
+        """Interrompe a thread de observação, se houver (com `esperar`, aguarda seu término)."""
+        self._parar.set()
+        if self._watcher is not None and esperar:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+
+# Vocabulário das linhas de tipo (regras do Magic, 205.3 e 205.4)
+SUPERTIPOS = ('Basic', 'Legendary', 'Ongoing', 'Snow', 'World', 'Elite', 'Host')
+TIPOS_CARTA = ('Artifact', 'Battle', 'Conspiracy', 'Creature', 'Dungeon', 'Enchantment', 'Instant', 'Kindred',
+               'Land', 'Phenomenon', 'Plane', 'Planeswalker', 'Scheme', 'Sorcery', 'Tribal', 'Vanguard')
+
+# Separadores de faces (cartas divididas, aventuras, dupla face) e de subtipos
+SEPARADOR_FACES = '//'
+SEPARADOR_SUBTIPOS = '—'
+
+# Subtipos exclusivos de cada tipo de carta (regras do Magic, 205.3g a 205.3k); os
+# demais são de criatura (também usados por Kindred) ou de planeswalker
+_TIPOS_DE_MAGIA = ('Adventure', 'Arcane', 'Lesson', 'Omen', 'Trap')
+SUBTIPOS_POR_TIPO = {
+    'Land': ('Cave', 'Desert', 'Forest', 'Gate', 'Island', 'Lair', 'Locus', 'Mine', 'Mountain', 'Plains',
+             'Planet', 'Power-Plant', 'Sphere', 'Swamp', 'Tower', 'Town', "Urza's"),
+    'Artifact': ('Attraction', 'Blood', 'Bobblehead', 'Clue', 'Contraption', 'Equipment', 'Food',
+                 'Fortification', 'Gold', 'Incubator', 'Infinity', 'Junk', 'Lander', 'Map', 'Powerstone',
+                 'Spacecraft', 'Stone', 'Treasure', 'Vehicle'),
+    'Enchantment': ('Aura', 'Background', 'Cartouche', 'Case', 'Class', 'Curse', 'Role', 'Room', 'Rune', 'Saga',
+                    'Shard', 'Shrine'),
+    'Instant': _TIPOS_DE_MAGIA,
+    'Sorcery': _TIPOS_DE_MAGIA,
+    'Battle': ('Siege',),
+}
+_DONOS_SUBTIPO = {}
+for _tipo, _subtipos in SUBTIPOS_POR_TIPO.items():
+    for _subtipo in _subtipos:
+        _DONOS_SUBTIPO.setdefault(_subtipo, set()).add(_tipo)
+_DONOS_PADRAO = {'Creature', 'Kindred', 'Tribal', 'Planeswalker'}
+
+# Bit de cada tipo de carta em mascara_tipos
+BIT_TIPO = {tipo: 1 << bit for bit, tipo in enumerate(TIPOS_CARTA)}
+
+_VOCABULARIO_TIPO = set(SUPERTIPOS) | set(TIPOS_CARTA)
+
+
+def _faces(texto):
+    """Divide um texto nas faces separadas por '//' (vazio para ausente)."""
+    if texto is None or pd.isna(texto):
+        return []
+    return [face.strip() for face in str(texto).split(SEPARADOR_FACES)]
+
+
+def _linha_completa(texto):
+    """Indica se o texto é a linha de tipo inteira de uma face, e não só seus subtipos."""
+    palavras = texto.split()
+    return SEPARADOR_SUBTIPOS in texto or (bool(palavras) and all(p in _VOCABULARIO_TIPO for p in palavras))
+
+
+def _face(texto):
+    """Supertipos, tipos e subtipos de uma linha de tipo ('Legendary Creature — Elf Druid')."""
+    tipos, _, subtipos = texto.partition(SEPARADOR_SUBTIPOS)
+    palavras = tipos.split()
+    return {
+        'supertipos': [p for p in palavras if p in SUPERTIPOS],
+        'tipos': [p for p in palavras if p in TIPOS_CARTA],
+        'subtipos': subtipos.split(),
+    }
+
+
+def _face_do_subtipo(subtipo, faces):
+    """Índice da primeira face cujos tipos admitem o subtipo (a primeira face se nenhuma admite)."""
+    donos = _DONOS_SUBTIPO.get(subtipo, _DONOS_PADRAO)
+    for i, face in enumerate(faces):
+        if donos.intersection(face['tipos']):
+            return i
+    return 0
+
+
+def _unicos(listas):
+    """Concatena listas sem repetir itens, na ordem de aparição."""
+    return tuple(dict.fromkeys(item for lista in listas for item in lista))
+
+
+def parse_type_line(tipo, subtipo=None):
+    """
+    Decompõe a linha de tipo de uma carta.
+
+    As faces vêm separadas por '//' nas duas colunas do dataset. Em `tipo`
+    cada face traz supertipos e tipos ('Legendary Enchantment // Legendary
+    Land'); em `subtipo`, os subtipos da face correspondente ou, para faces
+    que não aparecem em `tipo` (aventuras, verso de cartas transformáveis),
+    a linha completa da face ('Ogre // Sorcery — Adventure'). Quando `tipo`
+    tem várias faces e `subtipo` uma só ('Artifact // Sorcery' e
+    'Adventure'), cada subtipo vai para a face cujo tipo o admite; subtipos
+    escritos na própria face de `tipo` ('Land // Creature — Demon') ficam nela.
+
+    Parâmetros:
+        tipo (str): Coluna Tipo
+        subtipo (str): Coluna Subtipo
+
+    Retorna:
+        dict: 'supertipos', 'tipos' e 'subtipos' da carta (todas as faces, sem
+              repetição) e 'faces' (lista com os três campos de cada face)
+    """
+    faces_tipo, faces_subtipo = _faces(tipo), _faces(subtipo)
+
+    faces = []
+    if len(faces_tipo) > 1 and len(faces_subtipo) == 1 and not _linha_completa(faces_subtipo[0]):
+        # Subtipos sem separação por face: cada um vai para a face do seu tipo
+        faces = [_face(texto) for texto in faces_tipo]
+        for subtipo in faces_subtipo[0].split():
+            face = faces[_face_do_subtipo(subtipo, faces)]
+            if subtipo not in face['subtipos']:
+                face['subtipos'].append(subtipo)
+    else:
+        for i in range(max(len(faces_tipo), len(faces_subtipo))):
+            face = _face(faces_tipo[i] if i < len(faces_tipo) else '')
+            texto_subtipo = faces_subtipo[i] if i < len(faces_subtipo) else ''
+            if _linha_completa(texto_subtipo):
+                verso = _face(texto_subtipo)
+                if face['tipos'] or face['supertipos']:
+                    # A face já tem tipo próprio: o texto descreve outra face
+                    faces.append(face)
+                    face = verso
+                else:
+                    face = {chave: face[chave] + verso[chave] for chave in face}
+            else:
+                # Mantém os subtipos escritos na própria face de `tipo`
+                face['subtipos'] = list(dict.fromkeys(face['subtipos'] + texto_subtipo.split()))
+            faces.append(face)
+
+    return {
+        'supertipos': _unicos(face['supertipos'] for face in faces),
+        'tipos': _unicos(face['tipos'] for face in faces),
+        'subtipos': _unicos(face['subtipos'] for face in faces),
+        'faces': faces,
+    }
+
+
+def type_mask(tipos):
+    """Máscara de bits (BIT_TIPO) de uma sequência de tipos de carta."""
+    mascara = 0
+    for tipo in tipos:
+        mascara |= BIT_TIPO.get(tipo, 0)
+    return mascara
+
+
+def build_inverted_index(grupo, termos_por_grupo, termos):
+    """
+    Índice invertido termo → linhas, no formato CSR.
+
+    As linhas de um termo são linhas[offsets[t]:offsets[t + 1]], em ordem
+    crescente. Cada linha pertence a um grupo (ex.: o par tipo/subtipo
+    distinto da linha) e cada grupo tem uma lista de termos, então o índice
+    é montado com fatias das linhas de cada grupo, sem varrer o texto.
+
+    Parâmetros:
+        grupo (np.ndarray): Grupo de cada linha
+        termos_por_grupo (list): Para cada grupo, as posições dos seus termos em `termos`
+        termos (list): Vocabulário do índice
+
+    Retorna:
+        dict: 'termos' (pd.Index), 'offsets' e 'linhas'
+    """
+    por_grupo = np.argsort(grupo, kind='stable')
+    inicio = np.concatenate([[0], np.cumsum(np.bincount(grupo, minlength=len(termos_por_grupo)))])
+
+    grupos_por_termo = [[] for _ in termos]
+    for g, posicoes in enumerate(termos_por_grupo):
+        for t in posicoes:
+            grupos_por_termo[t].append(g)
+
+    blocos, tamanhos = [], []
+    for grupos in grupos_por_termo:
+        linhas = np.sort(np.concatenate([por_grupo[inicio[g]:inicio[g + 1]] for g in grupos])) if grupos \
+            else np.empty(0, dtype=por_grupo.dtype)
+        blocos.append(linhas)
+        tamanhos.append(len(linhas))
+
+    return {
+        'termos': pd.Index(list(termos), dtype=object),
+        'offsets': np.concatenate([[0], np.cumsum(tamanhos)]).astype(np.int64),
+        'linhas': (np.concatenate(blocos) if blocos else np.empty(0)).astype(np.int32),
+    }
+
+
+def lookup(indice, termos):
+    """
+    Linhas (ordenadas, sem repetição) que têm algum dos `termos` em um índice invertido.
+
+    Termos ausentes do vocabulário são ignorados.
+    """
+    if isinstance(termos, str):
+        termos = [termos]
+    posicoes = indice['termos'].get_indexer(list(termos))
+    blocos = [indice['linhas'][indice['offsets'][t]:indice['offsets'][t + 1]] for t in posicoes if t >= 0]
+    if not blocos:
+        return np.empty(0, dtype=np.int32)
+    if len(blocos) == 1:
+        return np.asarray(blocos[0])
+    return np.unique(np.concatenate(blocos))
+
+
+def parse_type_columns(tipo, subtipo):
+    """
+    Decompõe as colunas tipo/subtipo de todas as linhas.
+
+    Cada par (tipo, subtipo) distinto é analisado uma única vez e o resultado
+    é propagado às linhas pelos códigos do par.
+
+    Parâmetros:
+        tipo (pd.Series): Coluna tipo (texto)
+        subtipo (pd.Series): Coluna subtipo (texto)
+
+    Retorna:
+        dict: Colunas 'supertipos', 'tipos_carta' e 'subtipos' (pd.Categorical
+              com os termos separados por espaço), 'faces' (int8),
+              'mascara_tipos' (int32, ver BIT_TIPO) e os índices invertidos
+              'indices' {'tipos': ..., 'subtipos': ...}
+    """
+    codigo_tipo, valores_tipo = pd.factorize(tipo)
+    codigo_subtipo, valores_subtipo = pd.factorize(subtipo)
+
+    # Código do par; -1 (ausente) vira 0
+    chave = (codigo_tipo.astype(np.int64) + 1) * (len(valores_subtipo) + 1) + (codigo_subtipo + 1)
+    pares, grupo = np.unique(chave, return_inverse=True)
+
+    analisados = []
+    for par in pares.tolist():
+        i, j = divmod(par, len(valores_subtipo) + 1)
+        analisados.append(parse_type_line(valores_tipo[i - 1] if i else None,
+                                          valores_subtipo[j - 1] if j else None))
+
+    def coluna(campo):
+        # Termos separados por espaço; sem nenhum termo o valor fica ausente
+        textos = [' '.join(resultado[campo]) for resultado in analisados]
+        categorias = sorted(set(textos) - {''})
+        posicao = {texto: i for i, texto in enumerate(categorias)}
+        codigos = np.array([posicao.get(texto, -1) for texto in textos], dtype=np.int32)
+        return pd.Categorical.from_codes(codigos[grupo], categories=categorias)
+
+    vocabulario_subtipos = sorted({s for resultado in analisados for s in resultado['subtipos']})
+    posicao_subtipo = {s: i for i, s in enumerate(vocabulario_subtipos)}
+    posicao_tipo = {t: i for i, t in enumerate(TIPOS_CARTA)}
+
+    return {
+        'supertipos': coluna('supertipos'),
+        'tipos_carta': coluna('tipos'),
+        'subtipos': coluna('subtipos'),
+        'faces': np.array([len(r['faces']) for r in analisados], dtype=np.int8)[grupo],
+        'mascara_tipos': np.array([type_mask(r['tipos']) for r in analisados], dtype=np.int32)[grupo],
+        'indices': {
+            'tipos': build_inverted_index(grupo, [[posicao_tipo[t] for t in r['tipos']] for r in analisados],
+                                          TIPOS_CARTA),
+            'subtipos': build_inverted_index(grupo, [[posicao_subtipo[s] for s in r['subtipos']]
+                                                     for r in analisados], vocabulario_subtipos),
+        },
+    }
@@ -0,0 +1,218 @@
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from scryfall.client import ScryfallClient
+from scryfall.prints import image_uris, select_prints
+
+# Tamanho dos blocos lidos do arquivo e das inserções em lote no índice
+TAMANHO_BLOCO = 1 << 20
+TAMANHO_LOTE = 5000
+
+# Limite de parâmetros por consulta IN (...) no SQLite
+LOTE_CONSULTA = 500
+
+
+def normalize_name(nome):
+    """Chave de busca de um nome de carta (sem diferença de caixa/espaços)."""
+    return ' '.join(nome.split()).casefold()
+
+
+def iter_json_array(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Itera sobre os objetos de um array JSON de nível superior sem carregá-lo todo.
+
+    O arquivo é lido em blocos; cada objeto completo no buffer é decodificado
+    e descartado, então a memória fica limitada a um bloco mais o maior objeto.
+    """
+    decodificador = json.JSONDecoder()
+    buffer = ''
+    posicao = 0
+    inicio_lido = False
+    fim = False
+
+    while True:
+        # Pula espaços e separadores entre os objetos
+        while posicao < len(buffer) and buffer[posicao] in ' \t\r\n,':
+            posicao += 1
+        if not inicio_lido and posicao < len(buffer):
+            if buffer[posicao] != '[':
+                raise ValueError("O arquivo não contém um array JSON")
+            inicio_lido = True
+            posicao += 1
+            continue
+        if inicio_lido and posicao < len(buffer) and buffer[posicao] == ']':
+            return
+
+        objeto = None
+        if posicao < len(buffer):
+            try:
+                objeto, posicao = decodificador.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if fim:
+                    raise
+        if objeto is not None:
+            yield objeto
+            continue
+
+        if fim:
+            if inicio_lido and posicao >= len(buffer):
+                raise ValueError("Array JSON incompleto")
+            return
+
+        bloco = arquivo.read(tamanho_bloco)
+        fim = not bloco
+        buffer = buffer[posicao:] + bloco
+        posicao = 0
+
+
+def _abrir(caminho):
+    if caminho.endswith('.gz'):
+        return gzip.open(caminho, 'rt', encoding='utf-8')
+    return open(caminho, encoding='utf-8')
+
+
+def download_bulk(destino, tipo='default_cards', cliente=None):
+    """
+    Baixa um arquivo de bulk data da Scryfall direto para disco.
+
+    Parâmetros:
+        destino (str): Arquivo de saída
+        tipo (str): Tipo do bulk data ('default_cards', 'all_cards'...)
+
+    Retorna:
+        str: Caminho do arquivo salvo
+    """
+    cliente = cliente or ScryfallClient()
+    metadados = cliente.get_json(f"/bulk-data/{tipo.replace('_', '-')}")
+    if metadados is None or 'download_uri' not in metadados:
+        raise RuntimeError(f"Bulk data '{tipo}' não encontrado")
+    if not cliente.stream_to_file(metadados['download_uri'], destino):
+        raise RuntimeError(f"Erro ao baixar {metadados['download_uri']}")
+    return destino
+
+
+def _linhas_indice(carta):
+    """Linhas do índice para uma impressão (nome completo e, em cartas de duas faces, cada face)."""
+    uris = image_uris(carta)
+    nomes = {carta['name']}
+    nomes.update(face['name'] for face in carta.get('card_faces') or [] if 'name' in face)
+    valores = (carta['name'], carta['id'], carta.get('released_at', ''),
+               int(carta.get('digital', True)), int(carta.get('variation', True)), int(carta.get('promo', True)),
+               uris.get('png'), uris.get('art_crop'))
+    return [(normalize_name(nome),) + valores for nome in nomes]
+
+
+def build_index(caminho_json, caminho_db):
+    """
+    Cria o índice local nome -> impressões a partir de um dump de bulk data.
+
+    O dump é lido em streaming e inserido em lotes; só os campos usados na
+    escolha das impressões e nas URLs de imagem são guardados.
+
+    Retorna:
+        int: Número de impressões indexadas
+    """
+    fd, tmp = tempfile.mkstemp(prefix='.indice-', suffix='.sqlite', dir=os.path.dirname(os.path.abspath(caminho_db)))
+    os.close(fd)
+    total = 0
+    try:
+        with sqlite3.connect(tmp) as conexao:
+            conexao.execute('''
+                CREATE TABLE impressoes (
+                    chave TEXT NOT NULL, nome TEXT NOT NULL, id TEXT NOT NULL, released_at TEXT,
+                    digital INTEGER, variation INTEGER, promo INTEGER, png TEXT, art_crop TEXT
+                )''')
+            lote = []
+            with _abrir(caminho_json) as arquivo:
+                for carta in iter_json_array(arquivo):
+                    if 'name' not in carta or 'id' not in carta:
+                        continue
+                    lote.extend(_linhas_indice(carta))
+                    total += 1
+                    if len(lote) >= TAMANHO_LOTE:
+                        conexao.executemany('INSERT INTO impressoes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', lote)
+                        lote = []
+            if lote:
+                conexao.executemany('INSERT INTO impressoes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', lote)
+            conexao.execute('CREATE INDEX idx_impressoes_chave ON impressoes (chave)')
+        os.replace(tmp, caminho_db)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return total
+
+
+class BulkIndex:
+    """Consulta ao índice local de impressões criado por build_index."""
+
+    def __init__(self, caminho_db):
+        if not os.path.exists(caminho_db):
+            raise FileNotFoundError(caminho_db)
+        # Somente leitura; a conexão pode ser usada por várias threads
+        self._conexao = sqlite3.connect(f"file:{caminho_db}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self._conexao.close()
+
+    def prints(self, nomes):
+        """
+        Busca as impressões de vários nomes de uma só vez.
+
+        Retorna:
+            dict: nome pedido -> lista de impressões (no formato da API)
+        """
+        chaves = {}
+        for nome in nomes:
+            chaves.setdefault(normalize_name(nome), []).append(nome)
+
+        resultado = {nome: [] for nome in nomes}
+        lista = list(chaves)
+        for inicio in range(0, len(lista), LOTE_CONSULTA):
+            lote = lista[inicio:inicio + LOTE_CONSULTA]
+            consulta = ('SELECT chave, nome, id, released_at, digital, variation, promo, png, art_crop '
+                        f"FROM impressoes WHERE chave IN ({', '.join('?' * len(lote))})")
+            for chave, nome, id_, lancamento, digital, variation, promo, png, art_crop in \
+                    self._conexao.execute(consulta, lote):
+                carta = {
+                    'name': nome, 'id': id_, 'released_at': lancamento,
+                    'digital': bool(digital), 'variation': bool(variation), 'promo': bool(promo),
+                    'image_uris': {k: v for k, v in (('png', png), ('art_crop', art_crop)) if v},
+                }
+                for pedido in chaves[chave]:
+                    resultado[pedido].append(carta)
+        return resultado
+
+    def resolve(self, nomes):
+        """
+        Escolhe localmente a impressão mais antiga e a mais recente de cada nome.
+
+        Retorna:
+            dict: nome -> (mais_antiga, mais_recente), ou None se não houver versão válida
+        """
+        return {nome: select_prints(cartas) for nome, cartas in self.prints(nomes).items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice local de impressões a partir do bulk data da Scryfall")
+    parser.add_argument('json', help="Arquivo de bulk data (.json ou .json.gz)")
+    parser.add_argument('indice', help="Arquivo SQLite de saída")
+    parser.add_argument('--baixar', metavar='TIPO', nargs='?', const='default_cards',
+                        help="Baixa o bulk data antes de indexar (padrão: default_cards)")
+    args = parser.parse_args(argv)
+
+    if args.baixar:
+        print(f"Baixando bulk data '{args.baixar}' para {args.json}...")
+        download_bulk(args.json, args.baixar)
+
+    total = build_index(args.json, args.indice)
+    print(f"{total} impressões indexadas em {args.indice}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Diretório padrão do cache (pode ser trocado por KINDRED_CACHE_DIR)
+DIRETORIO_PADRAO = os.environ.get(
+    'KINDRED_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'kindredwars', 'scryfall'))
+
+# Limite padrão de espaço em disco ocupado pelos objetos
+LIMITE_PADRAO = 2 * 1024 ** 3
+
+# Tempo (s) em que um JSON da API é usado sem revalidar
+TTL_METADADOS = 24 * 3600
+
+# Número de alterações no índice antes de regravá-lo em disco
+ALTERACOES_POR_GRAVACAO = 50
+
+
+class ScryfallCache:
+    """
+    Cache local, endereçado por conteúdo, de JSON e imagens da Scryfall.
+
+    Os bytes ficam em objects/<ab>/<sha256>, de modo que conteúdos iguais são
+    guardados uma só vez. O índice (index.json) mapeia cada chave, a URL
+    requisitada, para o hash do conteúdo, ETag/Last-Modified e o último
+    acesso. Quando o total passa de `limite_bytes`, as entradas menos usadas
+    recentemente são removidas (LRU).
+
+    JSON da API é revalidado com GET condicional depois de `ttl_metadados`;
+    imagens são tratadas como imutáveis (as URLs da Scryfall mudam quando a
+    imagem muda), a menos que `revalidar=True`.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, limite_bytes=LIMITE_PADRAO, ttl_metadados=TTL_METADADOS):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.ttl_metadados = ttl_metadados
+        self._objetos = os.path.join(diretorio, 'objects')
+        self._arquivo_indice = os.path.join(diretorio, 'index.json')
+        self._lock = threading.RLock()
+        self._alteracoes = 0
+        os.makedirs(self._objetos, exist_ok=True)
+
+        try:
+            with open(self._arquivo_indice, encoding='utf-8') as arquivo:
+                self._indice = json.load(arquivo)
+        except (OSError, ValueError):
+            self._indice = {}
+
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Índice e objetos
+    # ------------------------------------------------------------------
+
+    def _caminho_objeto(self, sha256):
+        return os.path.join(self._objetos, sha256[:2], sha256)
+
+    def _registrar_alteracao(self):
+        self._alteracoes += 1
+        if self._alteracoes >= ALTERACOES_POR_GRAVACAO:
+            self.flush()
+
+    def flush(self):
+        """Grava o índice em disco (troca atômica do arquivo)."""
+        with self._lock:
+            if not self._alteracoes:
+                return
+            fd, tmp = tempfile.mkstemp(prefix='.index-', dir=self.diretorio)
+            with os.fdopen(fd, 'w', encoding='utf-8') as arquivo:
+                json.dump(self._indice, arquivo)
+            os.replace(tmp, self._arquivo_indice)
+            self._alteracoes = 0
+
+    def lookup(self, chave):
+        """
+        Retorna a entrada do índice para `chave` se o objeto ainda existir.
+
+        Marca a entrada como usada agora (para o LRU).
+        """
+        with self._lock:
+            entrada = self._indice.get(chave)
+            if entrada is None:
+                return None
+            if not os.path.exists(self._caminho_objeto(entrada['sha256'])):
+                del self._indice[chave]
+                self._registrar_alteracao()
+                return None
+            entrada['acesso'] = time.time()
+            self._registrar_alteracao()
+            return entrada
+
+    def path(self, entrada):
+        """Caminho do objeto de uma entrada do índice."""
+        return self._caminho_objeto(entrada['sha256'])
+
+    def store(self, chave, conteudo, etag=None, last_modified=None):
+        """Guarda `conteudo` (bytes) sob `chave` e retorna a entrada do índice."""
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        destino = self._caminho_objeto(sha256)
+        if not os.path.exists(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.obj-', dir=os.path.dirname(destino))
+            with os.fdopen(fd, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            # Somente leitura: as saídas são hardlinks para este mesmo arquivo
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, destino)
+
+        agora = time.time()
+        with self._lock:
+            entrada = {
+                'sha256': sha256,
+                'tamanho': len(conteudo),
+                'etag': etag,
+                'last_modified': last_modified,
+                'salvo_em': agora,
+                'acesso': agora,
+            }
+            self._indice[chave] = entrada
+            self._registrar_alteracao()
+            self._evict()
+        return entrada
+
+    def touch(self, chave):
+        """Marca uma entrada como revalidada agora (resposta 304)."""
+        with self._lock:
+            entrada = self._indice[chave]
+            entrada['salvo_em'] = entrada['acesso'] = time.time()
+            self._registrar_alteracao()
+            return entrada
+
+    def total_bytes(self):
+        """Espaço ocupado pelos objetos distintos referenciados no índice."""
+        with self._lock:
+            return sum({e['sha256']: e['tamanho'] for e in self._indice.values()}.values())
+
+    def _evict(self):
+        """Remove as entradas menos usadas até o total caber em `limite_bytes`."""
+        total = self.total_bytes()
+        if total <= self.limite_bytes:
+            return
+
+        referencias = {}
+        for entrada in self._indice.values():
+            referencias[entrada['sha256']] = referencias.get(entrada['sha256'], 0) + 1
+
+        for chave, entrada in sorted(self._indice.items(), key=lambda item: item[1]['acesso']):
+            if total <= self.limite_bytes:
+                break
+            del self._indice[chave]
+            referencias[entrada['sha256']] -= 1
+            # O objeto só é apagado quando nenhuma outra chave aponta para ele
+            if referencias[entrada['sha256']] == 0:
+                total -= entrada['tamanho']
+                try:
+                    os.remove(self._caminho_objeto(entrada['sha256']))
+                except OSError:
+                    pass
+        self._registrar_alteracao()
+
+    # ------------------------------------------------------------------
+    # Busca com revalidação
+    # ------------------------------------------------------------------
+
+    def fetch(self, cliente, url, params=None, revalidar=False, ttl=None):
+        """
+        Obtém o conteúdo de uma URL pelo cache, indo à rede só quando preciso.
+
+        Parâmetros:
+            cliente (ScryfallClient): Cliente usado nas requisições
+            url (str): URL ou caminho da API
+            params (dict): Parâmetros de query (fazem parte da chave)
+            revalidar (bool): Força um GET condicional mesmo dentro do TTL
+            ttl (float): Validade da entrada em segundos (padrão: ttl_metadados)
+
+        Retorna:
+            dict | None: Entrada do índice, ou None se a resposta não for 200/304
+        """
+        ttl = self.ttl_metadados if ttl is None else ttl
+        url_absoluta = cliente.url(url)
+        chave = url_absoluta if not params else f"{url_absoluta}?{json.dumps(params, sort_keys=True)}"
+        entrada = self.lookup(chave)
+
+        if entrada is not None and not revalidar and time.time() - entrada['salvo_em'] < ttl:
+            return entrada
+
+        cabecalhos = {}
+        if entrada is not None:
+            if entrada.get('etag'):
+                cabecalhos['If-None-Match'] = entrada['etag']
+            if entrada.get('last_modified'):
+                cabecalhos['If-Modified-Since'] = entrada['last_modified']
+
+        resposta = cliente.get(url, params=params, headers=cabecalhos or None)
+        if resposta.status_code == 304 and entrada is not None:
+            return self.touch(chave)
+        if resposta.status_code != 200:
+            return None
+        return self.store(chave, resposta.content, resposta.headers.get('ETag'),
+                          resposta.headers.get('Last-Modified'))
+
+    def fetch_json(self, cliente, url, params=None):
+        """Como `fetch`, mas retorna o JSON decodificado (ou None)."""
+        entrada = self.fetch(cliente, url, params=params)
+        if entrada is None:
+            return None
+        with open(self.path(entrada), 'rb') as arquivo:
+            return json.loads(arquivo.read())
+
+    def fetch_file(self, cliente, url, destino, revalidar=False):
+        """
+        Disponibiliza o conteúdo de uma URL em `destino` sem regravar os bytes.
+
+        Imagens não expiram pelo TTL; o arquivo de saída é um hardlink para o
+        objeto do cache (symlink ou cópia quando hardlink não é possível).
+
+        Retorna:
+            bool: True se o arquivo está disponível em `destino`
+        """
+        entrada = self.fetch(cliente, url, revalidar=revalidar, ttl=float('inf'))
+        if entrada is None:
+            return False
+        materialize(self.path(entrada), destino)
+        return True
+
+
+def materialize(origem, destino):
+    """Cria `destino` apontando para `origem`: hardlink, senão symlink, senão cópia."""
+    try:
+        if os.path.samefile(origem, destino):
+            return
+    except OSError:
+        pass
+
+    temporario = f"{destino}.part"
+    if os.path.lexists(temporario):
+        os.remove(temporario)
+    try:
+        os.link(origem, temporario)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(origem), temporario)
+        except OSError:
+            shutil.copyfile(origem, temporario)
+    os.replace(temporario, destino)
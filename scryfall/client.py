@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = 'https://api.scryfall.com'
+
+# A Scryfall pede no máximo ~10 requisições/s na API e cabeçalhos
+# User-Agent/Accept explícitos; imagens (*.scryfall.io) não têm limite
+TAXA_PADRAO = 10
+CABECALHOS = {
+    'User-Agent': 'KindredWars/1.0',
+    'Accept': 'application/json;q=0.9,*/*;q=0.8',
+}
+
+# Códigos que valem nova tentativa (limite de taxa e falhas do servidor)
+STATUS_RETENTATIVA = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Limitador de taxa por token bucket, seguro entre threads."""
+
+    def __init__(self, taxa, capacidade=None):
+        """
+        Parâmetros:
+            taxa (float): Tokens repostos por segundo
+            capacidade (float): Tamanho máximo da rajada (padrão: 1 s de taxa)
+        """
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else taxa)
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class ScryfallClient:
+    """
+    Cliente HTTP da Scryfall com sessão keep-alive, limite de taxa e retentativas.
+
+    Todas as chamadas à API (host de `base_url`) passam pelo token bucket;
+    downloads de imagens em outros hosts usam o mesmo pool de conexões mas não
+    são limitados. Respostas 429/5xx e erros de conexão são repetidos com
+    backoff exponencial, respeitando o cabeçalho Retry-After.
+    """
+
+    def __init__(self, base_url=API_URL, taxa=TAXA_PADRAO, max_conexoes=8, tentativas=5,
+                 backoff=0.5, timeout=30, sessao=None, cache=None):
+        """
+        Parâmetros:
+            cache (ScryfallCache): Cache local opcional para JSON e imagens;
+                                   com ele, get_json e download só vão à rede
+                                   para conteúdo novo ou expirado
+        """
+        self.cache = cache
+        self.base_url = base_url.rstrip('/')
+        self._host_api = urlsplit(self.base_url).netloc
+        self.limitador = TokenBucket(taxa) if taxa else None
+        self.max_conexoes = max_conexoes
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.sessao = sessao or requests.Session()
+        self.sessao.headers.update(CABECALHOS)
+        adaptador = HTTPAdapter(pool_connections=max_conexoes, pool_maxsize=max_conexoes)
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+
+    def url(self, caminho):
+        """Monta a URL absoluta de um caminho da API ('/cards/named')."""
+        if caminho.startswith(('http://', 'https://')):
+            return caminho
+        return f"{self.base_url}/{caminho.lstrip('/')}"
+
+    def _espera(self, tentativa, resposta=None):
+        """Tempo de espera antes da próxima tentativa."""
+        if resposta is not None:
+            retry_after = resposta.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return max(float(retry_after), 0)
+                except ValueError:
+                    pass
+        return self.backoff * (2 ** tentativa)
+
+    def get(self, caminho, params=None, stream=False, headers=None):
+        """
+        GET com limite de taxa e retentativas.
+
+        Retorna a última resposta recebida (inclusive 4xx definitivos, para o
+        chamador decidir); só levanta exceção se todas as tentativas falharem
+        por erro de conexão.
+        """
+        url = self.url(caminho)
+        limitado = self.limitador is not None and urlsplit(url).netloc == self._host_api
+
+        for tentativa in range(self.tentativas):
+            if limitado:
+                self.limitador.acquire()
+            try:
+                resposta = self.sessao.get(url, params=params, stream=stream, headers=headers,
+                                           timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if tentativa == self.tentativas - 1:
+                    raise
+                time.sleep(self._espera(tentativa))
+                continue
+
+            if resposta.status_code not in STATUS_RETENTATIVA or tentativa == self.tentativas - 1:
+                return resposta
+            resposta.close()
+            time.sleep(self._espera(tentativa, resposta))
+
+        return resposta
+
+    def get_json(self, caminho, params=None):
+        """GET que retorna o JSON da resposta, ou None se o status não for 200."""
+        if self.cache is not None:
+            return self.cache.fetch_json(self, caminho, params=params)
+        resposta = self.get(caminho, params=params)
+        if resposta.status_code != 200:
+            return None
+        return resposta.json()
+
+    def paginate(self, caminho, params=None):
+        """
+        Itera sobre todos os objetos de uma lista paginada da Scryfall.
+
+        Segue `next_page` enquanto `has_more` for verdadeiro. Uma busca sem
+        resultados (404) produz uma iteração vazia.
+        """
+        dados = self.get_json(caminho, params=params)
+        while dados:
+            yield from dados.get('data', [])
+            if not dados.get('has_more') or not dados.get('next_page'):
+                break
+            dados = self.get_json(dados['next_page'])
+
+    def download(self, url, caminho):
+        """
+        Baixa um arquivo para `caminho` (via arquivo temporário + troca atômica).
+
+        Retorna:
+            bool: True se o arquivo foi salvo
+        """
+        if self.cache is not None:
+            return self.cache.fetch_file(self, url, caminho)
+        return self.stream_to_file(url, caminho)
+
+    def stream_to_file(self, url, caminho):
+        """
+        Baixa uma URL direto para disco em blocos, sem passar pelo cache.
+
+        Uma falha no meio da transferência (conexão ou disco) remove o
+        arquivo temporário e retorna False; `caminho` só é criado completo.
+        """
+        resposta = self.get(url, stream=True)
+        if resposta.status_code != 200:
+            resposta.close()
+            return False
+
+        temporario = f"{caminho}.part"
+        try:
+            with resposta, open(temporario, 'wb') as arquivo:
+                for bloco in resposta.iter_content(chunk_size=64 * 1024):
+                    arquivo.write(bloco)
+            os.replace(temporario, caminho)
+        except (requests.RequestException, OSError):
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def map(self, funcao, itens, workers=None):
+        """
+        Aplica `funcao` a cada item com concorrência limitada, preservando a ordem.
+
+        O paralelismo padrão é o tamanho do pool de conexões.
+        """
+        with ThreadPoolExecutor(max_workers=workers or self.max_conexoes) as executor:
+            return list(executor.map(funcao, itens))
+
+    def download_many(self, downloads, workers=None):
+        """
+        Baixa vários arquivos em paralelo.
+
+        Parâmetros:
+            downloads (list): Pares (url, caminho)
+
+        Retorna:
+            list: bool de sucesso para cada download, na mesma ordem
+        """
+        def baixar(item):
+            url, caminho = item
+            try:
+                return self.download(url, caminho)
+            except requests.RequestException:
+                return False
+
+        return self.map(baixar, downloads, workers)
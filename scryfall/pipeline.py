@@ -0,0 +1,281 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from scryfall.cache import ScryfallCache, materialize
+from scryfall.client import ScryfallClient
+from scryfall.prints import image_uris, select_prints
+
+# Marca de fim enviada a cada worker de um estágio
+_FIM = object()
+
+# Descrições das duas impressões salvas de cada carta
+DESCRICOES = ('mais_antiga', 'mais_recente')
+
+
+def parse_decklist(arquivo_txt):
+    """Nomes das cartas de uma decklist no formato '<quantidade> <nome>' por linha."""
+    nomes = []
+    with open(arquivo_txt, "r", encoding="utf-8") as file:
+        for linha in file:
+            partes = linha.strip().split(" ", 1)
+            if len(partes) == 2:
+                nomes.append(partes[1])
+    return nomes
+
+
+def output_folder(arquivo_txt):
+    """Pasta de saída de uma decklist (reaproveitada entre execuções)."""
+    return f"Imagens_cartas_{os.path.splitext(os.path.basename(arquivo_txt))[0]}"
+
+
+def image_filename(nome_carta, descricao):
+    return f"{nome_carta.replace(' ', '_')}_{descricao}.png"
+
+
+def resolve_online(cliente, nome_carta):
+    """Escolhe as impressões de uma carta pela API (nome exato + todas as reimpressões)."""
+    dados_carta = cliente.get_json('/cards/named', params={'exact': nome_carta})
+    if dados_carta is None or "prints_search_uri" not in dados_carta:
+        return None
+    return select_prints(list(cliente.paginate(dados_carta["prints_search_uri"])))
+
+
+class Progress:
+    """Contadores do pipeline, atualizados pelas threads e exibidos periodicamente."""
+
+    CAMPOS = ('listas', 'cartas', 'unicas', 'resolvidas', 'nao_encontradas',
+              'baixadas', 'erros_download', 'escritas')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contadores = dict.fromkeys(self.CAMPOS, 0)
+        self.inicio = time.monotonic()
+
+    def add(self, campo, quantidade=1):
+        with self._lock:
+            self.contadores[campo] += quantidade
+
+    def snapshot(self):
+        with self._lock:
+            dados = dict(self.contadores)
+        dados['segundos'] = round(time.monotonic() - self.inicio, 2)
+        dados['imagens_por_segundo'] = round(dados['baixadas'] / dados['segundos'], 2) if dados['segundos'] else 0.0
+        return dados
+
+    def report(self):
+        d = self.snapshot()
+        print(f"[{d['segundos']:.0f}s] listas {d['listas']} | cartas {d['cartas']} ({d['unicas']} únicas) | "
+              f"resolvidas {d['resolvidas']} | não encontradas {d['nao_encontradas']} | "
+              f"baixadas {d['baixadas']} ({d['imagens_por_segundo']}/s) | erros {d['erros_download']} | "
+              f"escritas {d['escritas']}")
+
+
+def _workers(funcao, entrada, quantidade, nome):
+    """Inicia `quantidade` threads que aplicam `funcao` a cada item de `entrada` até receber _FIM."""
+    def executar():
+        while True:
+            item = entrada.get()
+            if item is _FIM:
+                return
+            funcao(item)
+
+    threads = [threading.Thread(target=executar, name=f"{nome}-{i}", daemon=True) for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _encerrar(threads, fila, quantidade):
+    """Envia uma marca de fim por worker do próximo estágio e espera os atuais terminarem."""
+    for thread in threads:
+        thread.join()
+    for _ in range(quantidade):
+        fila.put(_FIM)
+
+
+def run_pipeline(listas, cliente=None, indice=None, workers_resolver=4, workers_baixar=8,
+                 tamanho_fila=256, intervalo_progresso=2.0):
+    """
+    Baixa as imagens de várias decklists em um pipeline de estágios paralelos.
+
+    Estágios (ligados por filas limitadas):
+        leitura  -> lê as listas e deduplica as cartas entre elas
+        resolver -> escolhe as impressões (BulkIndex local ou API)
+        baixar   -> baixa cada imagem uma única vez
+        escrever -> disponibiliza a imagem na pasta de cada lista que tem a carta
+
+    Parâmetros:
+        listas (list): Arquivos .txt das decklists
+        cliente (ScryfallClient): Cliente HTTP (padrão: com cache local)
+        indice (BulkIndex): Índice local de impressões (modo offline)
+        workers_resolver (int): Threads do estágio de resolução
+        workers_baixar (int): Threads do estágio de download
+        tamanho_fila (int): Capacidade de cada fila entre estágios
+        intervalo_progresso (float): Segundos entre relatórios (0 desativa)
+
+    Retorna:
+        dict: Contadores finais e vazão
+    """
+    cliente = cliente or ScryfallClient(max_conexoes=workers_baixar, cache=ScryfallCache())
+    progresso = Progress()
+
+    fila_resolver = queue.Queue(tamanho_fila)
+    fila_baixar = queue.Queue(tamanho_fila)
+    fila_escrever = queue.Queue(tamanho_fila)
+
+    # Carta -> pastas de destino e arquivos já baixados; protegido por `lock`
+    registro = {}
+    lock = threading.Lock()
+
+    def ler():
+        for lista in listas:
+            # Uma lista ilegível (ex.: arquivo inexistente) não interrompe as demais
+            try:
+                pasta = output_folder(lista)
+                os.makedirs(pasta, exist_ok=True)
+                nomes = parse_decklist(lista)
+            except Exception as e:
+                print(f"Erro ao ler {lista}: {e}")
+                continue
+            progresso.add('listas')
+            progresso.add('cartas', len(nomes))
+
+            novas = []
+            for nome in nomes:
+                escritas = []
+                with lock:
+                    carta = registro.get(nome)
+                    if carta is None:
+                        registro[nome] = {'pastas': {pasta}, 'arquivos': {}}
+                        novas.append(nome)
+                    elif pasta not in carta['pastas']:
+                        carta['pastas'].add(pasta)
+                        # Imagens que já passaram pelo download só precisam ser escritas aqui
+                        escritas = [(nome, descricao, origem, [pasta])
+                                    for descricao, origem in carta['arquivos'].items()]
+                # Fora do lock: com a fila cheia, put bloquearia os workers de download
+                for escrita in escritas:
+                    fila_escrever.put(escrita)
+            progresso.add('unicas', len(novas))
+
+            if indice is not None:
+                # Resolução local da lista inteira em uma consulta
+                try:
+                    resolvidas = indice.resolve(novas)
+                except Exception as e:
+                    print(f"Erro ao resolver as cartas de {lista}: {e}")
+                    progresso.add('nao_encontradas', len(novas))
+                    continue
+                for nome, impressoes in resolvidas.items():
+                    fila_resolver.put((nome, impressoes))
+            else:
+                for nome in novas:
+                    fila_resolver.put((nome, None))
+
+    def resolver(item):
+        nome, impressoes = item
+        if impressoes is None and indice is None:
+            try:
+                impressoes = resolve_online(cliente, nome)
+            except Exception as e:
+                print(f"Erro ao buscar a carta {nome}: {e}")
+        if impressoes is None:
+            progresso.add('nao_encontradas')
+            print(f"Nenhuma versão válida encontrada para {nome}.")
+            return
+        progresso.add('resolvidas')
+        for carta, descricao in zip(impressoes, DESCRICOES):
+            url = image_uris(carta).get('png')
+            if url:
+                fila_baixar.put((nome, descricao, url))
+            else:
+                print(f"Imagem não encontrada para {descricao} da carta {nome}.")
+
+    def baixar(item):
+        nome, descricao, url = item
+        with lock:
+            pastas = sorted(registro[nome]['pastas'])
+        destino = os.path.join(pastas[0], image_filename(nome, descricao))
+        try:
+            sucesso = cliente.download(url, destino)
+        except Exception:
+            sucesso = False
+        if not sucesso:
+            progresso.add('erros_download')
+            print(f"Erro ao baixar a imagem para {descricao} da carta {nome}.")
+            return
+
+        progresso.add('baixadas')
+        progresso.add('escritas')
+        with lock:
+            carta = registro[nome]
+            carta['arquivos'][descricao] = destino
+            restantes = sorted(carta['pastas'] - {pastas[0]})
+        if restantes:
+            fila_escrever.put((nome, descricao, destino, restantes))
+
+    def escrever(item):
+        nome, descricao, origem, pastas = item
+        for pasta in pastas:
+            destino = os.path.join(pasta, image_filename(nome, descricao))
+            try:
+                materialize(origem, destino)
+                progresso.add('escritas')
+            except OSError as e:
+                print(f"Erro ao escrever {destino}: {e}")
+
+    parar_relatorio = threading.Event()
+
+    def relatar():
+        while not parar_relatorio.wait(intervalo_progresso):
+            progresso.report()
+
+    if intervalo_progresso:
+        threading.Thread(target=relatar, name='progresso', daemon=True).start()
+
+    leitor = threading.Thread(target=ler, name='leitura', daemon=True)
+    leitor.start()
+    resolvedores = _workers(resolver, fila_resolver, workers_resolver, 'resolver')
+    baixadores = _workers(baixar, fila_baixar, workers_baixar, 'baixar')
+    escritor = _workers(escrever, fila_escrever, 1, 'escrever')
+
+    try:
+        _encerrar([leitor], fila_resolver, workers_resolver)
+        _encerrar(resolvedores, fila_baixar, workers_baixar)
+        _encerrar(baixadores, fila_escrever, 1)
+        for thread in escritor:
+            thread.join()
+    finally:
+        parar_relatorio.set()
+
+    progresso.report()
+    return progresso.snapshot()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Baixa as imagens de várias decklists em paralelo")
+    parser.add_argument('listas', nargs='+', help="Arquivos .txt das decklists")
+    parser.add_argument('--indice', help="Índice SQLite do bulk data (scryfall.bulk) para resolver offline")
+    parser.add_argument('--workers-resolver', type=int, default=4)
+    parser.add_argument('--workers-baixar', type=int, default=8)
+    parser.add_argument('--fila', type=int, default=256, help="Capacidade das filas entre estágios")
+    parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre relatórios de progresso")
+    args = parser.parse_args(argv)
+
+    indice = None
+    if args.indice:
+        from scryfall.bulk import BulkIndex
+        indice = BulkIndex(args.indice)
+
+    run_pipeline(args.listas, indice=indice, workers_resolver=args.workers_resolver,
+                 workers_baixar=args.workers_baixar, tamanho_fila=args.fila,
+                 intervalo_progresso=args.intervalo)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+def valid_prints(cartas):
+    """Filtra as impressões que não são digitais, variações ou promos."""
+    return [carta for carta in cartas if
+            not carta.get("digital", True) and not carta.get("variation", True) and not carta.get("promo", True)]
+
+
+def select_prints(cartas):
+    """
+    Escolhe a impressão mais antiga e a mais recente entre as válidas.
+
+    Retorna:
+        tuple | None: (mais_antiga, mais_recente), ou None se nenhuma for válida
+    """
+    cartas_filtradas = valid_prints(cartas)
+    if not cartas_filtradas:
+        return None
+
+    # Ordenar as cartas pelas datas de lançamento
+    cartas_filtradas.sort(key=lambda c: c.get("released_at", ""))
+    return cartas_filtradas[0], cartas_filtradas[-1]
+
+
+def image_uris(carta):
+    """URIs de imagem de uma impressão (cartas de duas faces usam a primeira face)."""
+    if 'image_uris' in carta:
+        return carta['image_uris']
+    faces = carta.get('card_faces') or []
+    if faces and 'image_uris' in faces[0]:
+        return faces[0]['image_uris']
+    return {}
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from data_processing import data_store
+from data_processing.data_store import compile_store, load_or_compile, store_path
+
+CSV = '\n'.join([
+    'Nome,Comandante,Cor,Custo,Tipo,Subtipo,Preco_USD,EDHREC_Rank,Deck',
+    'Llanowar Elves,1,G,1,Creature,Elf Druid,0.2,50,Verde',
+    'Forest,0,Incolor,0,Basic Land,Forest,0.1,1,Verde',
+]) + '\n'
+
+
+def _publicado_por_outro_worker(monkeypatch, destino):
+    """Simula a corrida: o store não existia na verificação, mas outro worker o publica antes do replace."""
+    isdir = os.path.isdir
+    monkeypatch.setattr(data_store.os.path, 'isdir', lambda p: False if p == destino else isdir(p))
+
+
+def test_compilacao_concorrente_usa_o_store_do_outro_worker(tmp_path, monkeypatch):
+    csv = tmp_path / 'decks.csv'
+    csv.write_text(CSV, encoding='utf-8')
+    destino = compile_store(str(csv))
+
+    _publicado_por_outro_worker(monkeypatch, destino)
+    assert compile_store(str(csv)) == destino
+
+    df, is_land = load_or_compile(str(csv))
+    assert list(df['nome']) == ['Llanowar Elves', 'Forest']
+    # Nenhum diretório temporário fica para trás
+    assert sorted(os.listdir(tmp_path)) == ['decks.csv', os.path.basename(store_path(str(csv)))]
+
+
+def test_store_de_outra_versao_do_csv_nao_e_aceito(tmp_path, monkeypatch):
+    csv = tmp_path / 'decks.csv'
+    csv.write_text(CSV, encoding='utf-8')
+    destino = compile_store(str(csv))
+
+    # O CSV mudou: o store publicado não corresponde ao que este worker compilou
+    csv.write_text(CSV + 'Sol Ring,0,Incolor,1,Artifact,,1.0,1,Verde\n', encoding='utf-8')
+    os.utime(csv, (0, 0))
+    _publicado_por_outro_worker(monkeypatch, destino)
+    with pytest.raises(OSError):
+        compile_store(str(csv))
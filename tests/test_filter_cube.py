@@ -0,0 +1,126 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.color_identity import CORES, MODOS, ROTULO_INCOLOR, color_mask, query
+from data_processing.config import TIPOS_PADRAO
+from data_processing.data_analyzer import build_incidence, deck_rankings
+from data_processing.data_loader import load_and_preprocess_data
+from data_processing.filter_cube import build_filter_cube
+from data_processing.type_line import parse_type_line
+
+CSV = '''Nome,Comandante,Cor,Custo,Tipo,Subtipo,Preco_USD,EDHREC_Rank,Deck
+"Trostani, Selesnya's Voice",1,GW,5,Legendary Creature,Dryad,1.0,100,Selesnya
+Llanowar Elves,0,G,1,Creature,Elf Druid,0.2,50,Selesnya
+Swords to Plowshares,0,W,1,Instant,,1.0,10,Selesnya
+Sol Ring,0,Incolor,1,Artifact,,1.0,1,Selesnya
+Forest,0,Incolor,0,Basic Land,Forest,0.1,1,Selesnya
+Dryad Arbor,0,G,0,Land Creature,Forest Dryad,0.5,900,Selesnya
+Strength of the Harvest // Haven of the Harvest,0,WG,2,Enchantment,Aura // Land,0.3,5000,Selesnya
+"Tasigur, the Golden Fang",1,B,6,Legendary Creature,Human Shaman,2.0,300,Sultai
+Sol Ring,0,Incolor,1,Artifact,,1.0,1,Sultai
+Llanowar Elves,0,G,1,Creature,Elf Druid,0.2,50,Sultai
+Growing Rites of Itlimoc // Itlimoc,0,G,3,Legendary Enchantment // Legendary Land,,3.0,800,Sultai
+Fire // Ice,0,UR,2,Instant // Instant,,0.5,700,Sultai
+Bonecrusher Giant // Stomp,0,R,3,Creature,Giant // Instant — Adventure,1.5,200,Sultai
+"Kenrith, the Returned King",1,WUBRG,5,Legendary Creature,Human Noble,0.8,400,Cinco
+Fire // Ice,0,RU,2,Instant // Instant,,0.5,700,Cinco
+Bonecrusher Giant // Stomp,0,R,3,Creature,Giant // Instant — Adventure,1.5,200,Cinco
+Valakut Awakening // Valakut Stoneforge,0,R,3,Instant // Land,,4.0,1500,Cinco
+Fable of the Mirror-Breaker // Reflection of Kiki-Jiki,0,R,3,Enchantment,Saga // Enchantment Creature — Goblin Shaman,20.0,30,Cinco
+Sol Ring,0,Incolor,1,Artifact,,1.0,1,Cinco
+Swords to Plowshares,0,W,1,Instant,,1.0,10,Cinco
+'''
+
+# Mudanças intencionais da decomposição por face: tipos que só aparecem na
+# outra face, escrita na coluna Subtipo (aventuras, versos de dupla face)
+MUDANCAS_POR_FACE = {
+    ('Instant', 'Bonecrusher Giant // Stomp'),
+    ('Creature', 'Fable of the Mirror-Breaker // Reflection of Kiki-Jiki'),
+    ('Land', 'Strength of the Harvest // Haven of the Harvest'),
+}
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('decks') / 'decks.csv'
+    caminho.write_text(CSV, encoding='utf-8')
+    bruto = pd.read_csv(caminho)
+    df, is_land = load_and_preprocess_data(str(caminho))
+    return bruto, df, build_incidence(df, is_land, TIPOS_PADRAO)
+
+
+def _letras(rotulo):
+    """Cores de um rótulo do CSV como conjunto ('Incolor' é a identidade vazia)."""
+    return set() if rotulo == ROTULO_INCOLOR else set(rotulo)
+
+
+def _filtro_texto(rotulo, cores, modo):
+    """Filtro por texto da coluna Cor, como o dashboard fazia antes das máscaras."""
+    if modo == 'superconjunto':
+        return all(cor in rotulo for cor in cores)
+    if modo == 'exatamente':
+        return _letras(rotulo) == set(cores)
+    return _letras(rotulo) <= set(cores)
+
+
+def _selecoes():
+    for tamanho in range(len(CORES) + 1):
+        yield from itertools.combinations(CORES, tamanho)
+
+
+def test_consultas_por_mascara_iguais_ao_filtro_por_texto():
+    rotulos = ['Incolor', 'W', 'G', 'GW', 'WG', 'UR', 'RU', 'BUG', 'UBG', 'WUBRG', 'R']
+    mascaras = np.array([color_mask(r) for r in rotulos])
+    for modo in MODOS:
+        for cores in _selecoes():
+            esperado = [_filtro_texto(r, cores, modo) for r in rotulos]
+            assert list(query(mascaras, color_mask(list(cores)), modo)) == esperado, (modo, cores)
+
+
+def _ranking_texto(bruto, tipo, cores, modo):
+    """Ranking de referência: linhas do tipo (por face) e da cor pedida, decks distintos por carta."""
+    do_tipo = [tipo in parse_type_line(t, s)['tipos'] for t, s in zip(bruto['Tipo'], bruto['Subtipo'])]
+    da_cor = bruto['Cor'].map(lambda rotulo: _filtro_texto(rotulo, cores, modo))
+    contagens = bruto[np.array(do_tipo) & da_cor].groupby('Nome')['Deck'].nunique()
+    return {nome: int(n) for nome, n in contagens.items()}
+
+
+def test_cubo_igual_ao_filtro_por_texto(dataset):
+    bruto, _, incidencia = dataset
+    cubo = build_filter_cube(incidencia, TIPOS_PADRAO, top_n=1000)
+    for tipo in TIPOS_PADRAO:
+        for modo in MODOS:
+            for cores in _selecoes():
+                celula = cubo[(tipo, modo, color_mask(list(cores)))]
+                assert {str(nome): int(n) for nome, n in celula.items()} == \
+                    _ranking_texto(bruto, tipo, cores, modo), (tipo, modo, cores)
+                # Mais decks primeiro, empates em ordem alfabética
+                chaves = [(-int(n), str(nome)) for nome, n in celula.items()]
+                assert chaves == sorted(chaves)
+
+
+def test_rankings_por_tipo_iguais_ao_str_contains_exceto_faces(dataset):
+    bruto, df, incidencia = dataset
+    rankings = deck_rankings(df, incidencia, TIPOS_PADRAO)
+
+    mudancas = set()
+    for tipo in TIPOS_PADRAO:
+        # Ranking de antes: busca do tipo no texto da coluna Tipo
+        antigo = bruto[bruto['Tipo'].str.contains(tipo, case=False, na=False)].groupby('Nome')['Deck'].nunique()
+        novo = rankings['cartas_por_tipo'][tipo]
+        antigo = {nome: int(n) for nome, n in antigo.items()}
+        novo = {str(nome): int(n) for nome, n in novo.items()}
+        for nome in set(novo) - set(antigo):
+            mudancas.add((tipo, nome))
+        assert set(antigo) <= set(novo), tipo
+        assert all(novo[nome] == n for nome, n in antigo.items()), tipo
+    assert mudancas == MUDANCAS_POR_FACE
+
+    # Cartas mais comuns: sem lands, agora incluindo a face de land vinda do Subtipo
+    antigo = bruto[~bruto['Tipo'].str.contains('land', case=False, na=False)].groupby('Nome')['Deck'].nunique()
+    novo = {str(nome): int(n) for nome, n in rankings['cartas_comuns'].items()}
+    assert set(antigo.index) - set(novo) == {'Strength of the Harvest // Haven of the Harvest'}
+    assert all(novo[nome] == n for nome, n in antigo.items() if nome in novo)
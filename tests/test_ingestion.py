@@ -0,0 +1,101 @@
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from data_processing.data_analyzer import build_incidence, deck_rankings
+from data_processing.config import TIPOS_PADRAO
+from data_processing.data_loader import load_and_preprocess_data
+from data_processing.ingestion import aggregates_to_results, current_aggregates, ingest_deck
+
+CABECALHO = 'Nome,Comandante,Cor,Custo,Tipo,Subtipo,Preco_USD,EDHREC_Rank,Deck'
+
+DATASET = [
+    '"Ruric Thar, the Unbowed",1,GR,6,Legendary Creature,Ogre Warrior,0.37,4081,Anlize',
+    'Atarka Pummeler,0,R,5,Creature,Ogre Warrior,0.05,23402,Anlize',
+    'Mountain,0,Incolor,0,Basic Land,Mountain,0.1,1,Anlize',
+    'Llanowar Elves,1,G,1,Creature,Elf Druid,0.2,50,Verde',
+    'Forest,0,Incolor,0,Basic Land,Forest,0.1,1,Verde',
+]
+
+DECK_NOVO = [
+    'Elvish Mystic,1,G,1,Creature,Elf Druid,0.3,80,Novo',
+    'Llanowar Elves,0,G,1,Creature,Elf Druid,0.2,50,Novo',
+    'Forest,0,Incolor,0,Basic Land,Forest,0.1,1,Novo',
+]
+
+
+def _escrever(caminho, linhas, quebra_final=True):
+    caminho.write_text('\n'.join([CABECALHO] + linhas) + ('\n' if quebra_final else ''), encoding='utf-8')
+    return str(caminho)
+
+
+def test_add_em_csv_sem_quebra_de_linha_final(tmp_path):
+    dataset = _escrever(tmp_path / 'decks.csv', DATASET, quebra_final=False)
+    deck = _escrever(tmp_path / 'novo.csv', DECK_NOVO)
+
+    ingest_deck(dataset, 'add', deck_csv=deck)
+
+    df = pd.read_csv(dataset)
+    assert len(df) == len(DATASET) + len(DECK_NOVO)
+    assert df['Deck'].iloc[len(DATASET) - 1] == 'Verde'
+    assert df['Nome'].iloc[len(DATASET)] == 'Elvish Mystic'
+
+
+def test_agregados_iguais_ao_recalculo(tmp_path):
+    dataset = _escrever(tmp_path / 'decks.csv', DATASET)
+    deck = _escrever(tmp_path / 'novo.csv', DECK_NOVO)
+
+    ingest_deck(dataset, 'add', deck_csv=deck)
+    ingest_deck(dataset, 'remove', nome_deck='Anlize')
+
+    agregados = current_aggregates(dataset, TIPOS_PADRAO)
+    assert agregados is not None
+    incrementais = aggregates_to_results(agregados)
+
+    df, is_land = load_and_preprocess_data(dataset)
+    recalculados = deck_rankings(df, build_incidence(df, is_land, TIPOS_PADRAO), TIPOS_PADRAO)
+
+    assert incrementais['num_decks_distintos'] == recalculados['num_decks_distintos'] == 2
+    for chave in ('preco_por_deck', 'edhrec_rank_por_deck', 'cores_comandantes', 'cartas_comuns'):
+        tm.assert_series_equal(incrementais[chave], recalculados[chave], check_names=False, check_dtype=False,
+                               check_index_type=False)
+    for tipo in TIPOS_PADRAO:
+        tm.assert_series_equal(incrementais['cartas_por_tipo'][tipo], recalculados['cartas_por_tipo'][tipo],
+                               check_names=False, check_dtype=False, check_index_type=False)
+
+
+def test_agregados_desatualizados_sao_ignorados(tmp_path):
+    dataset = _escrever(tmp_path / 'decks.csv', DATASET)
+    ingest_deck(dataset, 'add', deck_csv=_escrever(tmp_path / 'novo.csv', DECK_NOVO))
+
+    # CSV alterado fora da ingestão: os agregados não valem mais
+    with open(dataset, 'a', encoding='utf-8') as arquivo:
+        arquivo.write('Sol Ring,0,Incolor,1,Artifact,,1.0,1,Verde\n')
+    assert current_aggregates(dataset, TIPOS_PADRAO) is None
+
+
+def test_replace_com_coluna_faltando_nao_altera_o_dataset(tmp_path):
+    dataset = _escrever(tmp_path / 'decks.csv', DATASET)
+    ingest_deck(dataset, 'add', deck_csv=_escrever(tmp_path / 'novo.csv', DECK_NOVO))
+    antes = open(dataset, encoding='utf-8').read()
+    agregados_antes = current_aggregates(dataset, TIPOS_PADRAO)
+
+    # Deck sem a coluna Subtipo
+    sem_subtipo = tmp_path / 'sem_subtipo.csv'
+    sem_subtipo.write_text('Nome,Comandante,Cor,Custo,Tipo,Preco_USD,EDHREC_Rank,Deck\n'
+                           'Elvish Mystic,1,G,1,Creature,0.3,80,Novo\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='Subtipo'):
+        ingest_deck(dataset, 'replace', deck_csv=str(sem_subtipo))
+
+    assert open(dataset, encoding='utf-8').read() == antes
+    assert current_aggregates(dataset, TIPOS_PADRAO) == agregados_antes
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith('.decks-')] == []
+
+
+def test_replace_regrava_o_deck_no_fim(tmp_path):
+    dataset = _escrever(tmp_path / 'decks.csv', DATASET, quebra_final=False)
+    ingest_deck(dataset, 'replace', nome_deck='Anlize', deck_csv=_escrever(tmp_path / 'novo.csv', DECK_NOVO))
+
+    df = pd.read_csv(dataset)
+    assert list(df['Deck']) == ['Verde', 'Verde', 'Anlize', 'Anlize', 'Anlize']
+    assert list(df['Nome'].iloc[-3:]) == ['Elvish Mystic', 'Llanowar Elves', 'Forest']
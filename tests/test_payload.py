@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualization.payload import budget_page, compact_values
+from visualization.plot_creator import create_colors_plot, create_price_plot
+
+# Ranking de 7 itens em ordem decrescente
+RANKING = pd.Series([70, 60, 50, 40, 30, 20, 10], index=list('abcdefg'), name='decks')
+
+
+def test_paginas_e_limites():
+    pagina, info = budget_page(RANKING, 3, 0, outros=None)
+    assert list(pagina.index) == ['a', 'b', 'c']
+    assert info == {'pagina': 0, 'paginas': 3, 'inicio': 0, 'fim': 3, 'total': 7, 'outros': 0}
+
+    pagina, info = budget_page(RANKING, 3, 2, outros=None)
+    assert list(pagina.index) == ['g']
+    assert (info['inicio'], info['fim']) == (6, 7)
+
+    for inexistente in (-1, 3):
+        with pytest.raises(IndexError):
+            budget_page(RANKING, 3, inexistente)
+
+
+def test_serie_vazia_tem_uma_pagina_vazia():
+    pagina, info = budget_page(RANKING.iloc[:0], 3)
+    assert pagina.empty
+    assert (info['paginas'], info['total'], info['outros']) == (1, 0, 0)
+    with pytest.raises(IndexError):
+        budget_page(RANKING.iloc[:0], 3, 1)
+
+
+def test_outros_soma_e_media_dos_itens_seguintes():
+    pagina, info = budget_page(RANKING, 3, 0, outros='soma')
+    assert list(pagina.index) == ['a', 'b', 'c', 'Outros (4)']
+    assert pagina.iloc[-1] == 40 + 30 + 20 + 10
+    assert info['outros'] == 4
+
+    pagina, _ = budget_page(RANKING, 3, 1, outros='media')
+    assert list(pagina.index) == ['d', 'e', 'f', 'Outros (1)']
+    assert pagina.iloc[-1] == 10
+
+    pagina, _ = budget_page(RANKING, 3, 0, outros='media')
+    assert pagina.iloc[-1] == pytest.approx(25.0)
+    assert np.issubdtype(pagina.dtype, np.floating)
+
+
+def test_ultima_pagina_sem_outros():
+    pagina, info = budget_page(RANKING, 3, 2, outros='soma')
+    assert list(pagina.index) == ['g']
+    assert info['outros'] == 0
+
+
+def test_valores_compactos():
+    assert compact_values(np.array([0, 255])).dtype == np.uint8
+    assert compact_values(np.array([-1, 300])).dtype == np.int16
+    assert compact_values(np.array([0, 1 << 40])).dtype == np.float64
+    assert compact_values(np.array([1.5, 2.5])).dtype == np.float32
+    assert compact_values(np.array([], dtype=np.int64)).dtype == np.int32
+    pagina, _ = budget_page(RANKING, 3, 0, outros='soma')
+    assert pagina.dtype == np.uint8
+
+
+def test_barras_usam_media_e_pizza_usa_soma():
+    resultados = {
+        'preco_por_deck': RANKING.astype(float),
+        'cores_comandantes': pd.Series([5, 4, 3, 2, 1], index=['G', 'R', 'WU', 'B', 'Incolor']),
+    }
+
+    barras = create_price_plot(resultados, top_x=3)
+    assert list(barras.data[0].x)[-1] == 'Outros (4)'
+    assert float(np.asarray(barras.data[0].y)[-1]) == pytest.approx(25.0)
+    assert barras.layout.meta['pagina']['outros'] == 4
+
+    pizza = create_colors_plot(resultados, top_x=2)
+    rotulos = [str(nome) for trace in pizza.data for nome in trace.labels]
+    valores = [float(v) for trace in pizza.data for v in np.asarray(trace.values)]
+    assert dict(zip(rotulos, valores))['Outros (3)'] == 3 + 2 + 1
+    assert sum(valores) == 15
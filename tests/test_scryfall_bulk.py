@@ -0,0 +1,106 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from scryfall.bulk import BulkIndex, build_index, iter_json_array
+
+# Strings com delimitadores e escapes, objetos e arrays aninhados
+OBJETOS = [
+    {'name': 'Fire // Ice', 'texto': 'Ele disse: "} ], {" e saiu', 'barra': 'C:\\cartas\\', 'vazio': ''},
+    {'name': 'Lim-Dûl\'s Vault', 'unicode': 'é ü 日本 \u2014', 'controle': 'linha\nnova\ttab'},
+    {'card_faces': [{'name': 'A', 'image_uris': {'png': 'a.png'}}, {'name': 'B', 'faces': [[], {}, [1, [2]]]}]},
+    {'numeros': [1, -2.5, 3e10, 0], 'logicos': [True, False, None]},
+]
+
+
+def _texto(objetos, espacos=True):
+    if espacos:
+        return '[\n  ' + ',\n  '.join(json.dumps(o, ensure_ascii=False) for o in objetos) + '\n]\n'
+    return json.dumps(objetos, separators=(',', ':'))
+
+
+@pytest.mark.parametrize('espacos', [True, False])
+def test_objetos_iguais_ao_json_em_qualquer_fronteira_de_bloco(espacos):
+    texto = _texto(OBJETOS, espacos)
+    # Blocos de 1 a 40 caracteres: as fronteiras caem dentro de strings, escapes e aninhamentos
+    for tamanho in list(range(1, 41)) + [len(texto), 1 << 20]:
+        assert list(iter_json_array(io.StringIO(texto), tamanho_bloco=tamanho)) == OBJETOS, tamanho
+
+
+def test_fronteira_dentro_de_escape_ascii():
+    texto = json.dumps([{'name': 'é"\\'}])
+    for tamanho in range(1, len(texto) + 1):
+        assert list(iter_json_array(io.StringIO(texto), tamanho_bloco=tamanho)) == [{'name': 'é"\\'}]
+
+
+def test_array_vazio():
+    assert list(iter_json_array(io.StringIO(' [ ] '), tamanho_bloco=1)) == []
+
+
+def test_arquivo_que_nao_e_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"name": "x"}')))
+
+
+@pytest.mark.parametrize('texto', ['[{"name": "x"}', '[{"name": "x"}, {"name": '])
+def test_array_incompleto(texto):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(texto), tamanho_bloco=4))
+
+
+def _impressao(id_, nome, data, digital=False, variation=False, promo=False, **extra):
+    return {'id': id_, 'name': nome, 'released_at': data, 'digital': digital, 'variation': variation,
+            'promo': promo, **extra}
+
+
+BULK = [
+    _impressao('sol-1', 'Sol Ring', '1993-08-05', image_uris={'png': 'sol1.png', 'art_crop': 'sol1.jpg'}),
+    _impressao('sol-2', 'Sol Ring', '2023-09-08', image_uris={'png': 'sol2.png', 'art_crop': 'sol2.jpg'}),
+    # Impressões que nunca são escolhidas
+    _impressao('sol-mtgo', 'Sol Ring', '1990-01-01', digital=True, image_uris={'png': 'mtgo.png'}),
+    _impressao('sol-promo', 'Sol Ring', '2030-01-01', promo=True, image_uris={'png': 'promo.png'}),
+    # Dupla face: imagens na primeira face, buscável pelo nome completo e por cada face
+    _impressao('mdfc-1', 'Valakut Awakening // Valakut Stoneforge', '2020-09-25', card_faces=[
+        {'name': 'Valakut Awakening', 'image_uris': {'png': 'va.png', 'art_crop': 'va.jpg'}},
+        {'name': 'Valakut Stoneforge', 'image_uris': {'png': 'vs.png', 'art_crop': 'vs.jpg'}},
+    ]),
+    _impressao('so-digital', 'Arena Only', '2021-01-01', digital=True, image_uris={'png': 'arena.png'}),
+    {'object': 'card', 'id': 'sem-nome'},
+]
+
+
+@pytest.fixture
+def indice(tmp_path):
+    caminho_json = tmp_path / 'default-cards.json.gz'
+    with gzip.open(caminho_json, 'wt', encoding='utf-8') as arquivo:
+        json.dump(BULK, arquivo)
+    caminho_db = str(tmp_path / 'indice.sqlite')
+    assert build_index(str(caminho_json), caminho_db) == len(BULK) - 1
+    indice = BulkIndex(caminho_db)
+    yield indice
+    indice.close()
+
+
+def test_indice_resolve_impressoes(indice):
+    resolvidas = indice.resolve(['Sol Ring', '  sol   RING ', 'Valakut Stoneforge',
+                                 'Valakut Awakening // Valakut Stoneforge', 'Arena Only', 'Inexistente'])
+
+    antiga, recente = resolvidas['Sol Ring']
+    assert (antiga['id'], recente['id']) == ('sol-1', 'sol-2')
+    assert antiga['image_uris'] == {'png': 'sol1.png', 'art_crop': 'sol1.jpg'}
+    assert resolvidas['  sol   RING '] == resolvidas['Sol Ring']
+
+    for nome in ('Valakut Stoneforge', 'Valakut Awakening // Valakut Stoneforge'):
+        antiga, recente = resolvidas[nome]
+        assert antiga['id'] == recente['id'] == 'mdfc-1'
+        assert antiga['image_uris'] == {'png': 'va.png', 'art_crop': 'va.jpg'}
+
+    assert resolvidas['Arena Only'] is None
+    assert resolvidas['Inexistente'] is None
+
+
+def test_indice_prints_traz_todas_as_impressoes(indice):
+    impressoes = indice.prints(['Sol Ring'])['Sol Ring']
+    assert sorted(carta['id'] for carta in impressoes) == ['sol-1', 'sol-2', 'sol-mtgo', 'sol-promo']
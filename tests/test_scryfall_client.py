@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scryfall.client import ScryfallClient
+
+
+class StubScryfall(BaseHTTPRequestHandler):
+    """Servidor local que imita as respostas da Scryfall usadas pelo cliente."""
+
+    contagens = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, dados, cabecalhos=None):
+        corpo = json.dumps(dados).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        caminho = self.path.split('?')[0]
+        n = self.contagens[caminho] = self.contagens.get(caminho, 0) + 1
+        base = f"http://{self.headers['Host']}"
+
+        if caminho == '/limitado':
+            if n == 1:
+                return self._json(429, {'object': 'error'}, {'Retry-After': '0.3'})
+            return self._json(200, {'ok': True})
+        if caminho == '/instavel':
+            if n <= 2:
+                return self._json(503, {'object': 'error'})
+            return self._json(200, {'ok': True})
+        if caminho == '/sempre-falha':
+            return self._json(500, {'object': 'error'})
+        if caminho == '/cards/search':
+            pagina = int(self.path.rsplit('page=', 1)[1]) if 'page=' in self.path else 1
+            return self._json(200, {
+                'data': [{'name': f"Carta {pagina}-{i}"} for i in range(2)],
+                'has_more': pagina < 3,
+                'next_page': f"{base}/cards/search?page={pagina + 1}",
+            })
+        if caminho == '/cards/vazio':
+            return self._json(404, {'object': 'error'})
+        if caminho == '/imagem':
+            corpo = b'x' * 1000
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            return self.wfile.write(corpo)
+        if caminho == '/imagem-cortada':
+            # Anuncia mais bytes do que envia e fecha a conexão
+            self.send_response(200)
+            self.send_header('Content-Length', '100000')
+            self.end_headers()
+            self.wfile.write(b'x' * 1000)
+            self.wfile.flush()
+            self.close_connection = True
+            return None
+        return self._json(404, {'object': 'error'})
+
+
+@pytest.fixture
+def servidor():
+    StubScryfall.contagens = {}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubScryfall)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_429_respeita_retry_after(servidor):
+    cliente = ScryfallClient(base_url=servidor, taxa=None, backoff=5)
+    inicio = time.monotonic()
+    resposta = cliente.get('/limitado')
+    decorrido = time.monotonic() - inicio
+
+    assert resposta.status_code == 200
+    assert StubScryfall.contagens['/limitado'] == 2
+    # Esperou o Retry-After (0.3 s), não o backoff exponencial (5 s)
+    assert 0.3 <= decorrido < 2
+
+
+def test_retentativas_em_5xx(servidor):
+    cliente = ScryfallClient(base_url=servidor, taxa=None, backoff=0.01, tentativas=5)
+    assert cliente.get_json('/instavel') == {'ok': True}
+    assert StubScryfall.contagens['/instavel'] == 3
+
+
+def test_retentativas_esgotadas_retornam_ultima_resposta(servidor):
+    cliente = ScryfallClient(base_url=servidor, taxa=None, backoff=0.01, tentativas=3)
+    assert cliente.get('/sempre-falha').status_code == 500
+    assert cliente.get_json('/sempre-falha') is None
+    assert StubScryfall.contagens['/sempre-falha'] == 6
+
+
+def test_paginacao_segue_next_page(servidor):
+    cliente = ScryfallClient(base_url=servidor, taxa=None)
+    nomes = [carta['name'] for carta in cliente.paginate('/cards/search', params={'q': 't:elf'})]
+
+    assert nomes == [f"Carta {p}-{i}" for p in (1, 2, 3) for i in range(2)]
+    assert StubScryfall.contagens['/cards/search'] == 3
+
+
+def test_paginacao_sem_resultados(servidor):
+    cliente = ScryfallClient(base_url=servidor, taxa=None)
+    assert list(cliente.paginate('/cards/vazio')) == []
+
+
+def test_download_completo(servidor, tmp_path):
+    cliente = ScryfallClient(base_url=servidor, taxa=None)
+    destino = tmp_path / 'carta.jpg'
+
+    assert cliente.download(f"{servidor}/imagem", str(destino))
+    assert destino.read_bytes() == b'x' * 1000
+
+
+def test_download_interrompido_nao_deixa_parcial(servidor, tmp_path):
+    cliente = ScryfallClient(base_url=servidor, taxa=None)
+    destino = tmp_path / 'carta.jpg'
+
+    assert cliente.stream_to_file(f"{servidor}/imagem-cortada", str(destino)) is False
+    assert os.listdir(tmp_path) == []
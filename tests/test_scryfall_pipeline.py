@@ -0,0 +1,20 @@
+from scryfall.pipeline import run_pipeline
+
+
+class IndiceVazio:
+    """Índice local sem nenhuma impressão: todas as cartas ficam sem versão."""
+
+    def resolve(self, nomes):
+        return {nome: None for nome in nomes}
+
+
+def test_lista_ilegivel_nao_interrompe_as_demais(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    lista = tmp_path / 'deck.txt'
+    lista.write_text('1 Sol Ring\n1 Llanowar Elves\n', encoding='utf-8')
+
+    resultado = run_pipeline([str(tmp_path / 'inexistente.txt'), str(lista)], cliente=object(),
+                             indice=IndiceVazio(), intervalo_progresso=0)
+
+    assert 'Erro ao ler' in capsys.readouterr().out
+    assert (resultado['listas'], resultado['cartas'], resultado['nao_encontradas']) == (1, 2, 2)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from data_processing.shared_cache import SQLiteCache, memoize
+
+
+def _caches(tmp_path, espera=2.0):
+    """Dois 'workers' sobre o mesmo arquivo SQLite."""
+    caminho = str(tmp_path / 'cache.sqlite')
+    return SQLiteCache(caminho, espera=espera), SQLiteCache(caminho, espera=espera)
+
+
+def test_falta_trava_e_set_libera(tmp_path):
+    primeiro, segundo = _caches(tmp_path)
+
+    assert primeiro.get('chave') is None
+    assert primeiro._travada('chave')
+
+    primeiro.set('chave', {'valor': 1})
+    assert not primeiro._travada('chave')
+    assert segundo.get('chave') == {'valor': 1}
+
+
+def test_release_libera_sem_gravar(tmp_path):
+    primeiro, segundo = _caches(tmp_path)
+
+    assert primeiro.get('chave') is None
+    # O cálculo falhou (ex.: 404): a trava é liberada sem valor
+    primeiro.release('chave')
+    assert not primeiro._travada('chave')
+
+    # O outro worker não espera pela trava: recebe None na hora e a obtém
+    inicio = time.monotonic()
+    assert segundo.get('chave') is None
+    assert time.monotonic() - inicio < 1.0
+    assert segundo._travada('chave')
+    assert not segundo.has('chave')
+
+
+def test_memoize_libera_a_trava_quando_a_funcao_falha(tmp_path):
+    from flask import Flask
+    from flask_caching import Cache
+
+    app = Flask(__name__)
+    cache = Cache(app, config={'CACHE_TYPE': 'data_processing.shared_cache.shared_cache',
+                               'CACHE_SHARED_PATH': str(tmp_path / 'cache.sqlite'), 'CACHE_LOCK_WAIT': 2.0})
+    chamadas = []
+
+    @memoize(cache, timeout=60)
+    def dividir(a, b):
+        chamadas.append((a, b))
+        return a / b
+
+    with app.app_context():
+        for _ in range(2):
+            inicio = time.monotonic()
+            with pytest.raises(ZeroDivisionError):
+                dividir(1, 0)
+            # Sem a liberação, a segunda chamada esperaria CACHE_LOCK_WAIT pela trava
+            assert time.monotonic() - inicio < 1.0
+        assert len(chamadas) == 2
+        assert not cache.cache._travada(dividir.make_cache_key(dividir.uncached, 1, 0))
+
+        assert dividir(4, 2) == dividir(4, 2) == 2
+        assert len(chamadas) == 3
+
+
+def test_arquivo_criado_so_para_o_dono(tmp_path):
+    caminho = tmp_path / 'privado' / 'cache.sqlite'
+    SQLiteCache(str(caminho)).set('chave', 1)
+    assert caminho.stat().st_mode & 0o777 == 0o600
+    assert caminho.parent.stat().st_mode & 0o777 == 0o700
+
+
+def test_recusa_arquivo_que_outros_podem_escrever(tmp_path):
+    caminho = tmp_path / 'cache.sqlite'
+    caminho.touch()
+    caminho.chmod(0o666)
+    with pytest.raises(RuntimeError):
+        SQLiteCache(str(caminho))
+
+
+def test_trava_expirada_nao_e_liberada_pelo_dono_antigo(tmp_path):
+    lento, rapido = _caches(tmp_path)
+
+    assert lento.get('chave') is None
+    # A trava do worker lento expira...
+    lento._conexao().execute('UPDATE travas SET expira = 0')
+
+    # ...e outro worker (outra thread) a obtém
+    resultado = []
+    thread = threading.Thread(target=lambda: resultado.append(rapido.get('chave')))
+    thread.start()
+    thread.join()
+    assert resultado == [None]
+    assert rapido._travada('chave')
+
+    # O set/release do worker lento não libera a trava que agora é do outro
+    lento.set('chave', 1)
+    lento.release('chave')
+    assert rapido._travada('chave')
+
+
+def test_classe_base_abstrata():
+    from data_processing.shared_cache import SharedCache
+
+    with pytest.raises(TypeError):
+        SharedCache()
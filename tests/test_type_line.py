@@ -0,0 +1,33 @@
+from data_processing.type_line import parse_type_line
+
+
+def _subtipos_por_face(resultado):
+    return [face['subtipos'] for face in resultado['faces']]
+
+
+def test_subtipo_na_face_que_o_contem():
+    resultado = parse_type_line('Land // Legendary Creature — Demon')
+    assert [face['tipos'] for face in resultado['faces']] == [['Land'], ['Creature']]
+    assert _subtipos_por_face(resultado) == [[], ['Demon']]
+    assert resultado['subtipos'] == ('Demon',)
+
+
+def test_subtipo_sem_separacao_vai_para_a_face_do_seu_tipo():
+    assert _subtipos_por_face(parse_type_line('Land // Legendary Creature', 'Demon')) == [[], ['Demon']]
+    assert _subtipos_por_face(parse_type_line('Artifact // Sorcery', 'Adventure')) == [[], ['Adventure']]
+    assert _subtipos_por_face(parse_type_line('Enchantment // Land', 'Aura')) == [['Aura'], []]
+
+
+def test_subtipo_repetido_na_coluna_e_na_face():
+    resultado = parse_type_line('Land // Legendary Creature — Demon', 'Demon')
+    assert _subtipos_por_face(resultado) == [[], ['Demon']]
+
+
+def test_faces_pareadas_pelo_separador():
+    resultado = parse_type_line('Creature', 'Ogre // Sorcery — Adventure')
+    assert [face['tipos'] for face in resultado['faces']] == [['Creature'], ['Sorcery']]
+    assert _subtipos_por_face(resultado) == [['Ogre'], ['Adventure']]
+
+    resultado = parse_type_line('Legendary Creature', 'Elf Druid')
+    assert resultado['supertipos'] == ('Legendary',)
+    assert _subtipos_por_face(resultado) == [['Elf', 'Druid']]
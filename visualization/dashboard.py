@@ -1,13 +1,74 @@
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import dash
-import pandas as pd
+import threading
+import time
 
+from data_processing.color_identity import CORES, MODOS, color_mask
+from data_processing.metrics import REGISTRY, cache_result
+from data_processing.shared_cache import memoize
+from visualization.payload import compact_values
+from visualization.plot_creator import create_empty_plot
 
-def create_dash_app(server, df, tipos):
-    """Cria e configura a aplicação Dash."""
-    dash_app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
+DURACAO_CALLBACK = REGISTRY.histogram(
+    'kindred_dash_callback_duration_seconds', "Duração dos callbacks do Dash (sem a serialização)", ('callback',))
+
+# Opções mostradas nas buscas de cartas e decks (as listas completas têm dezenas de milhares)
+LIMITE_BUSCA = 30
+
+# Cartas e decks nos gráficos de coocorrência e similaridade
+TOP_COOCORRENCIA = 20
+
+# Cartas no gráfico por subtipo
+TOP_SUBTIPO = 30
+
+
+def search_options(categorias, busca, valor):
+    """
+    Opções de um dropdown com busca: as categorias que contêm o texto buscado.
+
+    Os valores já selecionados (um valor ou, em dropdowns múltiplos, uma
+    lista) são mantidos nas opções (o Dash os descarta se sumirem delas).
+    """
+    selecionados = [] if valor is None else valor if isinstance(valor, list) else [valor]
+    if not busca:
+        if not selecionados:
+            raise PreventUpdate
+        return [{'label': nome, 'value': nome} for nome in selecionados]
+
+    encontradas = list(categorias[categorias.str.contains(busca, case=False, regex=False)][:LIMITE_BUSCA])
+    faltando = [nome for nome in selecionados if nome not in encontradas]
+    return [{'label': nome, 'value': nome} for nome in faltando + encontradas]
+
+
+def create_dash_app(server, get_snapshot, tipos, cache=None, prefixo=None, top_x=50, versao_analise=None):
+    """
+    Cria e configura a aplicação Dash.
+
+    Sem `prefixo`, o Dash registra suas rotas em /dashboard/ do próprio
+    `server`. Com `prefixo`, `server` é um Flask dedicado montado nesse
+    prefixo por um middleware (as rotas ficam na raiz do servidor e as URLs
+    geradas para o navegador usam o prefixo).
+
+    `get_snapshot` é chamado a cada callback para obter o snapshot atual, cujo
+    cubo de filtros ('cubo') já contém o ranking de cada combinação
+    tipo × modo × cores; o callback só faz a consulta e monta a figura. As
+    seções de coocorrência ("cartas jogadas com...") e de decks parecidos
+    consultam o modelo esparso do snapshot ('coocorrencia'); seus dropdowns
+    buscam as opções conforme o texto digitado. A seção de subtipos consulta o
+    índice invertido subtipo → linhas do store ('indices_tipo'). Com `cache` (Flask-Caching),
+    as figuras são memoizadas pela versão do snapshot, pela versão do código
+    da análise (`versao_analise`) e pelo orçamento de itens (`top_x`, o top N
+    do cubo): o cache compartilhado entre workers e deploys nunca devolve uma
+    figura de outra configuração.
+    """
+    if prefixo is None:
+        dash_app = dash.Dash(__name__, server=server, url_base_pathname='/dashboard/')
+    else:
+        dash_app = dash.Dash(__name__, server=server, routes_pathname_prefix='/',
+                             requests_pathname_prefix=prefixo)
 
     dash_app.layout = html.Div([
         dcc.Dropdown(
@@ -29,27 +90,68 @@ def create_dash_app(server, df, tipos):
             value=None,
             style={'width': '50%', 'margin-top': '20px'}
         ),
-        dcc.Graph(id='graph')
+        dcc.RadioItems(
+            id='modo-cor',
+            options=[
+                {'label': 'Contém as cores', 'value': 'superconjunto'},
+                {'label': 'Exatamente as cores', 'value': 'exatamente'},
+                {'label': 'Cabe na identidade', 'value': 'subconjunto'}
+            ],
+            value='superconjunto',
+            inline=True,
+            style={'margin-top': '10px'}
+        ),
+        dcc.Graph(id='graph'),
+        html.H3("Cartas jogadas com..."),
+        dcc.Dropdown(
+            id='carta-dropdown',
+            placeholder="Digite o nome de uma carta",
+            style={'width': '50%'}
+        ),
+        dcc.RadioItems(
+            id='metrica-coocorrencia',
+            options=[
+                {'label': 'Lift', 'value': 'lift'},
+                {'label': 'Jaccard', 'value': 'jaccard'},
+                {'label': 'Decks em comum', 'value': 'decks'}
+            ],
+            value='lift',
+            inline=True,
+            style={'margin-top': '10px'}
+        ),
+        dcc.Graph(id='graph-coocorrencia'),
+        html.H3("Decks parecidos"),
+        dcc.Dropdown(
+            id='deck-dropdown',
+            placeholder="Digite o nome de um deck",
+            style={'width': '50%'}
+        ),
+        dcc.Graph(id='graph-decks'),
+        html.H3("Cartas por subtipo"),
+        dcc.Dropdown(
+            id='subtipo-dropdown',
+            placeholder="Digite um ou mais subtipos (ex.: Elf, Druid)",
+            multi=True,
+            style={'width': '50%'}
+        ),
+        dcc.Graph(id='graph-subtipos')
     ])
 
-    @dash_app.callback(
-        Output('graph', 'figure'),
-        [Input('tipo-dropdown', 'value'),
-         Input('cor-dropdown', 'value')]
-    )
-    def update_graph(tipo, cores):
-        tipo_comum = df[df['Tipo'].str.contains(tipo, case=False, na=False)]
-
-        if cores:
-            tipo_comum = tipo_comum[tipo_comum['Cor'].apply(lambda x: all(cor in x for cor in cores))]
+    # Marca, por thread, que a figura foi montada (falta no cache) na chamada atual
+    montagem = threading.local()
 
-        tipo_comum = tipo_comum.groupby('Nome')['Deck'].nunique().sort_values(ascending=False)
+    # As funções de montagem recebem o snapshot já lido pelo callback (ignorado
+    # na chave do cache): a figura e a chave vêm sempre da mesma versão
+    def build_figure(snapshot, versao, versao_analise, top_x, tipo, modo, mascara_cores):
+        montagem.montou = True
+        tipo_comum = snapshot['cubo'][(tipo, modo, mascara_cores)]
+        if tipo_comum.empty:
+            return create_empty_plot(f"Nenhuma carta do tipo {tipo} com essas cores")
 
         fig = px.bar(
-            tipo_comum.head(50),
-            x=tipo_comum.head(50).index,
-            y=tipo_comum.head(50).values,
-            title=f"Top 50 Cartas do Tipo {tipo}",
+            x=tipo_comum.index,
+            y=compact_values(tipo_comum.to_numpy()),
+            title=f"Top {len(tipo_comum)} Cartas do Tipo {tipo}",
             labels={'x': 'Carta', 'y': 'Número de Decks'},
             template='plotly'
         )
@@ -61,4 +163,179 @@ def create_dash_app(server, df, tipos):
 
         return fig
 
-    return dash_app
\ No newline at end of file
+    def build_cooccurrence_figure(snapshot, versao, versao_analise, carta, metrica):
+        from data_processing.cooccurrence import cooccurring_cards
+
+        tabela = cooccurring_cards(snapshot['coocorrencia'], carta, TOP_COOCORRENCIA, metrica)
+        if tabela.empty:
+            return create_empty_plot(f"Nenhuma carta aparece em decks suficientes com {carta}")
+
+        fig = px.bar(
+            x=tabela.index,
+            y=compact_values(tabela[metrica].to_numpy()),
+            title=f"Cartas jogadas com {carta}",
+            labels={'x': 'Carta', 'y': {'lift': 'Lift', 'jaccard': 'Jaccard', 'decks': 'Decks em comum'}[metrica]},
+            hover_data={'Decks em comum': tabela['decks']},
+            template='plotly'
+        )
+        fig.update_layout(autosize=True, margin=dict(l=10, r=10, t=40, b=40))
+        return fig
+
+    def build_similar_decks_figure(snapshot, versao, versao_analise, deck):
+        from data_processing.cooccurrence import similar_decks
+
+        tabela = similar_decks(snapshot['coocorrencia'], deck, TOP_COOCORRENCIA)
+        if tabela.empty:
+            return create_empty_plot(f"Nenhum deck tem cartas em comum com {deck}")
+
+        fig = px.bar(
+            x=tabela.index,
+            y=compact_values(tabela['jaccard'].to_numpy()),
+            title=f"Decks parecidos com {deck}",
+            labels={'x': 'Deck', 'y': 'Similaridade (Jaccard)'},
+            hover_data={'Cartas em comum': tabela['cartas_em_comum']},
+            template='plotly'
+        )
+        fig.update_layout(autosize=True, margin=dict(l=10, r=10, t=40, b=40))
+        return fig
+
+    def build_subtype_figure(snapshot, versao, versao_analise, subtipos):
+        from data_processing.data_analyzer import subtype_cards
+
+        cartas = subtype_cards(snapshot['df'], snapshot['indices_tipo']['subtipos'], subtipos).head(TOP_SUBTIPO)
+        if cartas.empty:
+            return create_empty_plot(f"Nenhuma carta com os subtipos {', '.join(subtipos)}")
+
+        fig = px.bar(
+            x=cartas.index,
+            y=compact_values(cartas.to_numpy()),
+            title=f"Top {len(cartas)} Cartas {' / '.join(subtipos)}",
+            labels={'x': 'Carta', 'y': 'Número de Decks'},
+            template='plotly'
+        )
+        fig.update_layout(autosize=True, margin=dict(l=10, r=10, t=40, b=40))
+        return fig
+
+    if cache is not None:
+        # As versões do snapshot e da análise fazem parte da chave: recargas e
+        # deploys invalidam as figuras; source_check inclui o código da função.
+        # Se a montagem falha, a trava do cache compartilhado é liberada
+        memoizar = memoize(cache, timeout=3600, source_check=True, args_to_ignore=['snapshot'])
+        build_figure = memoizar(build_figure)
+        build_cooccurrence_figure = memoizar(build_cooccurrence_figure)
+        build_similar_decks_figure = memoizar(build_similar_decks_figure)
+        build_subtype_figure = memoizar(build_subtype_figure)
+
+    @dash_app.callback(
+        Output('graph', 'figure'),
+        [Input('tipo-dropdown', 'value'),
+         Input('cor-dropdown', 'value'),
+         Input('modo-cor', 'value')]
+    )
+    def update_graph(tipo, cores, modo):
+        inicio = time.perf_counter()
+        snapshot = get_snapshot()
+        if 'cubo' not in snapshot:
+            return dash.no_update
+        # Valores vêm do cliente: fora das opções, nada a consultar no cubo
+        if tipo not in tipos or modo not in MODOS or not isinstance(cores, (list, type(None))) \
+                or any(cor not in list(CORES) for cor in cores or []):
+            raise PreventUpdate
+        if not cores:
+            # Sem cores selecionadas o filtro de cor não se aplica
+            modo = 'superconjunto'
+
+        montagem.montou = False
+        figura = build_figure(snapshot, snapshot['versao'], versao_analise, top_x, tipo, modo, color_mask(cores or []))
+        if cache is not None:
+            cache_result('figuras_dash', not montagem.montou)
+        DURACAO_CALLBACK.observe(time.perf_counter() - inicio, 'graph.figure')
+        return figura
+
+    @dash_app.callback(
+        Output('carta-dropdown', 'options'),
+        [Input('carta-dropdown', 'search_value')],
+        [State('carta-dropdown', 'value')]
+    )
+    def search_cards(busca, valor):
+        snapshot = get_snapshot()
+        if 'coocorrencia' not in snapshot:
+            raise PreventUpdate
+        return search_options(snapshot['coocorrencia']['cartas'], busca, valor)
+
+    @dash_app.callback(
+        Output('deck-dropdown', 'options'),
+        [Input('deck-dropdown', 'search_value')],
+        [State('deck-dropdown', 'value')]
+    )
+    def search_decks(busca, valor):
+        snapshot = get_snapshot()
+        if 'coocorrencia' not in snapshot:
+            raise PreventUpdate
+        return search_options(snapshot['coocorrencia']['decks'], busca, valor)
+
+    @dash_app.callback(
+        Output('graph-coocorrencia', 'figure'),
+        [Input('carta-dropdown', 'value'),
+         Input('metrica-coocorrencia', 'value')]
+    )
+    def update_cooccurrence(carta, metrica):
+        from data_processing.cooccurrence import METRICAS
+
+        inicio = time.perf_counter()
+        snapshot = get_snapshot()
+        if 'coocorrencia' not in snapshot:
+            return dash.no_update
+        if metrica not in METRICAS:
+            raise PreventUpdate
+        if not carta or carta not in snapshot['coocorrencia']['cartas']:
+            return create_empty_plot("Escolha uma carta para ver as que mais aparecem com ela")
+
+        figura = build_cooccurrence_figure(snapshot, snapshot['versao'], versao_analise, carta, metrica)
+        DURACAO_CALLBACK.observe(time.perf_counter() - inicio, 'graph-coocorrencia.figure')
+        return figura
+
+    @dash_app.callback(
+        Output('graph-decks', 'figure'),
+        [Input('deck-dropdown', 'value')]
+    )
+    def update_similar_decks(deck):
+        inicio = time.perf_counter()
+        snapshot = get_snapshot()
+        if 'coocorrencia' not in snapshot:
+            return dash.no_update
+        if not deck or deck not in snapshot['coocorrencia']['decks']:
+            return create_empty_plot("Escolha um deck para ver os mais parecidos")
+
+        figura = build_similar_decks_figure(snapshot, snapshot['versao'], versao_analise, deck)
+        DURACAO_CALLBACK.observe(time.perf_counter() - inicio, 'graph-decks.figure')
+        return figura
+
+    @dash_app.callback(
+        Output('subtipo-dropdown', 'options'),
+        [Input('subtipo-dropdown', 'search_value')],
+        [State('subtipo-dropdown', 'value')]
+    )
+    def search_subtypes(busca, valor):
+        snapshot = get_snapshot()
+        if 'subtipos' not in snapshot.get('indices_tipo', {}):
+            raise PreventUpdate
+        return search_options(snapshot['indices_tipo']['subtipos']['termos'], busca, valor)
+
+    @dash_app.callback(
+        Output('graph-subtipos', 'figure'),
+        [Input('subtipo-dropdown', 'value')]
+    )
+    def update_subtypes(subtipos):
+        inicio = time.perf_counter()
+        snapshot = get_snapshot()
+        if 'subtipos' not in snapshot.get('indices_tipo', {}):
+            return dash.no_update
+        if not subtipos:
+            return create_empty_plot("Escolha um ou mais subtipos para ver as cartas mais jogadas")
+
+        figura = build_subtype_figure(snapshot, snapshot['versao'], versao_analise, tuple(sorted(subtipos)))
+        DURACAO_CALLBACK.observe(time.perf_counter() - inicio, 'graph-subtipos.figure')
+        return figura
+
+    return dash_app
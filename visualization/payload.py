@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# Rótulo do item que agrega o que ficou fora da página
+ROTULO_OUTROS = 'Outros'
+
+# Como os itens fora da página viram o item 'Outros'
+AGREGACOES = {
+    'soma': lambda valores: valores.sum(),
+    'media': lambda valores: valores.mean(),
+}
+
+
+def compact_values(valores):
+    """
+    Converte valores numéricos para o menor dtype que os representa sem perda relevante.
+
+    O plotly.py serializa arrays numpy como typed arrays em base64 ({'dtype',
+    'bdata'}); contagens em int32 (ou menor) e preços/ranks em float32
+    ocupam metade (ou menos) do int64/float64 do pandas.
+    """
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.integer) or np.issubdtype(valores.dtype, np.bool_):
+        if not len(valores):
+            return valores.astype(np.int32)
+        for dtype in (np.uint8, np.int16, np.int32):
+            limites = np.iinfo(dtype)
+            if limites.min <= valores.min() and valores.max() <= limites.max:
+                return valores.astype(dtype)
+        return valores.astype(np.float64)
+    if np.issubdtype(valores.dtype, np.floating):
+        return valores.astype(np.float32)
+    return valores
+
+
+def budget_page(serie, limite, pagina=0, outros='soma'):
+    """
+    Fatia de uma série ordenada que cabe no orçamento de itens de um gráfico.
+
+    A página `pagina` traz os itens [pagina × limite, (pagina + 1) × limite);
+    com `outros`, os itens seguintes (fora da página) viram um único item
+    'Outros (n)', agregado por soma ou média. O tamanho da figura fica
+    limitado a `limite` + 1 itens, qualquer que seja o tamanho do dataset.
+
+    Parâmetros:
+        serie (pd.Series): Valores já ordenados (ex.: um ranking)
+        limite (int): Itens por página
+        pagina (int): Página pedida (0 = primeira). IndexError se não existir
+        outros (str): 'soma', 'media' ou None (sem o item 'Outros')
+
+    Retorna:
+        tuple: (pd.Series da página, com valores compactos, dict com 'pagina',
+               'paginas', 'inicio', 'fim', 'total' e 'outros' (itens agregados))
+    """
+    limite = max(int(limite), 1)
+    total = len(serie)
+    paginas = max(-(-total // limite), 1)
+    if pagina < 0 or pagina >= paginas:
+        raise IndexError(f"Página {pagina} inexistente ({paginas} páginas)")
+
+    inicio = pagina * limite
+    fim = min(inicio + limite, total)
+    fatia = serie.iloc[inicio:fim]
+    restantes = serie.iloc[fim:]
+
+    indice, valores = list(fatia.index), fatia.to_numpy()
+    if outros and len(restantes):
+        indice.append(f"{ROTULO_OUTROS} ({len(restantes)})")
+        # Com a média, contagens inteiras passam a float
+        valores = np.append(valores, AGREGACOES[outros](restantes.to_numpy()))
+
+    pagina_serie = pd.Series(compact_values(valores), index=pd.Index(indice, name=serie.index.name),
+                             name=serie.name)
+    info = {
+        'pagina': pagina,
+        'paginas': paginas,
+        'inicio': inicio,
+        'fim': fim,
+        'total': total,
+        'outros': len(restantes) if outros else 0,
+    }
+    return pagina_serie, info
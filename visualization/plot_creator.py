@@ -1,6 +1,8 @@
 import plotly.express as px
 import plotly.graph_objects as go
 
+from visualization.payload import budget_page
+
 
 def create_empty_plot(mensagem):
     """
@@ -28,6 +30,158 @@ def create_empty_plot(mensagem):
     return fig
 
 
+# Configurações de layout comuns para todos os gráficos
+CONFIG_LAYOUT = {
+    'margin': {'l': 50, 'r': 50, 'b': 150, 't': 50, 'pad': 4},
+    'xaxis': {
+        'tickangle': -45,
+        'automargin': True,
+        'tickfont': {'size': 10},
+        'title': {'standoff': 15}
+    },
+    'yaxis': {
+        'automargin': True,
+        'title': {'standoff': 15}
+    },
+    'autosize': True,
+    'hovermode': 'x unified'
+}
+
+# Mapeamento de cores para as identidades de cor do Magic
+# (rótulos canônicos em ordem WUBRG, ver data_processing.color_identity)
+COLOR_MAP = {
+    'W': '#FFF9A6',  # Branco
+    'U': '#7EB5FF',  # Azul
+    'B': '#000000',  # Preto
+    'R': '#FF5757',  # Vermelho
+    'G': '#4CAF50',  # Verde
+    # Combinações de cores:
+    'WU': '#B3E5FC', 'WB': '#9E9E9E', 'WR': '#FFCDD2',
+    'WG': '#DCEDC8', 'UB': '#7986CB', 'UR': '#90CAF9',
+    'UG': '#B2EBF2', 'BR': '#8D6E63', 'BG': '#8BC34A',
+    'RG': '#FFCC80', 'UBG': '#009688', 'BRG': '#4E342E',
+    'WRG': '#FFA000', 'WUR': '#F06292', 'WUB': '#3F51B5',
+    'WUG': '#4DB6AC',
+    'WUBRG': '#5D4037'  # 5 cores
+}
+
+# Cor padrão das barras (primeira do template plotly) e do item 'Outros'
+# (itens além da página agregados em um só)
+COR_BARRAS = '#636EFA'
+COR_OUTROS = '#BDBDBD'
+
+
+def _ranking_bar(serie, top_x, pagina, titulo, rotulos, outros='media'):
+    """
+    Gráfico de barras de uma página de um ranking, dentro do orçamento de itens.
+
+    A página (ver payload.budget_page) vai em layout.meta['pagina'], usado
+    pela página inicial para navegar até a fatia seguinte.
+    """
+    dados, info = budget_page(serie, top_x, pagina, outros)
+    if info['pagina']:
+        titulo = f"{titulo} ({info['inicio'] + 1}–{info['fim']} de {info['total']})"
+
+    fig = px.bar(
+        x=dados.index,
+        y=dados.to_numpy(),
+        title=titulo,
+        labels=rotulos,
+        template='plotly_white'
+    )
+    if info['outros']:
+        fig.update_traces(marker_color=[COR_BARRAS] * (len(dados) - 1) + [COR_OUTROS])
+    fig.update_layout(CONFIG_LAYOUT, meta={'pagina': info})
+    return fig
+
+
+def create_price_plot(analysis_results, top_x=50, pagina=0):
+    """Gráfico dos decks mais caros (preço total)."""
+    if analysis_results['preco_por_deck'].empty:
+        return create_empty_plot("Dados de preço não disponíveis")
+
+    return _ranking_bar(analysis_results['preco_por_deck'], top_x, pagina,
+                        "Top Decks Mais Caros (Preço Total)", {'x': 'Deck', 'y': 'Preço (USD)'})
+
+
+def create_colors_plot(analysis_results, top_x=50, pagina=0):
+    """Gráfico da distribuição de cores dos comandantes."""
+    if analysis_results['cores_comandantes'].empty:
+        return create_empty_plot("Dados de cores não disponíveis")
+
+    # Fatias além do orçamento somadas em 'Outros' (a pizza mostra todos os decks)
+    cores, info = budget_page(analysis_results['cores_comandantes'], top_x, pagina, outros='soma')
+    fig = px.pie(
+        names=cores.index,
+        values=cores.to_numpy(),
+        title="Distribuição de Cores nos Comandantes",
+        template='plotly_white',
+        color=cores.index,
+        color_discrete_map={**COLOR_MAP, cores.index[-1]: COR_OUTROS} if info['outros'] else COLOR_MAP
+    )
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        marker={'line': {'color': '#ffffff', 'width': 1}}
+    )
+    return fig
+
+
+def create_rank_plot(analysis_results, top_x=50, pagina=0):
+    """Gráfico dos decks por popularidade (EDHREC Rank)."""
+    if analysis_results['edhrec_rank_por_deck'].empty:
+        return create_empty_plot("Dados de rank não disponíveis")
+
+    return _ranking_bar(analysis_results['edhrec_rank_por_deck'], top_x, pagina,
+                        "Top Decks por Popularidade (EDHREC Rank)", {'x': 'Deck', 'y': 'Pontuação (Rank/100)'})
+
+
+def create_common_cards_plot(analysis_results, top_x=50, pagina=0):
+    """Gráfico das cartas mais comuns (exceto lands)."""
+    if analysis_results['cartas_comuns'].empty:
+        return create_empty_plot("Dados de cartas comuns não disponíveis")
+
+    return _ranking_bar(analysis_results['cartas_comuns'], top_x, pagina,
+                        f"Top {top_x} Cartas Mais Comuns (Exceto Lands)", {'x': 'Carta', 'y': 'Número de Decks'})
+
+
+def create_subtype_plot(analysis_results, top_x=50, pagina=0):
+    """Gráfico dos subtipos (tribos) em mais decks."""
+    subtipos = analysis_results.get('subtipos')
+    if subtipos is None or subtipos.empty:
+        return create_empty_plot("Dados de subtipos não disponíveis")
+
+    return _ranking_bar(subtipos, top_x, pagina, f"Top {top_x} Subtipos Mais Jogados (Exceto Lands)",
+                        {'x': 'Subtipo', 'y': 'Número de Decks'})
+
+
+def create_type_plot(analysis_results, tipo, top_x=50, pagina=0):
+    """Gráfico das cartas mais comuns de um tipo."""
+    if tipo not in analysis_results.get('cartas_por_tipo', {}):
+        return create_empty_plot(f"Tipo {tipo} não encontrado nos dados")
+
+    tipo_data = analysis_results['cartas_por_tipo'][tipo]
+    if tipo_data.empty:
+        return create_empty_plot(f"Nenhum dado disponível para {tipo}")
+
+    fig = _ranking_bar(tipo_data, top_x, pagina, f"Top {top_x} Cartas do Tipo {tipo}",
+                       {'x': 'Carta', 'y': 'Número de Decks'})
+
+    # Configurações específicas para gráficos por tipo
+    fig.update_traces(width=0.7)  # Largura das barras
+    return fig
+
+
+# Gráficos gerais, na ordem em que aparecem na página
+GRAFICOS = {
+    'preco_decks': create_price_plot,
+    'edhrec_rank_decks': create_rank_plot,
+    'cores_comandantes': create_colors_plot,
+    'cartas_comuns': create_common_cards_plot,
+    'subtipos': create_subtype_plot,
+}
+
+
 def create_plots(analysis_results, tipos, top_x=50):
     """
     Cria todos os gráficos Plotly a partir dos dados analisados.
@@ -35,140 +189,18 @@ def create_plots(analysis_results, tipos, top_x=50):
     Parâmetros:
         analysis_results (dict): Dicionário com os resultados das análises
         tipos (list): Lista de tipos de cartas a serem analisados
-        top_x (int): Número de itens a mostrar em cada gráfico
+        top_x (int): Número de itens a mostrar em cada gráfico (os demais
+                     são agregados em um item 'Outros'; ver payload.budget_page)
 
     Retorna:
         dict: Dicionário com todos os gráficos gerados
     """
-    plots = {
-        'tipos': {}  # Dicionário para armazenar gráficos por tipo
-    }
-
-    # Configurações de layout comuns para todos os gráficos
-    config_layout = {
-        'margin': {'l': 50, 'r': 50, 'b': 150, 't': 50, 'pad': 4},
-        'xaxis': {
-            'tickangle': -45,
-            'automargin': True,
-            'tickfont': {'size': 10},
-            'title': {'standoff': 15}
-        },
-        'yaxis': {
-            'automargin': True,
-            'title': {'standoff': 15}
-        },
-        'autosize': True,
-        'hovermode': 'x unified'
-    }
-
-    # ==============================================
-    # 1. GRÁFICO: TOP DECKS MAIS CAROS
-    # ==============================================
-    if not analysis_results['preco_por_deck'].empty:
-        plots['preco_decks'] = px.bar(
-            x=analysis_results['preco_por_deck'].head(64).index,
-            y=analysis_results['preco_por_deck'].head(64).values,
-            title=f"Top Decks Mais Caros (Preço Total)",
-            labels={'x': 'Deck', 'y': 'Preço (USD)'},
-            template='plotly_white'
-        )
-        plots['preco_decks'].update_layout(config_layout)
-    else:
-        plots['preco_decks'] = create_empty_plot("Dados de preço não disponíveis")
-
-    # ==============================================
-    # 2. GRÁFICO: DISTRIBUIÇÃO DE CORES
-    # ==============================================
-    if not analysis_results['cores_comandantes'].empty:
-        # Mapeamento de cores para as identidades de cor do Magic
-        color_map = {
-            'W': '#FFF9A6',  # Branco
-            'U': '#7EB5FF',  # Azul
-            'B': '#000000',  # Preto
-            'R': '#FF5757',  # Vermelho
-            'G': '#4CAF50',  # Verde
-            # Combinações de cores:
-            'WU': '#B3E5FC', 'WB': '#9E9E9E', 'WR': '#FFAB91',
-            'WG': '#C8E6C9', 'UB': '#7986CB', 'UR': '#B39DDB',
-            'UG': '#80CBC4', 'BR': '#8D6E63', 'BG': '#689F38',
-            'RG': '#FBC02D', 'GW': '#DCEDC8', 'GU': '#B2EBF2',
-            'GR': '#FFCC80', 'RW': '#FFCDD2', 'RU': '#90CAF9',
-            'BG': '#8BC34A', 'BUG': '#009688', 'BRG': '#795548',
-            'GRW': '#FFA000', 'RWU': '#E91E63', 'WUB': '#3F51B5',
-            'BGR': '#4E342E', 'GUW': '#4DB6AC', 'WUR': '#F06292',
-            'BGRUW': '#5D4037'  # 5 cores
-        }
-
-        plots['cores_comandantes'] = px.pie(
-            names=analysis_results['cores_comandantes'].index,
-            values=analysis_results['cores_comandantes'].values,
-            title="Distribuição de Cores nos Comandantes",
-            template='plotly_white',
-            color=analysis_results['cores_comandantes'].index,
-            color_discrete_map=color_map
-        )
-        plots['cores_comandantes'].update_traces(
-            textposition='inside',
-            textinfo='percent+label',
-            marker={'line': {'color': '#ffffff', 'width': 1}}
-        )
-    else:
-        plots['cores_comandantes'] = create_empty_plot("Dados de cores não disponíveis")
-
-    # ==============================================
-    # 3. GRÁFICO: POPULARIDADE DOS DECKS (EDHREC RANK)
-    # ==============================================
-    if not analysis_results['edhrec_rank_por_deck'].empty:
-        plots['edhrec_rank_decks'] = px.bar(
-            x=analysis_results['edhrec_rank_por_deck'].head(64).index,
-            y=analysis_results['edhrec_rank_por_deck'].head(64).values,
-            title=f"Top Decks por Popularidade (EDHREC Rank)",
-            labels={'x': 'Deck', 'y': 'Pontuação (Rank/100)'},
-            template='plotly_white'
-        )
-        plots['edhrec_rank_decks'].update_layout(config_layout)
-    else:
-        plots['edhrec_rank_decks'] = create_empty_plot("Dados de rank não disponíveis")
-
-    # ==============================================
-    # 4. GRÁFICO: CARTAS MAIS COMUNS (EXCETO LANDS)
-    # ==============================================
-    if not analysis_results['cartas_comuns'].empty:
-        plots['cartas_comuns'] = px.bar(
-            x=analysis_results['cartas_comuns'].head(top_x).index,
-            y=analysis_results['cartas_comuns'].head(top_x).values,
-            title=f"Top {top_x} Cartas Mais Comuns (Exceto Lands)",
-            labels={'x': 'Carta', 'y': 'Número de Decks'},
-            template='plotly_white'
-        )
-        plots['cartas_comuns'].update_layout(config_layout)
-    else:
-        plots['cartas_comuns'] = create_empty_plot("Dados de cartas comuns não disponíveis")
-
-    # ==============================================
-    # 5. GRÁFICOS POR TIPO DE CARTA
-    # ==============================================
+    plots = {nome: criar(analysis_results, top_x) for nome, criar in GRAFICOS.items()}
+
+    # Gráficos por tipo de carta
+    plots['tipos'] = {}
     if 'cartas_por_tipo' in analysis_results:
         for tipo in tipos:
-            if tipo in analysis_results['cartas_por_tipo']:
-                tipo_data = analysis_results['cartas_por_tipo'][tipo]
-                if not tipo_data.empty:
-                    fig = px.bar(
-                        x=tipo_data.head(top_x).index,
-                        y=tipo_data.head(top_x).values,
-                        title=f"Top {top_x} Cartas do Tipo {tipo}",
-                        labels={'x': 'Carta', 'y': 'Número de Decks'},
-                        template='plotly_white'
-                    )
-
-                    # Configurações específicas para gráficos por tipo
-                    fig.update_layout(config_layout)
-                    fig.update_traces(width=0.7)  # Largura das barras
-
-                    plots['tipos'][tipo] = fig
-                else:
-                    plots['tipos'][tipo] = create_empty_plot(f"Nenhum dado disponível para {tipo}")
-            else:
-                plots['tipos'][tipo] = create_empty_plot(f"Tipo {tipo} não encontrado nos dados")
-
-    return plots
\ No newline at end of file
+            plots['tipos'][tipo] = create_type_plot(analysis_results, tipo, top_x)
+
+    return plots
@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+
+from flask import Response, request
+
+from data_processing.metrics import cache_result
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele servimos gzip/identity
+    brotli = None
+
+# Ordem de preferência das codificações oferecidas ao cliente
+CODIFICACOES = ['br', 'gzip']
+
+
+# Gráficos gerais, na ordem em que aparecem na página
+GRAFICOS_GERAIS = ['preco_decks', 'edhrec_rank_decks', 'cores_comandantes', 'cartas_comuns', 'subtipos']
+
+
+def chart_names(tipos):
+    """Nomes de todos os gráficos servidos em /api/charts/<nome>, na ordem da página."""
+    return GRAFICOS_GERAIS + [chart_name(tipo) for tipo in tipos]
+
+
+def chart_figures(plots, tipos):
+    """
+    Lista os gráficos servidos individualmente, na ordem em que aparecem na página.
+
+    Retorna:
+        dict: Nome do gráfico (usado em /api/charts/<nome>) -> figura Plotly
+    """
+    from visualization.plot_creator import create_empty_plot
+
+    figuras = {nome: plots[nome] for nome in GRAFICOS_GERAIS if nome in plots}
+    for tipo in tipos:
+        figura = plots.get('tipos', {}).get(tipo)
+        figuras[chart_name(tipo)] = figura if figura is not None else create_empty_plot(
+            f"Dados não disponíveis para {tipo}")
+
+    return figuras
+
+
+def chart_name(tipo):
+    """Nome do gráfico de um tipo de carta em /api/charts/<nome>."""
+    return f"tipo_{tipo.lower()}"
+
+
+def build_chart(nome, analysis_results, tipos, top_x=50, pagina=0):
+    """
+    Cria só a figura de um gráfico (sem gerar os demais).
+
+    O plotly é importado aqui, no primeiro gráfico pedido, e não no início do app.
+
+    Parâmetros:
+        pagina (int): Fatia do ranking com `top_x` itens (IndexError se não existir)
+
+    Retorna:
+        go.Figure: A figura, ou None se o nome não existir
+    """
+    from visualization.plot_creator import GRAFICOS, create_type_plot
+
+    if nome in GRAFICOS:
+        return GRAFICOS[nome](analysis_results, top_x, pagina)
+    for tipo in tipos:
+        if chart_name(tipo) == nome:
+            return create_type_plot(analysis_results, tipo, top_x, pagina)
+    return None
+
+
+def render_chart(figura):
+    """Serializa uma figura em JSON compacto e pré-comprime."""
+    return build_blob(figura.to_json(), 'application/json')
+
+
+def render_charts(plots, tipos):
+    """Serializa cada gráfico em JSON compacto e pré-comprime (uma vez por snapshot)."""
+    return {nome: render_chart(figura) for nome, figura in chart_figures(plots, tipos).items()}
+
+
+def build_blob(conteudo, mimetype='text/html; charset=utf-8'):
+    """
+    Pré-comprime um conteúdo e calcula seu ETag forte.
+
+    Parâmetros:
+        conteudo (str | bytes): Corpo da resposta
+        mimetype (str): Content-Type servido
+
+    Retorna:
+        dict: Corpo original, variantes comprimidas e ETag
+    """
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+
+    variantes = {'identity': conteudo, 'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['br'] = brotli.compress(conteudo, quality=11)
+
+    return {
+        'etag': hashlib.sha256(conteudo).hexdigest()[:32],
+        'mimetype': mimetype,
+        'variantes': variantes,
+    }
+
+
+def blob_response(blob, cache_control='no-cache'):
+    """
+    Serve um blob pré-comprimido com negociação de Accept-Encoding e GET condicional.
+
+    O ETag inclui a codificação escolhida, para que cada variante tenha um ETag
+    forte distinto. Um If-None-Match correspondente responde 304 sem corpo.
+    """
+    codificacao = 'identity'
+    for candidata in CODIFICACOES:
+        if candidata in blob['variantes'] and request.accept_encodings[candidata]:
+            codificacao = candidata
+            break
+
+    etag = blob['etag'] if codificacao == 'identity' else f"{blob['etag']}-{codificacao}"
+
+    if request.if_none_match:
+        # Revalidação do cache do navegador: 304 é acerto, corpo completo é falta
+        cache_result('http_etag', request.if_none_match.contains(etag))
+
+    if request.if_none_match.contains(etag):
+        resposta = Response(status=304)
+    else:
+        resposta = Response(blob['variantes'][codificacao], mimetype=blob['mimetype'])
+        if codificacao != 'identity':
+            resposta.headers['Content-Encoding'] = codificacao
+
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = cache_control
+    resposta.vary.add('Accept-Encoding')
+    return resposta
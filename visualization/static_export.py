@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from data_processing.color_identity import CORES, MODOS
+from data_processing.config import TIPOS_PADRAO
+from visualization.prerender import build_blob, chart_name, chart_names
+
+# Extensão de cada variante pré-comprimida gravada ao lado do arquivo original
+EXTENSOES = {'gzip': '.gz', 'br': '.br'}
+
+# Tamanho do hash do conteúdo nos nomes dos arquivos
+TAMANHO_HASH = 12
+
+
+def _gravar(raiz, caminho, conteudo, mimetype, com_hash=True):
+    """
+    Grava um arquivo do site e suas variantes pré-comprimidas (.gz e, com brotli, .br).
+
+    Com `com_hash`, o nome recebe o hash do conteúdo ('charts/preco_decks.3f2a….json'):
+    o arquivo nunca muda de conteúdo e pode ser servido com cache imutável.
+
+    Retorna:
+        tuple: (caminho relativo gravado, bytes do original)
+    """
+    blob = build_blob(conteudo, mimetype)
+    if com_hash:
+        base, extensao = os.path.splitext(caminho)
+        caminho = f"{base}.{blob['etag'][:TAMANHO_HASH]}{extensao}"
+
+    destino = os.path.join(raiz, caminho)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    for codificacao, dados in blob['variantes'].items():
+        with open(destino + EXTENSOES.get(codificacao, ''), 'wb') as arquivo:
+            arquivo.write(dados)
+    return caminho.replace(os.sep, '/'), len(blob['variantes']['identity'])
+
+
+def explorer_slices(cubo, tipos):
+    """
+    Fatias do cubo de filtros para o explorador estático, uma por tipo.
+
+    Cada fatia guarda a lista de cartas do tipo uma única vez; cada célula
+    (modo × máscara de cores) referencia as cartas pela posição nessa lista.
+
+    Retorna:
+        dict: Tipo -> {'tipo', 'cartas', 'celulas': {modo: {máscara: [posições, decks]}}}
+    """
+    fatias = {}
+    for tipo in tipos:
+        celulas = {(modo, mascara): serie for (t, modo, mascara), serie in cubo.items() if t == tipo}
+        cartas = sorted({str(nome) for serie in celulas.values() for nome in serie.index})
+        posicao = {nome: i for i, nome in enumerate(cartas)}
+
+        fatia = {'tipo': tipo, 'cartas': cartas, 'celulas': {}}
+        for (modo, mascara), serie in celulas.items():
+            fatia['celulas'].setdefault(modo, {})[str(mascara)] = [
+                [posicao[str(nome)] for nome in serie.index], [int(decks) for decks in serie.values]]
+        fatias[tipo] = fatia
+    return fatias
+
+
+def _templates():
+    """Ambiente Jinja dos templates do app (sem Flask: o site é gerado fora das requisições)."""
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    raiz = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+    return Environment(loader=FileSystemLoader(raiz), autoescape=select_autoescape(['html']))
+
+
+def export_site(filepath, destino, tipos=TIPOS_PADRAO, top_x=50, plotly_js_url=None):
+    """
+    Gera o site estático do dashboard a partir de um dataset.
+
+    Roda o mesmo pipeline do app (carregar → analisar → create_plots e cubo
+    de filtros) e grava:
+        index.html          página inicial, com os gráficos buscados sob demanda
+        explorer.html       explorador tipo × cores, sem servidor
+        charts/*.json       um JSON por gráfico
+        explorer/*.json     uma fatia do cubo de filtros por tipo
+        manifest.json       nome lógico -> arquivo gravado
+    Os JSONs levam o hash do conteúdo no nome e podem ser servidos com cache
+    imutável; as páginas e o manifesto mantêm o nome e devem ser revalidados.
+    Todos os arquivos ganham variantes .gz (e .br, com brotli) para servidores
+    e CDNs que entregam arquivos pré-comprimidos.
+
+    O site é montado em um diretório temporário e trocado de uma vez, então
+    um servidor apontado para `destino` nunca vê uma exportação pela metade.
+
+    Parâmetros:
+        filepath (str): CSV do dataset
+        destino (str): Diretório do site (substituído se existir)
+        tipos (list): Tipos de carta dos gráficos por tipo e do explorador
+        top_x (int): Número de itens em cada gráfico
+        plotly_js_url (str): URL do plotly.js (padrão: CDN na versão do plotly.py)
+
+    Retorna:
+        dict: Manifesto com os arquivos gravados e o total de bytes (sem compressão)
+    """
+    import plotly.offline
+
+    from data_processing.data_analyzer import analyze_data
+    from data_processing.data_loader import load_and_preprocess_data, load_type_indexes
+    from data_processing.filter_cube import build_filter_cube
+    from visualization.plot_creator import create_plots
+    from visualization.prerender import chart_figures
+
+    if plotly_js_url is None:
+        plotly_js_url = f"https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+    df, is_land = load_and_preprocess_data(filepath)
+    analysis_results = analyze_data(df, is_land, tipos, load_type_indexes(filepath))
+    plots = create_plots(analysis_results, tipos, top_x)
+    cubo = build_filter_cube(analysis_results['incidencia'], tipos, top_n=top_x)
+
+    destino = os.path.abspath(destino)
+    pai = os.path.dirname(destino)
+    os.makedirs(pai, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.site-', dir=pai)
+    try:
+        arquivos, total = {}, 0
+
+        for nome, figura in chart_figures(plots, tipos).items():
+            arquivos[f"charts/{nome}"], tamanho = _gravar(tmp, f"charts/{nome}.json", figura.to_json(),
+                                                          'application/json')
+            total += tamanho
+
+        for tipo, fatia in explorer_slices(cubo, tipos).items():
+            conteudo = json.dumps(fatia, ensure_ascii=False, separators=(',', ':'))
+            arquivos[f"explorer/{tipo}"], tamanho = _gravar(tmp, f"explorer/{chart_name(tipo)}.json", conteudo,
+                                                            'application/json')
+            total += tamanho
+
+        templates = _templates()
+        pagina = templates.get_template('index.html').render(
+            num_decks_distintos=analysis_results['num_decks_distintos'],
+            chart_urls={nome: arquivos[f"charts/{nome}"] for nome in chart_names(tipos)},
+            tipo_charts={tipo: chart_name(tipo) for tipo in tipos},
+            plotly_js_url=plotly_js_url,
+            explorer_url='explorer.html',
+            top_x=top_x)
+        explorador = templates.get_template('explorer.html').render(
+            tipos=tipos,
+            cores=CORES,
+            modos=MODOS,
+            fatias={tipo: arquivos[f"explorer/{tipo}"] for tipo in tipos},
+            plotly_js_url=plotly_js_url,
+            index_url='index.html')
+
+        for nome, conteudo in (('index.html', pagina), ('explorer.html', explorador)):
+            arquivos[nome], tamanho = _gravar(tmp, nome, conteudo, 'text/html; charset=utf-8', com_hash=False)
+            total += tamanho
+
+        manifesto = {'origem': os.path.basename(filepath), 'arquivos': arquivos, 'bytes': total}
+        _gravar(tmp, 'manifest.json', json.dumps(manifesto, ensure_ascii=False, indent=2), 'application/json',
+                com_hash=False)
+
+        antigo = None
+        if os.path.isdir(destino):
+            antigo = tempfile.mkdtemp(prefix='.site-old-', dir=pai)
+            os.replace(destino, os.path.join(antigo, 'site'))
+        os.replace(tmp, destino)
+        # mkdtemp cria o diretório só para o dono; o site é lido pelo servidor web
+        os.chmod(destino, 0o755)
+        if antigo:
+            shutil.rmtree(antigo, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return manifesto
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o dashboard como site estático")
+    parser.add_argument('dataset', nargs='?', default='todos_os_decks.csv', help="CSV do dataset")
+    parser.add_argument('--saida', default='site', help="Diretório do site (substituído se existir)")
+    parser.add_argument('--tipos', nargs='+', default=list(TIPOS_PADRAO), help="Tipos de carta dos gráficos")
+    parser.add_argument('--top', type=int, default=50, help="Número de itens em cada gráfico")
+    parser.add_argument('--plotly-js', help="URL do plotly.js (padrão: CDN na versão do plotly.py)")
+    args = parser.parse_args(argv)
+
+    try:
+        manifesto = export_site(args.dataset, args.saida, args.tipos, args.top, args.plotly_js)
+    except (OSError, ValueError) as e:
+        print(f"Erro na exportação: {e}")
+        return 1
+
+    print(f"Site exportado em {args.saida}: {len(manifesto['arquivos'])} arquivos, "
+          f"{manifesto['bytes'] / 1024:.0f} KB sem compressão")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())